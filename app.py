@@ -1,15 +1,19 @@
 import os
-import json
 import time
-import hashlib
+import html
 import streamlit as st
-import google.generativeai as genai
-from tavily import TavilyClient
 from dotenv import load_dotenv
-from typing import TypedDict, List
-from langgraph.graph import StateGraph, END
-from ecdsa import SigningKey, VerifyingKey, SECP256k1
-import tweepy
+from ledger import Ledger, import_json_array
+from signing import payload_content
+from keystore import KeyStore
+from swarm import get_workflow, initial_state, run_config, scout_queries, tavily_search
+import trends
+import prescreen
+import personas
+from cache import get_cache
+from search import SearchIndex
+import tracing
+from jobqueue import JobQueue, JobQueueError, BroadcastWorkers, idempotency_key, DRAFT, SIGNED, QUEUED, BROADCASTING, BROADCAST, FAILED
 
 # Load environment variables
 load_dotenv()
@@ -23,22 +27,26 @@ X_CONSUMER_SECRET = os.getenv("X_CONSUMER_SECRET")
 X_ACCESS_TOKEN = os.getenv("X_ACCESS_TOKEN")
 X_ACCESS_SECRET = os.getenv("X_ACCESS_SECRET")
 
-BRAND_FILE = "brand_profile.json"
 LOG_FILE = "posts_log.json"
+LEDGER_DIR = "ledger"
+KEYS_DIR = "keys"
+JOBS_FILE = "jobs.sqlite3"
+BROADCAST_WORKERS = 4  # posts in flight are capped again by the "x" rate limiter
+AUDIT_PAGE_SIZE = 5
+SWARM_MODES = {"Streaming": "streaming", "Parallel": "concurrent", "Serial": "serial"}
+JOB_BADGES = {
+    DRAFT: ("badge-neutral", "fa-pencil", "Draft"),
+    SIGNED: ("badge-primary", "fa-lock", "Secured"),
+    QUEUED: ("badge-warning", "fa-clock", "Queued"),
+    BROADCASTING: ("badge-warning", "fa-satellite-dish", "Broadcasting"),
+    BROADCAST: ("badge-success", "fa-check", "Broadcast"),
+    FAILED: ("badge-neutral", "fa-triangle-exclamation", "Failed"),
+}
 
 if not GEMINI_API_KEY:
     st.error("❌ Missing GEMINI_API_KEY. Please check your .env file.")
     st.stop()
 
-# --- MODEL SELECTION ---
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('models/gemini-2.5-flash-lite')
-except Exception:
-    model = genai.GenerativeModel('models/gemini-1.5-flash')
-
-tavily = TavilyClient(api_key=TAVILY_API_KEY) if TAVILY_API_KEY else None
-
 # --- ENHANCED THEME CONFIG ---
 if 'theme_color' not in st.session_state:
     st.session_state.theme_color = "Cyber"
@@ -92,7 +100,11 @@ t = themes[st.session_state.theme_color]
 
 # --- ADVANCED UI STYLING ---
 # --- ADVANCED UI STYLING ---
-st.markdown(f"""
+@st.cache_resource(show_spinner=False)
+def render_css(theme_name: str) -> str:
+    """Themed stylesheet, built once per theme per process instead of on every rerun."""
+    t = themes[theme_name]
+    return f"""
 <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=JetBrains+Mono:wght@400;500&display=swap');
@@ -380,119 +392,90 @@ st.markdown(f"""
     }}
 
 </style>
-""", unsafe_allow_html=True)
+"""
+
+st.markdown(render_css(st.session_state.theme_color), unsafe_allow_html=True)
 
 # --- UTILITY & CRYPTO LOGIC (Retained) ---
-# --- LANGGRAPH STATE DEFINITION ---
-class AgentState(TypedDict):
-    topic: str
-    brand_desc: str
-    raw_trends: List[str]
-    selected_trend: str
-    architect_reasoning: str
-    final_posts: List[str]
-    critic_feedback: str
-    
-def safe_generate_content(prompt, retries=2, delay=2):
-    for i in range(retries):
-        try: return model.generate_content(prompt)
-        except Exception as e:
-            if "429" in str(e) and i < retries - 1:
-                time.sleep(delay)
-                continue
-            raise e
-
-def log_post(content: str, signature: str, tweet_id: str, public_key: str):
-    new_entry = {"timestamp": int(time.time()), "content": content, "signature": signature, "tweet_id": tweet_id, "public_key": public_key}
-    log_data = []
-    if os.path.exists(LOG_FILE):
-        try:
-            with open(LOG_FILE, "r") as f: log_data = json.load(f)
-        except: log_data = []
-    log_data.append(new_entry)
-    with open(LOG_FILE, "w") as f: json.dump(log_data, f, indent=4)
-
-def get_or_create_keys():
-    if 'private_key' not in st.session_state:
-        sk = SigningKey.generate(curve=SECP256k1)
-        st.session_state.private_key = sk
-        st.session_state.public_key = sk.verifying_key
-    return st.session_state.private_key, st.session_state.public_key
+@st.cache_resource
+def get_ledger():
+    ledger = Ledger(LEDGER_DIR, signer=get_keystore().sign_digest)
+    import_json_array(ledger, LOG_FILE)  # one-time migration of the legacy JSON array
+    return ledger
+
+@st.cache_resource
+def get_search():
+    search = SearchIndex(get_ledger())
+    search.sync()  # backfills once; afterwards only new entries are indexed
+    return search
+
+def is_novel(post: str) -> bool:
+    with tracing.span("search.duplicate_check"):
+        return get_search().duplicate_of(post) is None
+
+def recent_posts() -> list:
+    return [r.get("content", "") for r in get_ledger().tail(prescreen.RECENT_POSTS)]
+
+@st.cache_resource
+def get_keystore():
+    return KeyStore(KEYS_DIR)
 
 def sign_post(content: str):
-    sk, _ = get_or_create_keys()
-    timestamp = str(int(time.time()))
-    payload = f"{content}|TS:{timestamp}"
-    content_hash = hashlib.sha256(payload.encode()).digest()
-    signature = sk.sign(content_hash)
-    return signature.hex(), payload
-
-def verify_post(payload: str, signature_hex: str, public_key_hex: str):
-    try:
-        vk = VerifyingKey.from_string(bytes.fromhex(public_key_hex), curve=SECP256k1)
-        content_hash = hashlib.sha256(payload.encode()).digest()
-        return vk.verify(bytes.fromhex(signature_hex), content_hash)
-    except: return False
-
-def post_to_x(content: str, signature: str = None, demo_mode: bool = False):
+    with tracing.span("sign"):
+        return get_keystore().sign_record(content)
+
+def sign_posts(contents: list):
+    """One signature for the whole batch; each record carries its Merkle inclusion path."""
+    with tracing.span("sign.batch", posts=len(contents)):
+        return get_keystore().sign_batch(contents)
+
+def post_to_x(signed: dict, demo_mode: bool = False):
+    content = payload_content(signed["payload"])  # broadcast exactly what was signed
     if demo_mode:
         time.sleep(1)
-        tweet_id = f"DEMO_{int(time.time())}"
-        _, vk = get_or_create_keys()
-        log_post(content, signature, tweet_id, vk.to_string().hex())
-        return True, tweet_id
-    # Twitter logic omitted for brevity, same as original
-    return False, "Live API logic"
-
-# --- AGENT NODES (Improved Visuals) ---
-def scout_node(state: AgentState):
-    with st.status("📡 **Scout** researching live trends...", expanded=False) as status:
-        try:
-            results = tavily.search(query=state["topic"], search_depth="basic")['results']
-            state["raw_trends"] = [r['content'] for r in results[:3]]
-            status.update(label="✅ Scout found 3 live trends", state="complete")
-        except:
-            state["raw_trends"] = ["No live trends found."]
-            status.update(label="⚠️ Scout research limited", state="error")
-    return state
-
-def architect_node(state: AgentState):
-    with st.status("📐 **Architect** strategizing...", expanded=False) as status:
-        prompt = f"Brand Persona: {state['brand_desc']}\nTrends: {state['raw_trends']}\nPick the best trend. Format: TREND: [text] REASON: [text]"
-        response = safe_generate_content(prompt).text
-        if "TREND:" in response and "REASON:" in response:
-            state["selected_trend"] = response.split("TREND:")[1].split("REASON:")[0].strip()
-            state["architect_reasoning"] = response.split("REASON:")[1].strip()
-        status.update(label="✅ Architect strategy finalized", state="complete")
-    return state
-
-def creative_node(state: AgentState):
-    with st.status("🎨 **Creative** drafting content...", expanded=False) as status:
-        prompt = f"Topic: {state['selected_trend']}\nReason: {state['architect_reasoning']}\nVoice: {state['brand_desc']}\nWrite 3 X posts separated by '---'."
-        response = safe_generate_content(prompt).text
-        state["final_posts"] = [p.strip() for p in response.split("---") if len(p.strip()) > 10]
-        status.update(label=f"✅ Creative generated {len(state['final_posts'])} drafts", state="complete")
-    return state
-
-def critic_node(state: AgentState):
-    with st.status("⚖️ **Critic** reviewing for consistency...", expanded=False) as status:
-        prompt = f"Review these posts for brand consistency: {state['final_posts']}. Give short feedback."
-        state["critic_feedback"] = safe_generate_content(prompt).text
-        status.update(label="✅ Critic review complete", state="complete")
-    return state
-
-def build_workflow():
-    workflow = StateGraph(AgentState)
-    workflow.add_node("scout", scout_node)
-    workflow.add_node("architect", architect_node)
-    workflow.add_node("creative", creative_node)
-    workflow.add_node("critic", critic_node)
-    workflow.set_entry_point("scout")
-    workflow.add_edge("scout", "architect")
-    workflow.add_edge("architect", "creative")
-    workflow.add_edge("creative", "critic")
-    workflow.add_edge("critic", END)
-    return workflow.compile()
+        return True, f"DEMO_{int(time.time())}_{idempotency_key(signed)[:12]}"  # unique per job, even for one batch signature
+    import x_api  # only the live path needs tweepy; keeps ~200 ms off cold start
+    if not x_api.has_credentials():
+        return False, "Missing X_* credentials in .env"
+    try: return True, x_api.post_tweet(content)
+    except Exception as e: return False, f"{type(e).__name__}: {e}"
+
+@st.cache_resource
+def get_personas():
+    return personas.get_store()  # the same instance `initial_state` resolves brands from
+
+@st.cache_resource
+def get_jobs():
+    return JobQueue(JOBS_FILE)
+
+@st.cache_resource
+def get_broadcaster():
+    """Process-wide workers that drain the broadcast queue; they outlive every rerun and session."""
+    ledger, search = get_ledger(), get_search()  # captured here: worker threads have no script run context
+
+    def publish(job: dict) -> str:
+        success, result = post_to_x(job["signed"], demo_mode=job["demo"])
+        if not success: raise RuntimeError(result)
+        return result
+
+    def record(job: dict, tweet_id: str):
+        with tracing.span("ledger.append"):
+            if ledger.find_tweet(tweet_id) is None:  # a retried job may have logged before it crashed
+                ledger.append({"timestamp": int(time.time()), "content": payload_content(job["signed"]["payload"]), "tweet_id": tweet_id, **job["signed"]})
+        with tracing.span("search.sync"):
+            search.sync()
+
+    return BroadcastWorkers(get_jobs(), publish, record, workers=BROADCAST_WORKERS)
+
+@st.cache_resource
+def get_trend_ingestor():
+    """Keeps watched topics' trends fresh in the background, so the Scout reads them from the local index."""
+    index = trends.get_index()
+    return trends.TrendIngestor(index, tavily_search, queries=scout_queries).start() if index else None
+
+@st.cache_resource
+def get_metrics_server():
+    return tracing.serve(int(tracing.METRICS_PORT)) if tracing.METRICS_PORT else None
 
 # --- UI COMPONENTS ---
 def render_header():
@@ -520,6 +503,60 @@ def render_header():
 </div>
 """, unsafe_allow_html=True)
 
+def live_draft_listener(container, preview):
+    """Swarm listener that renders drafts in `container` as they stream and mirrors finished ones into `preview`."""
+    slots, drafts, reviews = {}, {}, {}
+
+    def card(index: int, body: str, note: str) -> str:
+        return f"""
+        <div class="saas-card" style="padding: 15px; margin-bottom: 10px;">
+            <div style="display:flex; justify-content:space-between; margin-bottom:10px;">
+                <span class="status-badge badge-neutral"><i class="fas fa-pencil"></i> {note}</span>
+                <small style="opacity:0.5">GEN-{index+1}</small>
+            </div>
+            <p style="margin: 0;">{html.escape(body)}</p>
+        </div>
+        """
+
+    def listener(event: str, index: int, text: str):
+        if index not in slots: slots[index] = container.empty()
+        if event == "partial":
+            slots[index].markdown(card(index, text + " ▌", "Writing"), unsafe_allow_html=True)
+            return
+        if event == "draft": drafts[index] = text
+        else: reviews[index] = text
+        note = f"Critic: {reviews[index]}" if index in reviews else "Critic reviewing..."
+        slots[index].markdown(card(index, drafts[index], note), unsafe_allow_html=True)
+        with preview.container():
+            st.info("⏳ Drafts arriving from the swarm; signing unlocks when the run completes.")
+            for i in sorted(drafts):
+                st.markdown(card(i, drafts[i], "Reviewed" if i in reviews else "Critic reviewing..."), unsafe_allow_html=True)
+
+    return listener
+
+@st.fragment(run_every=2)
+def watch_broadcasts(run_id: int, statuses: list):
+    """Poll the queue while broadcasts are in flight and rerun the page once any of this run's jobs moves on."""
+    current = [job["status"] for job in get_jobs().run(run_id)["jobs"]]
+    if current != statuses:
+        st.rerun(scope="app")
+    st.caption(f"📡 {sum(s in (QUEUED, BROADCASTING) for s in current)} broadcast(s) in flight; you can leave this page.")
+
+def render_timing():
+    """Sidebar breakdown of where time went in this process, slowest total first; drawn last so it includes this run."""
+    metrics = tracing.snapshot()
+    with st.sidebar.expander("⏱️ Timing Breakdown", expanded=False):
+        if not metrics["spans"]:
+            st.caption("No timed operations yet. Run the swarm or sign a post.")
+            return
+        rows = [{"span": name, "calls": m["count"], "errors": m["errors"], "mean ms": m["mean_ms"], "p95 ms": m["p95_ms"], "total s": round(m["total_ms"] / 1000, 2)}
+                for name, m in sorted(metrics["spans"].items(), key=lambda item: -item[1]["total_ms"])]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+        if metrics["counters"]:
+            st.caption(" · ".join(f"{name}: {value:g}" for name, value in metrics["counters"].items()))
+        if tracing.METRICS_PORT:
+            st.caption(f"Prometheus metrics on http://127.0.0.1:{tracing.METRICS_PORT}/metrics")
+
 def render_sidebar():
     with st.sidebar:
         st.markdown(f"""
@@ -541,25 +578,34 @@ def render_sidebar():
             st.rerun()
             
         st.markdown(f"<div style='margin-top: 20px;'></div>", unsafe_allow_html=True)
+        store = get_personas()
+        if "pending_brand" in st.session_state:  # a brand created this run; select it before the widget exists
+            st.session_state.brand_id = st.session_state.pop("pending_brand")
+        brand_id = st.selectbox("Brand", options=store.brand_ids(), key="brand_id", format_func=lambda bid: store.get(bid).name)
         demo_mode = st.toggle("Simulation Mode", value=True)
+        swarm_mode = SWARM_MODES[st.selectbox("Swarm Mode", options=list(SWARM_MODES), help="Streaming shows drafts as they are written; Parallel fans out searches and drafts; Serial runs one call at a time")]
+        cache = get_cache()
+        if cache:
+            stats = cache.stats()
+            st.caption(f"Response cache: {sum(stats['hits'].values())} hits · {sum(stats['misses'].values())} misses · {stats['entries']} entries")
+        index = trends.get_index()
+        if index:
+            stats = index.stats()
+            st.caption(f"Trend index: {stats['trends']} trends · {stats['topics']} topics watched")
         
         st.divider()
         
         st.markdown(f"<p style='font-size: 0.8rem; font-weight: 600; color: {t['accent']}; text-transform: uppercase; letter-spacing: 1px; margin-bottom: 10px;'>Identity Key</p>", unsafe_allow_html=True)
-        _, vk = get_or_create_keys()
-        key_str = vk.to_string().hex()
-        st.code(key_str[:24] + "...", language="text")
-        st.caption(f"Fingerprint: {hashlib.sha256(key_str.encode()).hexdigest()[:8]}")
+        pair = get_keystore().active()
+        st.code(pair.public_key[:24] + "...", language="text")
+        st.caption(f"Key ID: {pair.key_id}")
         
-    return demo_mode
+    return demo_mode, swarm_mode, brand_id
 
 # --- MAIN APP LAYOUT ---
 render_header()
-demo_mode = render_sidebar()
-
-brand_data = {"description": "A cybersecurity researcher who likes to share tips in a witty way.", "sample_posts": []}
-if os.path.exists(BRAND_FILE):
-    with open(BRAND_FILE, "r") as f: brand_data = json.load(f)
+demo_mode, swarm_mode, brand_id = render_sidebar()
+persona = get_personas().get(brand_id)
 
 # --- MAIN TABS ---
 tab_identity, tab_swarm, tab_approval, tab_audit = st.tabs(["Identity Persona", "Agent Swarm", "Approval Queue", "Audit Trail"])
@@ -567,13 +613,25 @@ tab_identity, tab_swarm, tab_approval, tab_audit = st.tabs(["Identity Persona",
 with tab_identity:
     st.markdown(f"<div class='saas-card'>", unsafe_allow_html=True)
     st.markdown(f"<h3 style='margin-bottom: 20px;'>System Persona</h3>", unsafe_allow_html=True)
-    new_desc = st.text_area("Define the high-level prompt for the agent swarm:", value=brand_data["description"], height=200)
+    new_desc = st.text_area("Define the high-level prompt for the agent swarm:", value=persona.description, height=200, key=f"persona_{brand_id}_{persona.version}")
+    st.caption(f"{persona.name} · version {persona.version} · {len(persona.sample_posts)} sample posts")
     
-    col1, col2 = st.columns([1, 4])
+    col1, col2, col3 = st.columns([1, 2, 1])
     with col1:
         if st.button("Update Profile", use_container_width=True, type="primary"):
-            with open(BRAND_FILE, "w") as f: json.dump({"description": new_desc, "sample_posts": []}, f)
+            get_personas().save(brand_id, new_desc)  # sample posts carry over to the new version
             st.toast("Identity profile updated successfully!", icon="✅")
+            st.rerun()
+    with col2:
+        new_brand = st.text_input("New brand id", placeholder="e.g. acme", label_visibility="collapsed")
+    with col3:
+        if st.button("Create Brand", use_container_width=True, disabled=not new_brand.strip()):
+            if new_brand.strip() in get_personas().brand_ids():
+                st.error(f"Brand '{new_brand.strip()}' already exists")
+            else:
+                get_personas().save(new_brand.strip(), new_desc, sample_posts=[])
+                st.session_state.pending_brand = new_brand.strip()
+                st.rerun()
     st.markdown("</div>", unsafe_allow_html=True)
 
 with tab_swarm:
@@ -598,16 +656,19 @@ with tab_swarm:
     topic = st.text_input("Mission Objective", value="Latest social engineering tactics in 2024", placeholder="What should the agents focus on?")
     
     if st.button("🚀 Initialize Swarm Protocol", type="primary", use_container_width=True):
-        graph = build_workflow()
-        initial_state = {"topic": topic, "brand_desc": brand_data["description"], "raw_trends": [], "selected_trend": "", "architect_reasoning": "", "final_posts": [], "critic_feedback": ""}
-        final_state = graph.invoke(initial_state)
-        st.session_state.last_run = final_state
+        preview = tab_approval.empty()
+        listener = live_draft_listener(st.container(), preview) if swarm_mode == "streaming" else None
+        with tracing.span("swarm.run", mode=swarm_mode):
+            final_state = get_workflow(swarm_mode).invoke(initial_state(topic, brand_id=brand_id), config=run_config(st.status, listener, is_novel, recent_posts))
+        preview.empty()
+        st.session_state.run_id = get_jobs().add_run(topic, final_state)
         st.balloons()
     st.markdown("</div>", unsafe_allow_html=True)
 
 with tab_approval:
-    if "last_run" in st.session_state:
-        state = st.session_state.last_run
+    run = get_jobs().run(st.session_state.get("run_id"))  # falls back to the newest run after a restart
+    if run:
+        state = run["state"]
         
         # Strategy Insight Card
         st.markdown(f"""
@@ -617,14 +678,20 @@ with tab_approval:
         </div>
         """, unsafe_allow_html=True)
         
+        statuses = [job["status"] for job in run["jobs"]]
+        if QUEUED in statuses or BROADCASTING in statuses:
+            watch_broadcasts(run["id"], statuses)
+        
+        signable = []  # (job id, edited text) of drafts the batch button may sign
         cols = st.columns(3)
-        for i, post in enumerate(state["final_posts"]):
+        for i, job in enumerate(run["jobs"]):
             with cols[i % 3]:
-                is_signed = f"signed_{i}" in st.session_state
+                is_signed = job["status"] != DRAFT
                 
                 # Render Card
                 card_class = "saas-card card-signed" if is_signed else "saas-card"
-                badge = f'<span class="status-badge badge-primary"><i class="fas fa-lock"></i> Secured</span>' if is_signed else f'<span class="status-badge badge-neutral"><i class="fas fa-pencil"></i> Draft</span>'
+                badge_class, icon, label = JOB_BADGES[job["status"]]
+                badge = f'<span class="status-badge {badge_class}"><i class="fas {icon}"></i> {label}</span>'
                 
                 st.markdown(f"""
                 <div class="{card_class}">
@@ -634,25 +701,52 @@ with tab_approval:
                     </div>
                 """, unsafe_allow_html=True)
                 
-                edited = st.text_area("Content", value=post, key=f"edit_{i}", height=140, label_visibility="collapsed")
+                edited = st.text_area("Content", value=job["content"], key=f"edit_{job['id']}", height=140, label_visibility="collapsed", disabled=is_signed)
                 
                 st.markdown("</div>", unsafe_allow_html=True)
                 
+                duplicate = None if is_signed else get_search().duplicate_of(edited)
+                if duplicate:
+                    st.warning(f"Near-duplicate ({duplicate['similarity']:.0%}) of post #{duplicate['seq']}: “{duplicate['content'][:80]}”")
+                    allow_duplicate = st.checkbox("Sign anyway", key=f"dup_ok_{job['id']}")
+                if not is_signed and (duplicate is None or allow_duplicate):
+                    signable.append((job["id"], edited))
+                if job["status"] == BROADCAST:
+                    st.caption(f"Tweet ID: {job['tweet_id']}")
+                elif job["error"]:
+                    st.caption(f"Last attempt failed: {job['error']}")
+                
                 # Actions
                 c1, c2 = st.columns(2)
                 with c1:
-                    if st.button(f"Signs", key=f"sign_{i}", use_container_width=True, disabled=is_signed):
-                        sig, payload = sign_post(edited)
-                        st.session_state[f"signed_{i}"] = {"sig": sig, "payload": payload}
+                    if st.button(f"Signs", key=f"sign_{job['id']}", use_container_width=True, disabled=is_signed or (duplicate is not None and not allow_duplicate)):
+                        get_jobs().sign(job["id"], edited, sign_post(edited))
                         st.rerun()
                 with c2:
-                    if is_signed:
-                        if st.button(f"Broadcast", key=f"post_{i}", type="primary", use_container_width=True):
-                            success, result = post_to_x(edited, st.session_state[f"signed_{i}"]['sig'], demo_mode=demo_mode)
-                            if success: st.toast("Content successfully broadcasted!", icon="📡")
+                    if job["status"] in (SIGNED, FAILED):
+                        if st.button("Broadcast" if job["status"] == SIGNED else "Retry", key=f"post_{job['id']}", type="primary", use_container_width=True):
+                            try:
+                                if job["status"] == SIGNED: get_jobs().enqueue(job["id"], demo=demo_mode)
+                                else: get_jobs().retry(job["id"])
+                            except JobQueueError as e:
+                                st.error(f"Not queued: {e}")
+                            else:
+                                get_broadcaster().notify()
+                                st.toast("Queued for broadcast", icon="📡")
+                                st.rerun()
+        
+        if len(signable) > 1:
+            if st.button(f"Sign all {len(signable)} drafts", key=f"sign_all_{run['id']}", use_container_width=True, help="One signature over a Merkle manifest of every draft"):
+                records = sign_posts([text for _, text in signable])
+                get_jobs().sign_many([(job_id, text, record) for (job_id, text), record in zip(signable, records)])
+                st.rerun()
     else:
         st.info("⚠️ Approval queue empty. Deploy agents from the Swarm tab.")
 
+get_metrics_server()
+get_broadcaster()  # start draining jobs left queued by a previous process
+get_trend_ingestor()
+
 with tab_audit:
     # Header
     st.markdown(f"""
@@ -662,26 +756,50 @@ with tab_audit:
     </div>
     """, unsafe_allow_html=True)
     
-    if os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "r") as f: logs = json.load(f)
-        for entry in reversed(logs[-5:]):
+    ledger = get_ledger()
+    total = ledger.count()
+    c1, c2 = st.columns([3, 1])
+    with c1:
+        lookup = st.text_input("Search posts or Tweet ID", placeholder="e.g. phishing, or DEMO_1712345678", key="audit_lookup").strip()
+    with c2:
+        page = st.number_input("Page", min_value=1, max_value=max(1, -(-total // AUDIT_PAGE_SIZE)), value=1, key="audit_page", disabled=bool(lookup))
+    if lookup:
+        found = ledger.find_tweet(lookup)
+        logs = [found] if found else get_search().search(lookup, limit=AUDIT_PAGE_SIZE * 2)
+    else:
+        logs = ledger.page(page - 1, AUDIT_PAGE_SIZE)
+        st.caption(f"{total} entries · page {page} of {max(1, -(-total // AUDIT_PAGE_SIZE))} · newest first")
+    sealed_through = ledger.sealed_through()
+    if logs:
+        for entry in logs:
+            if entry['seq'] <= sealed_through:
+                seal_badge = f'<span class="status-badge badge-success"><i class="fas fa-link"></i> Sealed · Batch {ledger.batch_for(entry["seq"])["batch"]}</span>'
+            else:
+                seal_badge = '<span class="status-badge badge-warning"><i class="fas fa-link"></i> Chained · Awaiting Seal</span>'
             st.markdown(f"""
             <div class="timeline-item">
                 <div class="timeline-dot"></div>
                 <div class="saas-card" style="margin-bottom: 10px; padding: 15px;">
                     <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
-                        <span class="status-badge badge-success"><i class="fas fa-check-circle"></i> Verified on-chain</span>
+                        {seal_badge}
                         <small style="opacity: 0.5; font-family: 'JetBrains Mono';">{time.ctime(entry['timestamp'])}</small>
                     </div>
-                    <p style="margin-bottom: 15px;">{entry['content']}</p>
+                    <p style="margin-bottom: 15px;">{html.escape(entry['content'])}</p>
                     <div style="background: {t['bg']}; padding: 10px; border-radius: 6px; border: {t['border']};">
                         <div style="display: flex; gap: 10px; align-items: center;">
                             <i class="fas fa-key" style="opacity: 0.5;"></i>
                             <code style="font-size: 0.7rem; color: {t['accent']};">{entry['signature'][:60]}...</code>
                         </div>
+                        <div style="display: flex; gap: 10px; align-items: center; margin-top: 6px;">
+                            <i class="fas fa-link" style="opacity: 0.5;"></i>
+                            <code style="font-size: 0.7rem; opacity: 0.7;">#{entry['seq']} {entry['hash'][:16]}… ← {entry['prev_hash'][:16]}…</code>
+                        </div>
                     </div>
                 </div>
             </div>
             """, unsafe_allow_html=True)
     else:
-        st.markdown('<div style="text-align:center; padding:50px; opacity:0.5;"><i class="fas fa-box-open" style="font-size:3rem;"></i><p>Ledger is empty</p></div>', unsafe_allow_html=True)
\ No newline at end of file
+        empty_note = f"No posts match {html.escape(lookup)}" if lookup else "Ledger is empty"
+        st.markdown(f'<div style="text-align:center; padding:50px; opacity:0.5;"><i class="fas fa-box-open" style="font-size:3rem;"></i><p>{empty_note}</p></div>', unsafe_allow_html=True)
+
+render_timing()
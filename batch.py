@@ -0,0 +1,164 @@
+"""Headless batch runner: the agent swarm over a JSONL file of topics.
+
+Each input line is either a JSON object or a bare topic string. The topic is
+taken from `topic`, `title` or `body` (first one present), the id from `id`
+or `request_id` (else the line number), so `requests.jsonl`-style files work
+as-is. Topics run concurrently on a bounded worker pool over one compiled
+graph, and each result is appended to the output JSONL (flushed and fsynced)
+the moment it finishes.
+
+Re-running with the same `--out` resumes: ids that already have an "ok"
+record are skipped, failed ones are retried, and a line torn by a crash is
+dropped. When an id appears more than once the last record wins.
+
+    python batch.py topics.jsonl --out results.jsonl --workers 8 --brand acme --ledger ledger
+
+Each topic uses the brand's latest persona from the in-memory persona store
+(see `personas`), so topics never read the profile from disk. With
+`--ledger`, drafts are pre-screened against that ledger's recent posts (see
+`prescreen`) before any reaches the Critic.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator, Optional, Set, Tuple
+
+import personas
+import prescreen
+from filelock import locked
+from swarm import get_workflow, initial_state, run_config
+
+TOPIC_FIELDS = ("topic", "title", "body")
+ID_FIELDS = ("id", "request_id")
+RESULT_FIELDS = ("brand_id", "persona_version", "selected_trend", "architect_reasoning", "final_posts", "critic_feedback")
+
+
+def read_topics(path: str) -> Iterator[Tuple[str, str]]:
+    """Yield (id, topic) pairs from a JSONL file, skipping blank and topic-less lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try: item = json.loads(line)
+            except ValueError: item = line
+            if not isinstance(item, dict):
+                item = {"topic": str(item)}
+            topic = next((str(item[k]).strip() for k in TOPIC_FIELDS if item.get(k)), "")
+            if topic:
+                yield str(next((item[k] for k in ID_FIELDS if item.get(k) is not None), f"line-{number}")), topic
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids with a successful record in `path`; truncates a torn last line left by a crash."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb") as f:
+        data = f.read()
+    if data and not data.endswith(b"\n"):
+        with open(path, "r+b") as f:
+            f.truncate(data.rfind(b"\n") + 1)
+    done = set()
+    for line in data.splitlines():
+        try: record = json.loads(line)
+        except ValueError: continue
+        if record.get("status") == "ok": done.add(str(record.get("id")))
+        else: done.discard(str(record.get("id")))
+    return done
+
+
+def run_topic(graph, topic_id: str, topic: str, brand_id: str, config: Optional[dict] = None) -> dict:
+    started = time.perf_counter()
+    record = {"id": topic_id, "topic": topic}
+    try:
+        state = graph.invoke(initial_state(topic, brand_id=brand_id), config=config)
+        record.update(status="ok", **{k: state.get(k) for k in RESULT_FIELDS})
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record.update(elapsed_s=round(time.perf_counter() - started, 3), finished_at=int(time.time()))
+    return record
+
+
+def run_batch(source: str, out: str, workers: int = 4, mode: str = "concurrent", brand_id: str = personas.DEFAULT_BRAND,
+              limit: Optional[int] = None, on_result: Optional[Callable[[dict], None]] = None, ledger_dir: Optional[str] = None) -> dict:
+    """Run every pending topic in `source`, appending one result line per topic to `out`.
+
+    At most `2 * workers` topics are queued at once, so arbitrarily large
+    inputs are streamed rather than loaded. Holding `out`'s lock for the
+    whole run keeps two runners from duplicating work on the same file.
+    """
+    graph = get_workflow(mode)
+    personas.get_store().get(brand_id)  # fail fast on an unknown brand, before any topic runs
+    recent = []
+    if ledger_dir:
+        from ledger import Ledger
+        recent = [r.get("content", "") for r in Ledger(ledger_dir).tail(prescreen.RECENT_POSTS)]  # one snapshot for the whole run
+    config = run_config(recent_posts=lambda: recent)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    write_lock = threading.Lock()
+    started = time.perf_counter()
+
+    with locked(out + ".lock"):
+        done = completed_ids(out)
+        with open(out, "a", encoding="utf-8") as sink, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            def record(result: dict):
+                with write_lock:
+                    sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    sink.flush()
+                    os.fsync(sink.fileno())
+                    counts[result["status"]] += 1
+                if on_result: on_result(result)
+
+            in_flight, submitted = set(), 0
+            for topic_id, topic in read_topics(source):
+                if topic_id in done:
+                    counts["skipped"] += 1
+                    continue
+                if limit is not None and submitted >= limit:
+                    break
+                in_flight.add(pool.submit(run_topic, graph, topic_id, topic, brand_id, config))
+                submitted += 1
+                if len(in_flight) >= workers * 2:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished: record(future.result())
+            for future in wait(in_flight).done:
+                record(future.result())
+
+    elapsed = time.perf_counter() - started
+    processed = counts["ok"] + counts["error"]
+    return {**counts, "workers": workers, "mode": mode, "elapsed_s": round(elapsed, 3),
+            "topics_per_min": round(processed / elapsed * 60, 1) if elapsed and processed else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the AuthentiPost agent swarm over a JSONL file of topics")
+    parser.add_argument("source", help="input JSONL (one topic per line)")
+    parser.add_argument("--out", default="batch_results.jsonl", help="output JSONL; re-running resumes it")
+    parser.add_argument("--workers", type=int, default=4, help="topics in flight at once")
+    parser.add_argument("--mode", choices=("serial", "concurrent"), default="concurrent", help="swarm workflow per topic")
+    parser.add_argument("--brand", default=personas.DEFAULT_BRAND, help="brand id in the persona store")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many new topics")
+    parser.add_argument("--ledger", default=None, help="ledger directory whose recent posts drafts must not repeat")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    def progress(result: dict):
+        print(f"{result['status']:<6}{result['elapsed_s']:>8.1f}s  {result['id']}", file=sys.stderr)
+
+    try:
+        summary = run_batch(args.source, args.out, workers=args.workers, mode=args.mode,
+                            brand_id=args.brand, limit=args.limit, on_result=progress, ledger_dir=args.ledger)
+    except personas.PersonaError as e:
+        raise SystemExit(str(e))
+    print(json.dumps(summary, indent=4))
+    raise SystemExit(0 if summary["error"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Broadcast throughput against the local X API stand-in.
+
+    python -m benchmarks.bench_broadcast --posts 200 --workers 4 --json bench_broadcast.json
+
+* before: posts one at a time with a fresh tweepy client per post, as a
+  naive live `post_to_x` would;
+* after: the durable job queue drained by `BroadcastWorkers` through the
+  shared client and the "x" rate limiter;
+* throttled: the same, against a stand-in that only accepts `--quota` posts
+  per second and answers the rest with 429s; every post must still land,
+  exactly once.
+
+The stand-in adds `--latency` seconds per post to stand in for the network.
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+for name in ("X_CONSUMER_KEY", "X_CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET"):
+    os.environ.setdefault(name, "benchmark")
+
+import x_api
+from jobqueue import JobQueue, BroadcastWorkers, BROADCAST
+
+
+def _drain(server: x_api.StandInServer, posts: int, workers: int, root: str) -> dict:
+    queue = JobQueue(os.path.join(root, f"jobs-{server.server_address[1]}.sqlite3"))
+    run_id = queue.add_run("bench", {"final_posts": [f"post {i} {time.time()}" for i in range(posts)]})
+    jobs = queue.run(run_id)["jobs"]
+    for job in jobs:
+        queue.sign(job["id"], job["content"], {"signature": f"{run_id}-{job['id']}", "payload": job["content"]})
+
+    client = x_api.build_client(server.url, pool_size=workers)
+    recorded = []
+    started = time.perf_counter()
+    broadcaster = BroadcastWorkers(queue, lambda job: x_api.post_tweet(job["content"], client),
+                                   lambda job, tweet_id: recorded.append(tweet_id), workers=workers, poll_seconds=0.01)
+    for job in jobs:
+        queue.enqueue(job["id"])
+    broadcaster.notify()
+    while queue.counts().get(BROADCAST, 0) < posts:
+        if set(queue.counts()) - {BROADCAST, "queued", "broadcasting"}:
+            raise SystemExit(f"broadcast failed: {queue.counts()}")
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    broadcaster.stop()
+    return {"posts": posts, "seconds": round(elapsed, 2), "posts_per_s": round(posts / elapsed, 1),
+            "connections": server.connections, "server_429s": server.rejected,
+            "delivered_once": len(server.tweets) == posts and len(set(recorded)) == posts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AuthentiPost broadcast throughput")
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.05, help="stand-in seconds per post")
+    parser.add_argument("--quota", type=int, default=20, help="posts per second the throttled stand-in accepts")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # The limiter's own pacing would hide the server's; let the stand-in do the throttling
+    os.environ["RATE_LIMIT_X_RPM"] = "1000000"
+    os.environ["RATE_LIMIT_X_BURST"] = str(args.workers)
+    os.environ["RATE_LIMIT_X_CONCURRENCY"] = str(args.workers)
+    os.environ["RATE_LIMIT_X_ATTEMPTS"] = "20"
+
+    root = tempfile.mkdtemp(prefix="bench_broadcast_")
+    try:
+        server = x_api.StandInServer(latency=args.latency).start()
+        started = time.perf_counter()
+        for i in range(args.posts):
+            x_api.post_tweet(f"before {i} {time.time()}", x_api.build_client(server.url))
+        elapsed = time.perf_counter() - started
+        before = {"posts": args.posts, "seconds": round(elapsed, 2), "posts_per_s": round(args.posts / elapsed, 1),
+                  "connections": server.connections}
+        server.shutdown()
+
+        server = x_api.StandInServer(latency=args.latency).start()
+        after = _drain(server, args.posts, args.workers, root)
+        server.shutdown()
+
+        server = x_api.StandInServer(latency=args.latency, limit=args.quota, window=1.0).start()
+        throttled = _drain(server, args.posts, args.workers, root)
+        server.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    results = {"workers": args.workers, "latency_s": args.latency, "quota_per_s": args.quota,
+               "before": before, "after": after, "throttled": throttled,
+               "speedup": round(after["posts_per_s"] / before["posts_per_s"], 1)}
+    for name in ("before", "after", "throttled"):
+        r = results[name]
+        print(f"{name:<10}{r['posts_per_s']:>9.1f} posts/s{r['connections']:>6} connections"
+              + (f"{r['server_429s']:>6} 429s  delivered once: {r['delivered_once']}" if name != "before" else ""))
+    print(f"speedup   {results['speedup']}x")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Ledger footprint and scan cost: JSONL segments versus packed binary ones.
+
+    python -m benchmarks.bench_codec --posts 200000 --json bench_codec.json
+
+Builds one signed ledger, then copies it and packs the copies, uncompressed
+and with zstd. For each form it reports bytes on disk and times a full
+record scan, a hash-chain verification, an index rebuild (what `count()`
+does on a ledger whose index was lost) and deep Audit Trail pages. The
+legacy pretty-printed `posts_log.json` size of the same records is listed
+for reference.
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+import signing
+import ledger_codec
+import ledger_index
+from ledger import Ledger, SEGMENT_SUFFIX, PACKED_SUFFIX
+
+
+def _fill(ledger: Ledger, posts: int):
+    private_key, _ = signing.generate_keys()
+    signed = signing.sign_record(private_key, "benchmark post", timestamp=0)  # reused: realistic size, no million signing calls
+    for start in range(0, posts, 10_000):
+        ledger.extend({"timestamp": start + i, "content": f"benchmark post {start + i} " + "lorem ipsum " * 12,
+                       "tweet_id": f"B{start + i}", **signed} for i in range(min(10_000, posts - start)))
+
+
+def _seconds(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - started, 3)
+
+
+def _measure(root: str, posts: int, pages: int) -> dict:
+    disk = sum(os.path.getsize(os.path.join(root, name)) for name in os.listdir(root)
+               if name.endswith((SEGMENT_SUFFIX, PACKED_SUFFIX)))
+    scan_s = _seconds(lambda: sum(1 for _ in Ledger(root).iter_records()))
+    chain_s = _seconds(lambda: Ledger(root).verify_chain())
+    os.remove(os.path.join(root, ledger_index.INDEX_FILE))
+    rebuild_s = _seconds(lambda: Ledger(root).count())
+    ledger, samples = Ledger(root), []
+    for page in range(0, posts // 5, max(1, posts // 5 // pages)):
+        started = time.perf_counter()
+        ledger.page(page, 5)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"disk_bytes": disk, "bytes_per_post": round(disk / posts, 1), "scan_s": scan_s, "scan_posts_per_s": round(posts / scan_s),
+            "verify_chain_s": chain_s, "index_rebuild_s": rebuild_s, "audit_page_median_ms": round(statistics.median(samples), 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark packed ledger segments")
+    parser.add_argument("--posts", type=int, default=100_000)
+    parser.add_argument("--pages", type=int, default=200, help="Audit Trail pages to time, spread over the ledger")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="bench_codec_")
+    try:
+        jsonl = os.path.join(tmp, "jsonl")
+        _fill(Ledger(jsonl, segment_max_bytes=4 * 1024 * 1024), args.posts)
+        legacy = sum(len(json.dumps(r, indent=4)) + 6 for r in Ledger(jsonl).iter_records())
+        forms = {"jsonl": jsonl}
+        for name, compress in (("packed", False), ("packed_zstd", True)):
+            if compress and ledger_codec.zstandard is None:
+                continue
+            forms[name] = os.path.join(tmp, name)
+            shutil.copytree(jsonl, forms[name])
+            Ledger(forms[name]).pack_segments(compress)
+        results = {"posts": args.posts, "legacy_json_bytes": legacy,
+                   **{name: _measure(root, args.posts, args.pages) for name, root in forms.items()}}
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Critic calls and latency with the local pre-screen versus without it.
+
+    python -m benchmarks.bench_prescreen --runs 5 --json bench_prescreen.json
+
+Replays the recorded swarm responses through `fakes`, with one draft that
+clearly passes, one short borderline draft and one hashtag-spam draft, so
+each run has something to settle locally and something left for the Critic.
+Every swarm mode runs with `PRESCREEN` on and off; Critic requests are
+counted at the fake model. `screen` times `Prescreener.screen` alone over
+`--drafts` synthetic drafts against `prescreen.RECENT_POSTS` recent posts.
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+
+from benchmarks import fakes
+
+MODES = ("serial", "concurrent", "streaming")
+BORDERLINE = "Rotate your passwords. Then rotate them again."
+SPAM = "Security tips! #infosec #cyber #security #tips #passwords #mfa"
+
+
+def _median_ms(samples) -> float:
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def bench_modes(runs: int, call_s: float) -> dict:
+    fixtures = fakes.load_fixtures()
+    fixtures["drafts"] = [fixtures["drafts"][0], BORDERLINE, SPAM]
+    fixtures["creative"] = "\n---\n".join(fixtures["drafts"])
+    model, _ = fakes.install(call_s=call_s, chunk_s=0.0, search_s=0.0, fixtures=fixtures)
+    import swarm
+    critic_calls = [0]
+    response_for = model.response_for
+
+    def counting(prompt: str) -> str:
+        if "Review these posts" in prompt: critic_calls[0] += 1
+        return response_for(prompt)
+    model.response_for = counting
+
+    results = {}
+    for mode in MODES:
+        graph = swarm.get_workflow(mode)
+        for setting in ("off", "on"):
+            os.environ["PRESCREEN"] = setting
+            critic_calls[0], latencies = 0, []
+            for _ in range(runs):
+                started = time.perf_counter()
+                graph.invoke(swarm.initial_state("Latest social engineering tactics", "A witty security researcher"))
+                latencies.append(time.perf_counter() - started)
+            results.setdefault(mode, {})[f"prescreen_{setting}"] = {"end_to_end_ms": _median_ms(latencies),
+                                                                   "critic_calls_per_run": round(critic_calls[0] / runs, 2)}
+    return results
+
+
+def bench_screen(drafts: int, repeats: int = 20) -> dict:
+    import prescreen
+    os.environ["PRESCREEN"] = "on"
+    recent = [f"Past post {i}: enable passkeys for account {i} and review login alerts weekly" for i in range(prescreen.RECENT_POSTS)]
+    texts = [f"Draft {i}: " + ("a practical tip about phishing drills " * (1 + i % 8)) + "#infosec" * (i % 4) for i in range(drafts)]
+    screen = prescreen.Prescreener("A cybersecurity researcher who likes to share tips in a witty way.", recent)
+    batch, single = [], []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        verdicts = screen.screen(texts)
+        batch.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        screen.screen(texts[:3])
+        single.append(time.perf_counter() - started)
+    decisions = {d: sum(v.decision == d for v in verdicts) for d in (prescreen.PASS, prescreen.FAIL, prescreen.REVIEW)}
+    return {"drafts": drafts, "recent_posts": prescreen.RECENT_POSTS, "batch_ms": _median_ms(batch),
+            "drafts_per_s": round(drafts / statistics.median(batch)), "three_drafts_ms": _median_ms(single), "decisions": decisions}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the local draft pre-screen")
+    parser.add_argument("--runs", type=int, default=5, help="swarm runs per mode and setting")
+    parser.add_argument("--call-latency", type=float, default=0.3, help="stand-in seconds per model call")
+    parser.add_argument("--drafts", type=int, default=1000, help="drafts in the screening-only batch")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {"call_latency_s": args.call_latency, **bench_modes(args.runs, args.call_latency), "screen": bench_screen(args.drafts)}
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Cold-start and rerun latency of the Streamlit app, before/after resource caching.
+
+    python -m benchmarks.bench_rerun --reruns 20 --json bench_rerun.json
+
+* imports: a fresh interpreter importing what app.py used to import eagerly
+  (genai, tavily, langgraph, tweepy) versus what it imports now;
+* compile: `swarm.build_workflow` per call versus the shared `get_workflow`;
+* reruns: full script runs of app.py through Streamlit's AppTest harness
+  (no button presses, so no network calls are made).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+import swarm
+
+EAGER_IMPORTS = "import streamlit, dotenv, tweepy, google.generativeai, tavily, langgraph.graph, ledger, signing, keystore, cache"
+LAZY_IMPORTS = "import streamlit, dotenv, ledger, signing, keystore, cache, swarm"
+MODES = ("serial", "concurrent", "streaming")
+
+
+def import_ms(statement: str, repeat: int) -> float:
+    """Median wall time of a fresh interpreter running `statement`, minus bare interpreter startup."""
+    def run(code: str) -> float:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-W", "ignore", "-c", code], check=True, cwd=os.getcwd())
+        return time.perf_counter() - started
+    baseline = statistics.median(run("pass") for _ in range(repeat))
+    return round((statistics.median(run(statement) for _ in range(repeat)) - baseline) * 1000, 1)
+
+
+def compile_ms(fn, ops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(ops):
+        for mode in MODES:
+            fn(mode)
+    return round((time.perf_counter() - started) / (ops * len(MODES)) * 1000, 3)
+
+
+def rerun_ms(reruns: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")  # app.py stops early without one
+    app = AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py"), default_timeout=120)
+    started = time.perf_counter()
+    app.run()
+    first = (time.perf_counter() - started) * 1000
+    samples = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        samples.append((time.perf_counter() - started) * 1000)
+    if app.exception:
+        raise SystemExit(f"app raised during benchmark: {app.exception}")
+    samples.sort()
+    return {"first_run_ms": round(first, 1), "rerun_median_ms": round(statistics.median(samples), 1),
+            "rerun_p95_ms": round(samples[int(len(samples) * 0.95) - 1], 1), "reruns": reruns}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AuthentiPost cold start and rerun latency")
+    parser.add_argument("--reruns", type=int, default=20, help="warm reruns to time")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per import measurement")
+    parser.add_argument("--compiles", type=int, default=20, help="graph compilations per mode")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    swarm.build_workflow()  # pay the deferred langgraph import outside the timed loop
+    results = {
+        "imports": {"before_ms": import_ms(EAGER_IMPORTS, args.repeat), "after_ms": import_ms(LAZY_IMPORTS, args.repeat)},
+        "compile": {"before_ms": compile_ms(swarm.build_workflow, args.compiles), "after_ms": compile_ms(swarm.get_workflow, args.compiles)},
+        "reruns": rerun_ms(args.reruns),
+    }
+    for name in ("imports", "compile"):
+        r = results[name]
+        print(f"{name:<10}{r['before_ms']:>12.3f} ms before{r['after_ms']:>12.3f} ms after")
+    r = results["reruns"]
+    print(f"{'app':<10}{r['first_run_ms']:>12.1f} ms first run{r['rerun_median_ms']:>9.1f} ms median rerun (p95 {r['rerun_p95_ms']:.1f} ms)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
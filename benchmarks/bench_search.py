@@ -0,0 +1,91 @@
+"""Search and near-duplicate latency over a synthetic ledger.
+
+    python -m benchmarks.bench_search --posts 1000000 --json bench_search.json
+
+Builds a throwaway ledger of random posts, indexes it, then times keyword
+queries and duplicate checks. Recall is measured on lightly edited copies of
+existing posts (one word swapped, one appended), which must be flagged.
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from ledger import Ledger
+from search import SearchIndex
+
+VOCABULARY = 5000
+
+
+def _words(rng: random.Random) -> list:
+    return [f"w{rng.randrange(VOCABULARY)}" for _ in range(rng.randint(12, 25))]
+
+
+def _timed(fn, queries) -> dict:
+    samples = []
+    for q in queries:
+        started = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"median_ms": round(statistics.median(samples), 3), "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AuthentiPost post search")
+    parser.add_argument("--posts", type=int, default=100000, help="synthetic ledger size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    root = tempfile.mkdtemp(prefix="bench_search_")
+    try:
+        ledger = Ledger(os.path.join(root, "ledger"), batch_size=4096)
+        posts = []
+        started = time.perf_counter()
+        for start in range(0, args.posts, 10000):
+            chunk = [" ".join(_words(rng)) for _ in range(min(10000, args.posts - start))]
+            ledger.extend({"timestamp": start + i, "content": c, "tweet_id": f"B{start + i}"} for i, c in enumerate(chunk))
+            posts.extend(rng.sample(chunk, min(len(chunk), 50)))
+        build_s = time.perf_counter() - started
+
+        index = SearchIndex(ledger)
+        started = time.perf_counter()
+        index.sync()
+        index_s = time.perf_counter() - started
+
+        samples = rng.sample(posts, min(args.queries, len(posts)))
+        edited = []
+        for post in samples:
+            words = post.split()
+            words[rng.randrange(len(words))] = f"w{rng.randrange(VOCABULARY)}"
+            edited.append(" ".join(words + ["extra"]))
+        fresh = [" ".join(_words(rng)) for _ in samples]
+
+        results = {
+            "posts": args.posts,
+            "ledger_build_s": round(build_s, 1),
+            "index_build_s": round(index_s, 1),
+            "incremental_sync": _timed(lambda q: (ledger.append({"timestamp": args.posts, "content": q, "tweet_id": "N"}), index.sync()),
+                                       [" ".join(_words(rng)) for _ in range(20)]),
+            "keyword_search": _timed(lambda q: index.search(" ".join(q.split()[:2])), samples),
+            "duplicate_check": _timed(index.duplicate_of, edited),
+            "duplicate_recall": round(sum(index.duplicate_of(q) is not None for q in edited) / len(edited), 3),
+            "false_positive_rate": round(sum(index.duplicate_of(q) is not None for q in fresh) / len(fresh), 3),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Sign/verify throughput per signing backend, plus a compatibility check.
+
+    python -m benchmarks.bench_signing --ops 2000 --json bench_signing.json
+
+The compatibility check verifies every legacy entry in `posts_log.json` and
+cross-verifies format-1 signatures between all installed secp256k1 backends.
+It exits non-zero if any backend disagrees.
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+
+import signing
+
+LEGACY_LOG = "posts_log.json"
+
+
+def _rate(fn, ops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(ops):
+        fn()
+    return ops / (time.perf_counter() - started)
+
+
+def bench_backend(backend: signing.SigningBackend, ops: int) -> dict:
+    private_key = backend.generate_private_key()
+    public_key = backend.public_key(private_key)
+    digest = hashlib.sha256(b"benchmark payload|TS:0").digest()
+    signature = backend.sign_digest(private_key, digest)
+    result = {
+        "backend": backend.name,
+        "curve": backend.curve,
+        "sign_ops_s": round(_rate(lambda: backend.sign_digest(private_key, digest), ops), 1),
+        "verify_ops_s": round(_rate(lambda: backend.verify_digest(public_key, signature, digest), ops), 1),
+    }
+    if backend.curve == signing.CURVE:
+        result["verify_legacy_ops_s"] = _legacy_rate(backend, ops)
+    return result
+
+
+def bench_batch(backend: signing.SigningBackend, size: int) -> dict:
+    """Signing `size` posts one by one versus as one Merkle batch, and verifying the batch records."""
+    private_key = backend.generate_private_key()
+    contents = [f"campaign post {i}" for i in range(size)]
+    started = time.perf_counter()
+    for content in contents:
+        signing.sign_record(private_key, content, backend=backend)
+    single_s = time.perf_counter() - started
+    started = time.perf_counter()
+    records = signing.sign_batch(private_key, contents, backend=backend)
+    batch_s = time.perf_counter() - started
+    signing._verify_manifest.cache_clear()
+    started = time.perf_counter()
+    assert all(signing.verify_record(r) for r in records)
+    verify_s = time.perf_counter() - started
+    return {"posts": size, "single_ms": round(single_s * 1000, 2), "batch_ms": round(batch_s * 1000, 2),
+            "speedup": round(single_s / batch_s, 1), "batch_verify_ms": round(verify_s * 1000, 2)}
+
+
+def _legacy_rate(backend: signing.SigningBackend, ops: int):
+    entries = _legacy_entries()
+    if not entries:
+        return None
+    entry = entries[0]
+    payload = signing.find_legacy_payload(entry)
+    if payload is None:
+        return None
+    public_key, signature = bytes.fromhex(entry["public_key"]), bytes.fromhex(entry["signature"])
+    digest = hashlib.sha256(payload.encode()).digest()
+    return round(_rate(lambda: backend.verify_legacy(public_key, signature, digest), ops), 1)
+
+
+def _legacy_entries():
+    if not os.path.exists(LEGACY_LOG):
+        return []
+    with open(LEGACY_LOG, "r", encoding="utf-8") as f:
+        return [e for e in json.load(f) if e.get("signature") and e.get("public_key")]
+
+
+def check_compatibility(backends) -> dict:
+    secp = [b for b in backends.values() if b.curve == signing.CURVE]
+    failures = []
+    # Legacy posts_log.json signatures must verify under every secp256k1 backend.
+    reference = signing.load_backend("ecdsa")
+    entries = _legacy_entries()
+    for entry in entries:
+        payload = None
+        for delta in range(signing.LEGACY_TS_WINDOW + 1):
+            candidate = signing.make_payload(entry["content"], entry["timestamp"] - delta)
+            digest = hashlib.sha256(candidate.encode()).digest()
+            if reference.verify_legacy(bytes.fromhex(entry["public_key"]), bytes.fromhex(entry["signature"]), digest):
+                payload = candidate
+                break
+        if payload is None:
+            failures.append({"tweet_id": entry["tweet_id"], "backend": "ecdsa", "check": "legacy"})
+            continue
+        digest = hashlib.sha256(payload.encode()).digest()
+        for backend in secp:
+            if not backend.verify_legacy(bytes.fromhex(entry["public_key"]), bytes.fromhex(entry["signature"]), digest):
+                failures.append({"tweet_id": entry["tweet_id"], "backend": backend.name, "check": "legacy"})
+    # Format-1 signatures must cross-verify between secp256k1 backends.
+    digest = hashlib.sha256(b"cross-backend|TS:0").digest()
+    for signer in secp:
+        private_key = signer.generate_private_key()
+        for _ in range(8):
+            signature = signer.sign_digest(private_key, digest)
+            for verifier in secp:
+                if not verifier.verify_digest(signer.public_key(private_key), signature, digest):
+                    failures.append({"signer": signer.name, "backend": verifier.name, "check": "cross"})
+    return {"legacy_entries": len(entries), "backends": [b.name for b in secp], "ok": not failures, "failures": failures}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark AuthentiPost signing backends")
+    parser.add_argument("--ops", type=int, default=1000, help="operations per measurement")
+    parser.add_argument("--batch", type=int, nargs="*", default=[10, 100, 1000], help="campaign sizes for batch signing")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    backends = signing.available_backends()
+    results = [bench_backend(b, args.ops) for b in backends.values()]
+    compat = check_compatibility(backends)
+    batches = [bench_batch(signing.get_backend(), n) for n in args.batch]
+
+    print(f"{'backend':<14}{'curve':<11}{'sign/s':>12}{'verify/s':>12}{'legacy/s':>12}")
+    for r in results:
+        legacy = r.get("verify_legacy_ops_s")
+        print(f"{r['backend']:<14}{r['curve']:<11}{r['sign_ops_s']:>12.0f}{r['verify_ops_s']:>12.0f}{f'{legacy:.0f}' if legacy is not None else '-':>12}")
+    print(f"auto-selected: {signing.get_backend().name}")
+    for b in batches:
+        print(f"batch of {b['posts']:<6}{b['single_ms']:>10.1f} ms one by one{b['batch_ms']:>10.1f} ms as a batch ({b['speedup']}x), verify all {b['batch_verify_ms']:.1f} ms")
+    print(f"compatibility: {'OK' if compat['ok'] else 'FAILED'} ({compat['legacy_entries']} legacy entries, backends: {', '.join(compat['backends'])})")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "batches": batches, "compatibility": compat, "selected": signing.get_backend().name}, f, indent=4)
+    raise SystemExit(0 if compat["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
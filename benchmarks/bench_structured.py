@@ -0,0 +1,99 @@
+"""Cost of repairing drifted Architect/Creative replies versus rerunning the graph.
+
+    python -m benchmarks.bench_structured --drift 0.3 --runs 20 --json bench_structured.json
+
+Replays the recorded swarm responses through `fakes`, but breaks `--drift`
+of the JSON-mode replies the way real ones drift. The Architect loses its
+reason, the Creative's list gains a "Here are 3 X posts" preamble and drops
+a post, and a single draft comes back truncated. For each swarm mode it reports:
+
+* clean_ms: a run with no drift, which is also what a full rerun costs;
+* drift_ms: a run with drift, repaired by targeted re-asks;
+* reasks_per_run and model_calls_per_run under drift;
+* valid_runs: share of drifted runs ending with a trend, a reason and
+  every draft, none of them a preamble.
+"""
+import json
+import time
+import random
+import argparse
+import threading
+import statistics
+
+from benchmarks import fakes
+
+MODES = ("serial", "concurrent", "streaming")
+PREAMBLE = "Here are 3 X posts for your brand:"
+
+
+class DriftingModel(fakes.FakeModel):
+    """Breaks a share of JSON-mode replies: a missing field, a preamble post, a truncated object."""
+    def __init__(self, fixtures: dict, drift: float, seed: int = 7, **kwargs):
+        super().__init__(fixtures, **kwargs)
+        self.drift = drift
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def reply(self, prompt: str, generation_config=None) -> str:
+        text = super().reply(prompt, generation_config)
+        with self._lock:
+            self.calls += 1
+            drifted = bool(generation_config) and self._random.random() < self.drift
+        if not drifted:
+            return text
+        value = json.loads(text)
+        if "posts" in value:
+            return json.dumps({"posts": [PREAMBLE] + value["posts"][:-1]})
+        if "post" in value:
+            return text[:len(text) // 2]
+        return json.dumps({"trend": value["trend"]}) if "trend" in value else "Sure! Here is my pick."
+
+
+def _valid(state: dict, swarm) -> bool:
+    return (bool(state["selected_trend"] and state["architect_reasoning"]) and len(state["final_posts"]) == swarm.DRAFT_COUNT
+            and not any(post.startswith("Here are") for post in state["final_posts"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark structured-output repair under drifting replies")
+    parser.add_argument("--drift", type=float, default=0.3, help="share of JSON-mode replies broken")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--call-latency", type=float, default=0.2, help="stand-in seconds per model call")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    fixtures = fakes.load_fixtures()
+    fakes.install(call_s=args.call_latency, chunk_s=0.0, search_s=0.0, fixtures=fixtures)
+    import swarm
+    import tracing
+
+    def reasks() -> float:
+        return sum(v for k, v in tracing.snapshot()["counters"].items() if k.startswith("structured.reask"))
+
+    results = {"drift": args.drift, "call_latency_s": args.call_latency}
+    for mode in MODES:
+        graph, row = swarm.get_workflow(mode), {}
+        for name, drift in (("clean", 0.0), ("drift", args.drift)):
+            model = DriftingModel(fixtures, drift, call_s=args.call_latency, chunk_s=0.0)
+            swarm.get_model = lambda: model
+            latencies, valid, before = [], 0, reasks()
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                state = graph.invoke(swarm.initial_state("Latest social engineering tactics", "A witty security researcher"))
+                latencies.append(time.perf_counter() - started)
+                valid += _valid(state, swarm)
+            row[f"{name}_ms"] = round(statistics.median(latencies) * 1000, 1)
+            if drift:
+                row.update(mean_drift_ms=round(statistics.mean(latencies) * 1000, 1), reasks_per_run=round((reasks() - before) / args.runs, 2),
+                           model_calls_per_run=round(model.calls / args.runs, 2), valid_runs=round(valid / args.runs, 3))
+        results[mode] = row
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
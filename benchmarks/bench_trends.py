@@ -0,0 +1,77 @@
+"""Scout latency with the local trend index versus a live search per run.
+
+    python -m benchmarks.bench_trends --search-latency 1.0 --json bench_trends.json
+
+Uses the local search stand-in from `fakes` (`--search-latency` seconds per
+query) and a throwaway trend database:
+
+* live: the Scout on topics the index has not pulled, one search per run
+  (serial) or three concurrent searches (concurrent);
+* indexed: the same Scout on a topic whose results are already ingested;
+* ingestion: one `TrendIngestor` pass over `--topics` watched topics, and
+  how many of the results it stored were duplicates.
+"""
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from benchmarks import fakes
+
+
+def _median_ms(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the trend index against live Scout searches")
+    parser.add_argument("--search-latency", type=float, default=1.0, help="stand-in seconds per search")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4, help="topics the ingestor pulls at once")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="bench_trends_")
+    try:
+        _, tavily = fakes.install(search_s=args.search_latency, trends_db=os.path.join(root, "trends.sqlite3"))
+        import swarm
+        import trends
+        index = trends.get_index()
+        topic = "Latest social engineering tactics"
+        results = {"search_latency_s": args.search_latency}
+        for mode, node in (("serial", swarm.scout_node), ("concurrent", swarm.scout_fanout_node)):
+            fresh = iter(range(args.runs))  # a topic the index has never pulled: the Scout must search live
+            live = _median_ms(lambda: node(swarm.initial_state(f"{topic} {mode} {next(fresh)}", "b")), args.runs)
+            indexed = _median_ms(lambda: node(swarm.initial_state(f"{topic} {mode} 0", "b")), args.runs)
+            results[mode] = {"live_ms": live, "indexed_ms": indexed, "speedup": round(live / indexed, 1)}
+
+        ingestor = trends.TrendIngestor(index, lambda q: tavily.search(q)["results"], queries=swarm.scout_queries, workers=args.workers)
+        for i in range(args.topics):
+            index.watch(f"benchmark topic {i}")
+        started = time.perf_counter()
+        ingestor.run_once()
+        stats = index.stats()
+        results["ingestion"] = {"topics": args.topics, "workers": args.workers, "seconds": round(time.perf_counter() - started, 2),
+                                "trends": stats["trends"], "sightings": stats["sightings"],
+                                "duplicate_rate": round(1 - stats["trends"] / stats["sightings"], 3)}
+        results["query_ms"] = _median_ms(lambda: index.query(topic), 200)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(json.dumps(results, indent=4))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
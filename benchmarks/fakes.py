@@ -0,0 +1,105 @@
+"""Offline stand-ins for the Gemini and Tavily clients, replaying recorded responses.
+
+Responses come from `fixtures/swarm_responses.json` and are chosen by the
+prompt's shape, so every swarm mode gets realistic text. Latency is
+simulated as `call_s` to the first token plus `chunk_s` per `chunk_chars`
+characters generated, streamed or not, so longer outputs cost more. A
+request in JSON mode gets the recorded reply recast into its schema's shape.
+`FakeTavily` is the local search stand-in; each result carries a URL with
+tracking parameters, so trend ingestion's normalisation and deduplication
+get exercised. `install()` swaps the fakes into `swarm`.
+"""
+import os
+import json
+import time
+import types
+from typing import Optional
+
+import swarm
+import structured
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "swarm_responses.json")
+
+
+def load_fixtures(path: str = FIXTURES) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeModel:
+    model_name = "recorded"
+
+    def __init__(self, fixtures: dict, call_s: float = 0.3, chunk_s: float = 0.02, chunk_chars: int = 24):
+        self.fixtures = fixtures
+        self.call_s = call_s
+        self.chunk_s = chunk_s
+        self.chunk_chars = chunk_chars
+
+    def response_for(self, prompt: str) -> str:
+        if "Pick the best trend" in prompt or "Say why this trend suits" in prompt:
+            return self.fixtures["architect"]
+        if "Review these posts" in prompt:
+            return self.fixtures["critic"]
+        if "Write exactly one X post" in prompt:
+            angle = next((i for i, a in enumerate(swarm.DRAFT_ANGLES) if a in prompt), 0)
+            return self.fixtures["drafts"][angle % len(self.fixtures["drafts"])]
+        return self.fixtures["creative"]
+
+    @staticmethod
+    def as_json(text: str, schema: dict) -> str:
+        """A recorded free-text reply in the JSON shape `schema` asks for."""
+        fields = schema["properties"]
+        if "posts" in fields: value = {"posts": [p.strip() for p in text.split("---") if p.strip()]}
+        elif "post" in fields: value = {"post": text.strip()}
+        else: value = structured.parse_fields(text, schema)[0]
+        return json.dumps(value, ensure_ascii=False)
+
+    def reply(self, prompt: str, generation_config: Optional[dict] = None) -> str:
+        text = self.response_for(prompt)
+        schema = (generation_config or {}).get("response_schema")
+        return self.as_json(text, schema) if schema else text
+
+    def generate_content(self, prompt, stream: bool = False, generation_config: Optional[dict] = None, **kwargs):
+        text = self.reply(prompt, generation_config)
+        if not stream:
+            time.sleep(self.call_s + self.chunk_s * -(-len(text) // self.chunk_chars))
+            return types.SimpleNamespace(text=text)
+
+        def chunks():
+            time.sleep(self.call_s)  # time to first token
+            for start in range(0, len(text), self.chunk_chars):
+                time.sleep(self.chunk_s)
+                yield types.SimpleNamespace(text=text[start:start + self.chunk_chars])
+        return chunks()
+
+
+class FakeTavily:
+    def __init__(self, fixtures: dict, call_s: float = 0.2):
+        self.fixtures = fixtures
+        self.call_s = call_s
+
+    def search(self, query: str, **kwargs) -> dict:
+        time.sleep(self.call_s)
+        return {"results": [{**r, "content": r["content"] if i else f"{r['content']} ({query})",
+                             "url": r.get("url", f"https://news.example.com/story-{i}?utm_source={len(query)}")}
+                            for i, r in enumerate(self.fixtures["tavily"])]}
+
+
+def install(call_s: float = 0.3, chunk_s: float = 0.02, search_s: float = 0.2, fixtures: Optional[dict] = None,
+            trends_db: Optional[str] = None):
+    """Point `swarm` at the fakes, with the response cache off and the rate limiters out of the way.
+
+    The trend index is off too, so every run searches, unless `trends_db` names a database for it.
+    """
+    os.environ["RESPONSE_CACHE"] = "off"
+    if trends_db: os.environ.update(TRENDS="on", TRENDS_DB=trends_db)
+    else: os.environ["TRENDS"] = "off"
+    for service in ("GEMINI", "TAVILY"):
+        os.environ[f"RATE_LIMIT_{service}_RPM"] = "1000000"
+        os.environ[f"RATE_LIMIT_{service}_BURST"] = "1000"
+        os.environ[f"RATE_LIMIT_{service}_CONCURRENCY"] = "64"
+    fixtures = fixtures or load_fixtures()
+    model, tavily = FakeModel(fixtures, call_s, chunk_s), FakeTavily(fixtures, search_s)
+    swarm.get_model = lambda: model
+    swarm.get_tavily = lambda: tavily
+    return model, tavily
@@ -0,0 +1,286 @@
+"""Offline benchmark suite; writes one JSON result file per run for cross-commit comparison.
+
+    python -m benchmarks.run                          # everything, ledger sizes 1k..1M
+    python -m benchmarks.run --quick                  # small sizes, fewer runs
+    python -m benchmarks.run --only swarm,signing
+    python -m benchmarks.run compare OLD.json NEW.json
+
+Suites:
+
+* swarm: end-to-end latency of each swarm mode against recorded Gemini and
+  Tavily responses with simulated network latency (`benchmarks.fakes`),
+  plus time to first draft in streaming mode;
+* signing: sign/verify throughput of the active backend and of the app's
+  full record path (`KeyStore.sign_record`, `verify_payload`), and
+  one-by-one versus Merkle-batch signing of 10 to 1000 posts;
+* ledger: latency of one signed broadcast append (duplicate check, then
+  append with batch sealing) as the ledger grows from 1k to 1M entries;
+* audit: the Audit Trail's per-render reads (count, newest page, seal badges,
+  tweet lookup) at the same sizes, and a full app rerun via AppTest.
+
+Results go to `benchmarks/results/<commit>[-dirty]-<timestamp>.json` with the
+commit, interpreter and platform recorded alongside the numbers.
+"""
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+LEDGER_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+QUICK_SIZES = (1_000, 10_000)
+MODES = ("serial", "concurrent", "streaming")
+
+
+def _stats(samples: List[float]) -> dict:
+    samples = sorted(samples)
+    p95 = samples[math.ceil(0.95 * len(samples)) - 1]  # nearest rank
+    return {"median_ms": round(statistics.median(samples), 3), "p95_ms": round(p95, 3),
+            "min_ms": round(samples[0], 3), "n": len(samples)}
+
+
+def _timed(fn: Callable, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return _stats(samples)
+
+
+def _git(*args) -> str:
+    try: return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return ""
+
+
+# --- SUITES ---
+def bench_swarm(runs: int, call_s: float, chunk_s: float, search_s: float) -> dict:
+    from benchmarks import fakes
+    import swarm
+    fakes.install(call_s, chunk_s, search_s)
+    results = {"simulated": {"call_s": call_s, "chunk_s": chunk_s, "search_s": search_s}}
+    for mode in MODES:
+        graph = swarm.get_workflow(mode)
+        latencies, first_drafts, drafts = [], [], 0
+        for _ in range(runs):
+            first = []
+            started = time.perf_counter()
+
+            def listener(event: str, index: int, text: str):
+                if event == "draft" and not first: first.append(time.perf_counter())
+            state = graph.invoke(swarm.initial_state("Latest social engineering tactics", "A witty security researcher"),
+                                 config=swarm.run_config(listener=listener))
+            latencies.append((time.perf_counter() - started) * 1000)
+            if first: first_drafts.append((first[0] - started) * 1000)
+            drafts = len(state["final_posts"])
+        results[mode] = {"end_to_end": _stats(latencies), "drafts": drafts}
+        if first_drafts: results[mode]["first_draft"] = _stats(first_drafts)
+    return results
+
+
+def bench_signing(ops: int) -> dict:
+    import signing
+    from keystore import KeyStore
+    from benchmarks.bench_signing import bench_backend, bench_batch
+    root = tempfile.mkdtemp(prefix="bench_run_keys_")
+    try:
+        keys = KeyStore(root)
+        keys.rotate()
+        signed = keys.sign_record("benchmark post about passkeys")
+        started = time.perf_counter()
+        for i in range(ops):
+            keys.sign_record(f"benchmark post {i}")
+        sign_s = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(ops):
+            signing.verify_payload(signed["payload"], signed["signature"], keys.active().public_key)
+        verify_s = time.perf_counter() - started
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {"backend": bench_backend(signing.get_backend(), ops),
+            "record": {"sign_ops_s": round(ops / sign_s, 1), "verify_ops_s": round(ops / verify_s, 1)},
+            "batch": [bench_batch(signing.get_backend(), n) for n in (10, 100, 1000)]}
+
+
+def _fill(ledger, target: int, signed: dict):
+    """Grow `ledger` to `target` records in bulk. One signature is reused so records have realistic size
+    without a million signing calls (sealing still signs every batch)."""
+    for start in range(ledger.count(), target, 10_000):
+        n = min(10_000, target - start)
+        ledger.extend({"timestamp": start + i, "content": f"filler post {start + i} " + "lorem ipsum " * 12,
+                       "tweet_id": f"FILL_{start + i}", **signed} for i in range(n))
+
+
+def bench_ledger_and_audit(sizes, appends: int, renders: int, app_rerun: bool) -> dict:
+    from ledger import Ledger
+    from keystore import KeyStore
+    root = tempfile.mkdtemp(prefix="bench_run_ledger_")
+    ledger_results, audit_results = [], []
+    try:
+        keys = KeyStore(os.path.join(root, "keys"))
+        keys.rotate()
+        ledger = Ledger(os.path.join(root, "ledger"), signer=keys.sign_digest)
+        filler = keys.sign_record("filler post")
+        for size in sizes:
+            started = time.perf_counter()
+            _fill(ledger, size, filler)
+            fill_s = time.perf_counter() - started
+            signed = [keys.sign_record(f"appended post {size} {i}") for i in range(appends)]
+            samples = []
+            for i, record in enumerate(signed):
+                tweet_id = f"BENCH_{size}_{i}"
+                started = time.perf_counter()
+                if ledger.find_tweet(tweet_id) is None:  # what the broadcast worker does per job
+                    ledger.append({"timestamp": size + i, "content": f"appended post {size} {i}", "tweet_id": tweet_id, **record})
+                samples.append((time.perf_counter() - started) * 1000)
+            ledger_results.append({"entries": size, "fill_s": round(fill_s, 2), "append": _stats(samples)})
+
+            def render():
+                total = ledger.count()
+                sealed = ledger.sealed_through()
+                for entry in ledger.page(0, 5):
+                    if entry["seq"] <= sealed: ledger.batch_for(entry["seq"])
+                return total
+            audit_results.append({"entries": ledger.count(), "render_reads": _timed(render, renders),
+                                  "tweet_lookup": _timed(lambda: ledger.find_tweet(f"FILL_{size // 2}"), renders),
+                                  "last_page": _timed(lambda: ledger.page(ledger.count() // 5, 5), renders)})
+        if app_rerun:
+            audit_results.append({"app_rerun": _app_rerun(os.path.join(root, "keys"), filler, renders)})
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {"ledger": ledger_results, "audit": audit_results}
+
+
+def _app_rerun(keys_dir: str, filler: dict, reruns: int) -> dict:
+    """Full script reruns of app.py (Audit Trail included) in a scratch directory holding a small ledger."""
+    from streamlit.testing.v1 import AppTest
+    from ledger import Ledger
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix="bench_run_app_")
+    try:
+        shutil.copytree(keys_dir, os.path.join(scratch, "keys"))
+        os.chdir(scratch)
+        small = Ledger("ledger")  # app.py opens ./ledger; keep it small so search indexing stays out of the timing
+        _fill(small, 1_000, filler)
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        app = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=300)
+        app.run()
+        samples = []
+        for _ in range(reruns):
+            started = time.perf_counter()
+            app.run()
+            samples.append((time.perf_counter() - started) * 1000)
+        if app.exception:
+            raise SystemExit(f"app raised during benchmark: {app.exception}")
+        return {"entries": small.count(), **_stats(samples)}
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+# --- REPORTING ---
+def _flatten(value, prefix: str = "") -> dict:
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            out.update(_flatten(v, f"{prefix}.{k}" if prefix else str(k)))
+        return out
+    if isinstance(value, list):
+        out = {}
+        for i, v in enumerate(value):
+            key = v.get("entries", i) if isinstance(v, dict) else i
+            out.update(_flatten({k: x for k, x in v.items() if k != "entries"} if isinstance(v, dict) else v, f"{prefix}[{key}]"))
+        return out
+    return {prefix: value} if isinstance(value, (int, float)) and not isinstance(value, bool) else {}
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, encoding="utf-8") as f: old = json.load(f)
+    with open(new_path, encoding="utf-8") as f: new = json.load(f)
+    print(f"{old['meta']['commit'] or '?'} -> {new['meta']['commit'] or '?'}")
+    a, b = _flatten(old["results"]), _flatten(new["results"])
+    for key in sorted(set(a) & set(b)):
+        lower_is_better = key.endswith("_ms") or key.endswith("fill_s")
+        if not (lower_is_better or key.endswith("ops_s")) or not a[key]:
+            continue
+        change = (b[key] - a[key]) / a[key] * 100
+        better = change < 0 if lower_is_better else change > 0
+        flag = "" if abs(change) < 5 else ("  better" if better else "  WORSE")
+        print(f"{key:<60}{a[key]:>12g}{b[key]:>12g}{change:>+9.1f}%{flag}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(prog="benchmarks.run compare", description="Compare two benchmark result files")
+        parser.add_argument("old")
+        parser.add_argument("new")
+        args = parser.parse_args(argv[1:])
+        return compare(args.old, args.new)
+
+    parser = argparse.ArgumentParser(description="Run the AuthentiPost offline benchmark suite")
+    parser.add_argument("--only", help="comma-separated suites: swarm, signing, ledger (ledger includes audit)")
+    parser.add_argument("--quick", action="store_true", help=f"ledger sizes {QUICK_SIZES}, fewer repetitions")
+    parser.add_argument("--sizes", help="comma-separated ledger sizes (default 1000..1000000)")
+    parser.add_argument("--runs", type=int, help="swarm runs per mode (default 5, quick 2)")
+    parser.add_argument("--call-latency", type=float, default=0.3, help="simulated seconds per Gemini call")
+    parser.add_argument("--chunk-latency", type=float, default=0.02, help="simulated seconds per streamed chunk")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="simulated seconds per Tavily search")
+    parser.add_argument("--no-app", action="store_true", help="skip the AppTest rerun measurement")
+    parser.add_argument("--out", default=RESULTS_DIR, help="directory for the result file")
+    args = parser.parse_args(argv)
+
+    suites = set(args.only.split(",")) if args.only else {"swarm", "signing", "ledger"}
+    sizes = [int(s) for s in args.sizes.split(",")] if args.sizes else (QUICK_SIZES if args.quick else LEDGER_SIZES)
+    runs = args.runs or (2 if args.quick else 5)
+    results = {}
+    if "swarm" in suites:
+        results["swarm"] = bench_swarm(runs, args.call_latency, args.chunk_latency, args.search_latency)
+    if "signing" in suites:
+        results["signing"] = bench_signing(200 if args.quick else 1000)
+    if "ledger" in suites:
+        results.update(bench_ledger_and_audit(sizes, 20 if args.quick else 100, 20 if args.quick else 100, not args.no_app))
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    stamp = datetime.now(timezone.utc)
+    meta = {"commit": commit + ("-dirty" if dirty else ""), "timestamp": stamp.isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "argv": argv, "fixtures_sha256": hashlib.sha256(open(os.path.join(ROOT, "benchmarks", "fixtures", "swarm_responses.json"), "rb").read()).hexdigest()[:16]}
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{meta['commit'] or 'nocommit'}-{stamp.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=4)
+
+    if "swarm" in results:
+        for mode in MODES:
+            r = results["swarm"][mode]
+            first = f"   first draft {r['first_draft']['median_ms']:.0f} ms" if "first_draft" in r else ""
+            print(f"swarm {mode:<12}{r['end_to_end']['median_ms']:>9.0f} ms median{first}")
+    if "signing" in results:
+        r = results["signing"]
+        print(f"signing {r['backend']['backend']:<10}{r['backend']['sign_ops_s']:>9.0f} sign/s {r['backend']['verify_ops_s']:>9.0f} verify/s   "
+              f"records {r['record']['sign_ops_s']:.0f} sign/s {r['record']['verify_ops_s']:.0f} verify/s")
+    for r in results.get("ledger", []):
+        print(f"ledger {r['entries']:>9} entries   append {r['append']['median_ms']:.3f} ms (p95 {r['append']['p95_ms']:.3f})")
+    for r in results.get("audit", []):
+        if "app_rerun" in r:
+            print(f"app rerun ({r['app_rerun']['entries']} entries)   {r['app_rerun']['median_ms']:.1f} ms median")
+        else:
+            print(f"audit  {r['entries']:>9} entries   render reads {r['render_reads']['median_ms']:.3f} ms   lookup {r['tweet_lookup']['median_ms']:.3f} ms")
+    print(f"wrote {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
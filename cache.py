@@ -0,0 +1,154 @@
+"""Content-addressed, disk-backed cache for model and search responses.
+
+Entries are keyed by a SHA-256 over (namespace, model, prompt, params), carry
+a per-namespace TTL, and the store is kept under a byte budget by evicting
+the least recently used entries. Triggers keep the total size in a one-row
+`usage` table, so checking the budget on every put reads one row instead of
+summing the whole table. SQLite (WAL mode, one connection per thread) makes
+it safe to share between Streamlit sessions, the swarm's thread pool and
+separate batch processes.
+
+    RESPONSE_CACHE=off           disable caching entirely
+    RESPONSE_CACHE_PATH=...      database location (default .cache/responses.sqlite3)
+    RESPONSE_CACHE_MAX_MB=64     size budget before LRU eviction
+    CACHE_TTL_GEMINI=86400       seconds a model response stays fresh
+    CACHE_TTL_TAVILY=900         seconds a trend lookup stays fresh
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Optional
+
+CACHE_PATH = ".cache/responses.sqlite3"
+MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTLS = {"gemini": 24 * 3600, "tavily": 15 * 60}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+CREATE INDEX IF NOT EXISTS entries_expires ON entries(expires);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, bytes) SELECT 1, COALESCE(SUM(size), 0) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries
+BEGIN UPDATE usage SET bytes = bytes + new.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries
+BEGIN UPDATE usage SET bytes = bytes - old.size WHERE id = 1; END;
+CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries
+BEGIN UPDATE usage SET bytes = bytes + new.size - old.size WHERE id = 1; END;
+"""
+
+
+def cache_key(namespace: str, model: str, prompt: str, params: Optional[dict] = None) -> str:
+    material = json.dumps([namespace, model, prompt, params or {}], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES, ttls: Optional[dict] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("BEGIN IMMEDIATE;" + _SCHEMA + "COMMIT;")  # seed `usage` and add its triggers atomically
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < now:
+            with self._lock: self._misses[namespace] += 1
+            return None
+        with conn:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock: self._hits[namespace] += 1
+        return json.loads(row[0])
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False)
+        ttl = self.ttls.get(namespace, DEFAULT_TTLS["gemini"]) if ttl is None else ttl
+        conn = self._conn()
+        with conn:
+            # an upsert, not INSERT OR REPLACE: REPLACE's implicit delete would skip the `usage` trigger
+            conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET namespace = excluded.namespace, "
+                         "value = excluded.value, size = excluded.size, expires = excluded.expires, accessed = excluded.accessed",
+                         (key, namespace, data, len(data), now + ttl, now))
+        self._evict(now)
+
+    def _evict(self, now: float):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE expires < ?", (now,))
+            total = conn.execute("SELECT bytes FROM usage").fetchone()[0]
+            while total > self.max_bytes:
+                victims = conn.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 64").fetchall()
+                if not victims:
+                    break
+                conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in victims])
+                total -= sum(size for _, size in victims)
+
+    def get_or_compute(self, namespace: str, key: str, compute, ttl: Optional[float] = None):
+        value = self.get(namespace, key)
+        if value is None:
+            value = compute()
+            self.put(namespace, key, value, ttl)
+        return value
+
+    def stats(self) -> dict:
+        entries, size = self._conn().execute("SELECT (SELECT COUNT(*) FROM entries), bytes FROM usage").fetchone()
+        with self._lock:
+            hits, misses = dict(self._hits), dict(self._misses)
+        lookups = sum(hits.values()) + sum(misses.values())
+        return {"hits": hits, "misses": misses, "hit_rate": round(sum(hits.values()) / lookups, 3) if lookups else None,
+                "entries": entries, "bytes": size}
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+_init_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _configured_cache() -> Optional[ResponseCache]:
+    if os.getenv("RESPONSE_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    ttls = {ns: float(os.getenv(f"CACHE_TTL_{ns.upper()}", ttl)) for ns, ttl in DEFAULT_TTLS.items()}
+    return ResponseCache(os.getenv("RESPONSE_CACHE_PATH", CACHE_PATH),
+                         int(float(os.getenv("RESPONSE_CACHE_MAX_MB", MAX_BYTES / 2**20)) * 2**20), ttls)
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """Process-wide cache configured from the environment, or None when disabled."""
+    with _init_lock:  # the first calls can race in from the swarm's worker threads
+        return _configured_cache()
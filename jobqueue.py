@@ -0,0 +1,329 @@
+"""Durable draft -> signed -> broadcast queue.
+
+Swarm runs and their drafts are rows in SQLite, so the Approval Queue
+survives closed tabs and restarts. A draft moves through
+
+    draft -> signed -> queued -> broadcasting -> broadcast
+                                    \\-> queued (retry) -> ... -> failed
+
+Broadcasting happens on `BroadcastWorkers` threads, not in the button
+handler. A worker claims a job with a lease and renews it while the post is
+in flight, since rate-limit backoff (X's `x-rate-limit-reset` can be 15
+minutes away) outlasts any fixed lease. A job whose lease expires (the
+process died mid-broadcast) is claimed again, and a worker that lost its
+lease can no longer complete or fail the job. The tweet id is stored as soon
+as X returns it and the ledger write is skipped when the tweet id is
+already logged, so a retried job never posts or logs twice once its tweet
+id is known. Queueing the same signed record twice is refused: the hash of
+its signature and payload is the job's idempotency key. The payload is part
+of the key because every record of a Merkle batch shares one signature.
+"""
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+import tracing
+
+JOBS_DB = "jobs.sqlite3"
+LEASE_SECONDS = 60
+RENEW_SECONDS = LEASE_SECONDS / 3  # a worker renews its lease this often while a post is in flight
+MAX_ATTEMPTS = 5
+RETRY_BASE = 2.0
+
+DRAFT, SIGNED, QUEUED, BROADCASTING, BROADCAST, FAILED = "draft", "signed", "queued", "broadcasting", "broadcast", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    state TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    position INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    status TEXT NOT NULL,
+    signed TEXT,
+    idempotency_key TEXT UNIQUE,
+    demo INTEGER NOT NULL DEFAULT 1,
+    tweet_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_run ON jobs(run_id, position);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, not_before);
+"""
+
+log = logging.getLogger(__name__)
+
+
+class JobQueueError(Exception):
+    pass
+
+
+def idempotency_key(signed: dict) -> str:
+    """Unique per signed record, including each record of a batch sharing one signature."""
+    return hashlib.sha256(f"{signed['signature']}|{signed['payload']}".encode("utf-8")).hexdigest()
+
+
+def _row(row: sqlite3.Row) -> dict:
+    job = dict(row)
+    if job.get("signed"): job["signed"] = json.loads(job["signed"])
+    if "demo" in job: job["demo"] = bool(job["demo"])
+    return job
+
+
+class JobQueue:
+    def __init__(self, path: str = JOBS_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            if "lease_token" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease_token TEXT")  # queues created before lease renewal
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")  # queue state is the source of truth, not a cache
+            self._local.conn = conn
+        return conn
+
+    def _write(self, sql: str, params=()) -> sqlite3.Cursor:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+            return cursor
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- RUNS & DRAFTS ---
+    def add_run(self, topic: str, state: dict) -> int:
+        """Persist a swarm result and one draft job per post; returns the run id."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            run_id = conn.execute("INSERT INTO runs (topic, state, created) VALUES (?, ?, ?)",
+                                  (topic, json.dumps(state, ensure_ascii=False), now)).lastrowid
+            conn.executemany("INSERT INTO jobs (run_id, position, content, status, updated) VALUES (?, ?, ?, ?, ?)",
+                             [(run_id, i, post, DRAFT, now) for i, post in enumerate(state.get("final_posts", []))])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return run_id
+
+    def run(self, run_id: Optional[int] = None) -> Optional[dict]:
+        """A run with its jobs in draft order; the newest run when `run_id` is None."""
+        conn = self._conn()
+        if run_id is None: row = conn.execute("SELECT * FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        else: row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        jobs = conn.execute("SELECT * FROM jobs WHERE run_id = ? ORDER BY position", (row["id"],)).fetchall()
+        return {"id": row["id"], "topic": row["topic"], "state": json.loads(row["state"]), "created": row["created"],
+                "jobs": [_row(j) for j in jobs]}
+
+    def get(self, job_id: int) -> dict:
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobQueueError(f"unknown job {job_id}")
+        return _row(row)
+
+    def sign(self, job_id: int, content: str, signed: dict) -> dict:
+        cursor = self._write("UPDATE jobs SET content = ?, signed = ?, status = ?, updated = ? WHERE id = ? AND status = ?",
+                             (content, json.dumps(signed), SIGNED, time.time(), job_id, DRAFT))
+        if not cursor.rowcount:
+            raise JobQueueError(f"job {job_id} is not an unsigned draft")
+        return self.get(job_id)
+
+    def sign_many(self, signed: List[tuple]):
+        """Sign several drafts atomically from (job_id, content, signed_record) triples, e.g. one Merkle batch."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for job_id, content, record in signed:
+                if not conn.execute("UPDATE jobs SET content = ?, signed = ?, status = ?, updated = ? WHERE id = ? AND status = ?",
+                                    (content, json.dumps(record), SIGNED, now, job_id, DRAFT)).rowcount:
+                    raise JobQueueError(f"job {job_id} is not an unsigned draft")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- BROADCAST QUEUE ---
+    def enqueue(self, job_id: int, demo: bool = True) -> dict:
+        """Queue a signed job for broadcast. Re-queueing a job that is already queued or done is a no-op."""
+        job = self.get(job_id)
+        if job["status"] != SIGNED:
+            return job
+        key = idempotency_key(job["signed"])
+        try:
+            self._write("UPDATE jobs SET status = ?, idempotency_key = ?, demo = ?, not_before = 0, updated = ? WHERE id = ? AND status = ?",
+                        (QUEUED, key, int(demo), time.time(), job_id, SIGNED))
+        except sqlite3.IntegrityError:
+            raise JobQueueError(f"job {job_id}: this signed record is already queued by another job")
+        return self.get(job_id)
+
+    def claim(self) -> Optional[dict]:
+        """Lease the next due job (including ones whose previous lease expired).
+
+        The job's `lease_token` identifies this lease to `renew`, `complete` and `fail`.
+        """
+        now, token = time.time(), uuid.uuid4().hex
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE (status = ? AND not_before <= ?) OR (status = ? AND lease_until < ?) ORDER BY id LIMIT 1",
+                (QUEUED, now, BROADCASTING, now)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = ?, lease_until = ?, lease_token = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                             (BROADCASTING, now + LEASE_SECONDS, token, now, row["id"]))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    def renew(self, job_id: int, lease_token: str) -> bool:
+        """Extend a lease still held; False once another worker has claimed the job."""
+        now = time.time()
+        return bool(self._write("UPDATE jobs SET lease_until = ?, updated = ? WHERE id = ? AND status = ? AND lease_token = ?",
+                                (now + LEASE_SECONDS, now, job_id, BROADCASTING, lease_token)).rowcount)
+
+    def record_tweet(self, job_id: int, tweet_id: str):
+        """Remember the tweet id the moment X returns it, before anything else can fail.
+
+        Kept even if the lease was lost meanwhile: the tweet exists either way,
+        and the worker now holding the job must not post it again.
+        """
+        self._write("UPDATE jobs SET tweet_id = ?, updated = ? WHERE id = ? AND tweet_id IS NULL", (tweet_id, time.time(), job_id))
+
+    def complete(self, job_id: int, lease_token: str) -> bool:
+        """Mark a job broadcast; False (and nothing written) when the lease is no longer ours."""
+        return bool(self._write("UPDATE jobs SET status = ?, error = NULL, lease_until = 0, lease_token = NULL, updated = ? "
+                                "WHERE id = ? AND status = ? AND lease_token = ?",
+                                (BROADCAST, time.time(), job_id, BROADCASTING, lease_token)).rowcount)
+
+    def fail(self, job_id: int, lease_token: str, error: str) -> bool:
+        """Back off and retry, or give up after MAX_ATTEMPTS; False when the lease is no longer ours."""
+        job = self.get(job_id)
+        now = time.time()
+        if job["attempts"] >= MAX_ATTEMPTS: status, not_before = FAILED, job["not_before"]
+        else: status, not_before = QUEUED, now + RETRY_BASE * 2 ** (job["attempts"] - 1)
+        return bool(self._write("UPDATE jobs SET status = ?, error = ?, not_before = ?, lease_until = 0, lease_token = NULL, updated = ? "
+                                "WHERE id = ? AND status = ? AND lease_token = ?",
+                                (status, error, not_before, now, job_id, BROADCASTING, lease_token)).rowcount)
+
+    def retry(self, job_id: int):
+        """Put a failed job back in the queue with a fresh attempt budget."""
+        self._write("UPDATE jobs SET status = ?, attempts = 0, not_before = 0, updated = ? WHERE id = ? AND status = ?",
+                    (QUEUED, time.time(), job_id, FAILED))
+
+    def counts(self) -> dict:
+        return {row["status"]: row["n"] for row in self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status")}
+
+
+# --- WORKERS ---
+class BroadcastWorkers:
+    """Background threads that drain the broadcast queue.
+
+    `post(job) -> tweet_id` publishes a signed job (raising on failure) and
+    `record(job, tweet_id)` logs it; `record` must tolerate being called
+    again for a tweet id it has already logged.
+    """
+    def __init__(self, queue: JobQueue, post: Callable[[dict], str], record: Callable[[dict, str], None],
+                 workers: int = 2, poll_seconds: float = 1.0):
+        self.queue = queue
+        self.post = post
+        self.record = record
+        self.poll_seconds = poll_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._run, name=f"broadcast-{i}", daemon=True) for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def notify(self):
+        """Wake idle workers after enqueueing instead of waiting for the next poll."""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error:
+                log.exception("broadcast queue unavailable")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            self.process(job)
+
+    def process(self, job: dict):
+        try:
+            with tracing.span("broadcast.job", attempt=job["attempts"]), self._holding(job):
+                tweet_id = job["tweet_id"]
+                if not tweet_id:  # a re-claimed job that already reached X must not post again
+                    tweet_id = self.post(job)
+                    self.queue.record_tweet(job["id"], tweet_id)
+                self.record(job, tweet_id)
+            done = self.queue.complete(job["id"], job["lease_token"])
+            tracing.count("broadcast.done" if done else "broadcast.lease_lost")
+        except Exception as e:
+            log.warning("broadcast of job %s failed: %s", job["id"], e)
+            done = self.queue.fail(job["id"], job["lease_token"], f"{type(e).__name__}: {e}")
+            tracing.count("broadcast.failed" if done else "broadcast.lease_lost")
+
+    @contextmanager
+    def _holding(self, job: dict):
+        """Renew the job's lease every RENEW_SECONDS until the block exits, however long rate-limit backoff takes."""
+        released = threading.Event()
+
+        def renew():
+            while not released.wait(RENEW_SECONDS):
+                try:
+                    held = self.queue.renew(job["id"], job["lease_token"])
+                except sqlite3.Error:
+                    log.exception("could not renew the lease on job %s", job["id"])
+                    continue
+                if not held:
+                    log.warning("lost the lease on job %s mid-broadcast", job["id"])
+                    return
+
+        renewer = threading.Thread(target=renew, name=f"lease-{job['id']}", daemon=True)
+        renewer.start()
+        try:
+            yield
+        finally:
+            released.set()
+            renewer.join()
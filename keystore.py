@@ -0,0 +1,175 @@
+"""File-backed signing key store with stable key ids and rotation.
+
+    keys/
+        keystore.json        public metadata: active key id, curve, public key, created/retired
+        private/<key_id>.key private key (hex), mode 0600
+
+Ledger entries name their signer by `key_id` instead of repeating the full
+public key, so the ledger stays small and verifiers can parse each key once
+(`precompute`) and reuse it across every entry it signed. `keystore.json`
+holds no secrets and can be handed to auditors on its own.
+
+    python keystore.py list
+    python keystore.py rotate
+"""
+import os
+import json
+import time
+import argparse
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import signing
+from filelock import locked, write_atomic
+
+KEYS_DIR = "keys"
+KEYSTORE_FILE = "keystore.json"
+PRIVATE_DIR = "private"
+LOCK_FILE = ".lock"
+
+
+class KeyStoreError(Exception):
+    pass
+
+
+class KeyPair(NamedTuple):
+    key_id: str
+    curve: str
+    private_key: bytes
+    public_key: str
+
+
+class KeyStore:
+    def __init__(self, root: str = KEYS_DIR):
+        self.root = root
+        self._data: Optional[dict] = None
+        self._mtime: Optional[float] = None
+        self._private: Dict[str, bytes] = {}
+        os.makedirs(os.path.join(root, PRIVATE_DIR), mode=0o700, exist_ok=True)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.root, KEYSTORE_FILE)
+
+    def _private_path(self, key_id: str) -> str:
+        return os.path.join(self.root, PRIVATE_DIR, f"{key_id}.key")
+
+    def _load(self) -> dict:
+        # One stat per call; the file is re-read only after a rotation (possibly by another process).
+        try: mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError: mtime = None
+        if self._data is None or mtime != self._mtime:
+            if mtime is None:
+                self._data = {"active": None, "keys": {}}
+            else:
+                with open(self.path, "r", encoding="utf-8") as f: self._data = json.load(f)
+            self._mtime = mtime
+        return self._data
+
+    def _save(self, data: dict):
+        write_atomic(self.path, json.dumps(data, indent=4).encode("utf-8"))
+        self._data, self._mtime = data, os.stat(self.path).st_mtime_ns
+
+    # --- READS ---
+    def keys(self) -> Dict[str, dict]:
+        return self._load()["keys"]
+
+    def public_keys(self) -> Dict[str, str]:
+        return {kid: meta["public_key"] for kid, meta in self.keys().items()}
+
+    def get(self, key_id: str) -> KeyPair:
+        meta = self.keys().get(key_id)
+        if meta is None:
+            raise KeyStoreError(f"unknown key id {key_id!r}")
+        if key_id not in self._private:
+            with open(self._private_path(key_id), "r", encoding="utf-8") as f:
+                self._private[key_id] = bytes.fromhex(f.read().strip())
+        return KeyPair(key_id, meta["curve"], self._private[key_id], meta["public_key"])
+
+    def active_key_id(self) -> Optional[str]:
+        return self._load()["active"]
+
+    def active(self) -> KeyPair:
+        """The current signing key, created on first use."""
+        key_id = self.active_key_id()
+        return self.get(key_id) if key_id else self.rotate(only_if_empty=True)
+
+    # --- WRITES ---
+    def rotate(self, backend: Optional[signing.SigningBackend] = None, only_if_empty: bool = False) -> KeyPair:
+        """Create a new active key and retire the previous one (it still verifies old entries)."""
+        backend = backend or signing.get_backend()
+        with locked(os.path.join(self.root, LOCK_FILE)):
+            self._data = None
+            data = self._load()
+            if only_if_empty and data["active"]:
+                return self.get(data["active"])  # another session created it first
+            private_key, public_key = signing.generate_keys(backend)
+            key_id = signing.key_id(public_key)
+            write_atomic(self._private_path(key_id), private_key.hex().encode(), mode=0o600)
+            now = int(time.time())
+            keys = dict(data["keys"])
+            if data["active"]:
+                keys[data["active"]] = {**keys[data["active"]], "retired": now}
+            keys[key_id] = {"curve": backend.curve, "public_key": public_key, "created": now, "retired": None}
+            self._save({"active": key_id, "keys": keys})
+            self._private[key_id] = private_key
+        return KeyPair(key_id, backend.curve, private_key, public_key)
+
+    # --- SIGNING ---
+    def sign_record(self, content: str) -> dict:
+        """Signed record that references the active key by id only."""
+        pair = self.active()
+        return signing.sign_record(pair.private_key, content, backend=signing.backend_for(pair.curve), embed_public_key=False)
+
+    def sign_batch(self, contents: Sequence[str]) -> List[dict]:
+        """Format-2 records for many posts under one signature (see `signing.sign_batch`)."""
+        pair = self.active()
+        return signing.sign_batch(pair.private_key, contents, backend=signing.backend_for(pair.curve), embed_public_key=False)
+
+    def sign_digest(self, digest: bytes) -> Dict[str, str]:
+        """Ledger batch-root signer (see `ledger.BatchSigner`)."""
+        pair = self.active()
+        signature = signing.backend_for(pair.curve).sign_digest(pair.private_key, digest)
+        return {"signature": signature.hex(), "key_id": pair.key_id, "curve": pair.curve}
+
+    def precompute(self) -> Dict[str, str]:
+        """Parse every known public key once so bulk verification reuses the parsed form."""
+        return precompute_table(self.keys())
+
+
+def load_key_table(root: str = KEYS_DIR) -> Dict[str, dict]:
+    """key_id -> public metadata from `keystore.json` alone; no private material is read."""
+    path = os.path.join(root, KEYSTORE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["keys"]
+
+
+def precompute_table(key_table: Dict[str, dict]) -> Dict[str, str]:
+    """Parse every key in `key_table` once and return the key_id -> public key map verifiers take."""
+    for meta in key_table.values():
+        try: signing.backend_for(meta["curve"]).precompute(bytes.fromhex(meta["public_key"]))
+        except (signing.SigningBackendUnavailable, *signing.VERIFY_ERRORS): continue
+    return {kid: meta["public_key"] for kid, meta in key_table.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AuthentiPost signing key store")
+    parser.add_argument("--keys", default=KEYS_DIR, help="key store directory")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="list keys")
+    sub.add_parser("rotate", help="create a new active key")
+    args = parser.parse_args(argv)
+
+    store = KeyStore(args.keys)
+    if args.cmd == "rotate":
+        pair = store.rotate()
+        print(f"Active key is now {pair.key_id} ({pair.curve})")
+    active = store.active_key_id()
+    for kid, meta in store.keys().items():
+        status = "active" if kid == active else ("retired" if meta["retired"] else "")
+        print(f"{kid}  {meta['curve']:<10} created {time.ctime(meta['created'])}  {status}")
+
+
+if __name__ == "__main__":
+    main()
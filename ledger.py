@@ -0,0 +1,673 @@
+"""Append-only, segmented, hash-chained ledger for broadcast posts.
+
+Each record is one compact JSON object per line. Lines are appended to the
+active segment file and segments rotate once they reach a size limit, so an
+append never touches earlier data: publish latency stays flat no matter how
+many entries the ledger holds. Appends take an exclusive file lock and are
+fsync'd, which keeps concurrent Streamlit sessions (or separate processes)
+from dropping each other's entries.
+
+Every record carries `seq`, the previous record's hash (`prev_hash`) and its
+own `hash`. Consecutive runs of `batch_size` records are sealed into Merkle
+batches (`batches.jsonl`) whose roots are chained and signed, so a single
+post can be proven with a logarithmic path and the whole ledger can be
+tamper-checked by reading only the batch roots.
+
+A fixed-width sidecar index (`ledger_index`) maps each seq to its segment,
+byte offset, timestamp, tweet id and signer, so pages, time ranges and
+tweet lookups read only the records they return.
+
+Segments that have rotated out can be packed (`python ledger.py pack`) into
+the binary form of `ledger_codec`: raw signature, key and hash bytes instead
+of hex, optionally zstd-compressed. Index entries mark packed records, and
+every reader accepts either form.
+"""
+import os
+import json
+import time
+import bisect
+import hashlib
+import argparse
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import merkle
+import ledger_codec
+import ledger_index
+from filelock import O_BINARY, fsync_dir, locked, write_atomic
+from ledger_index import LedgerIndex
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+PACKED_SUFFIX = ".pack"
+PACKED_CACHE = 8  # packed segments kept open (mapped or decompressed) between reads
+BATCH_FILE = "batches.jsonl"
+BATCH_SIZE = 256
+LOCK_FILE = ".lock"
+IMPORT_MARKER = ".imported"
+READ_BLOCK = 64 * 1024
+GENESIS_HASH = "0" * 64
+CHAIN_FIELDS = ("seq", "prev_hash", "hash")
+SIGNED_BATCH_FIELDS = ("batch", "first_seq", "last_seq", "root", "prev_root", "sealed_at")
+
+# signer(digest) -> fields merged into the batch record, e.g. {"signature": ..., "public_key": ...}
+BatchSigner = Callable[[bytes], Dict[str, str]]
+# verifier(digest, batch) -> True if the batch signature is valid
+BatchVerifier = Callable[[bytes, dict], bool]
+
+
+class LedgerError(Exception):
+    pass
+
+
+def _segment_name(number: int, suffix: str = SEGMENT_SUFFIX) -> str:
+    return f"{SEGMENT_PREFIX}{number:08d}{suffix}"
+
+
+def _canonical(obj: dict) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _encode(record: dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def record_hash(record: dict) -> str:
+    """SHA-256 over the canonical JSON of a record, excluding its own `hash`."""
+    return hashlib.sha256(_canonical({k: v for k, v in record.items() if k != "hash"})).hexdigest()
+
+
+def batch_digest(batch: dict) -> bytes:
+    """The digest a batch signature covers; locator fields are deliberately excluded."""
+    return hashlib.sha256(_canonical({k: batch[k] for k in SIGNED_BATCH_FIELDS})).digest()
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def _append_line(path: str, line: bytes):
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | O_BINARY, 0o644)
+    try:
+        _write_all(fd, line)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _iter_reversed_lines(path: str) -> Iterator[Tuple[int, bytes]]:
+    """Yield (offset, line) pairs from the end of a file backwards, one block at a time."""
+    with open(path, "rb") as f:
+        buf_start = f.seek(0, os.SEEK_END)
+        buffer = b""
+        while True:
+            idx = buffer.rfind(b"\n", 0, max(0, len(buffer) - 1))
+            if idx == -1:
+                if buf_start == 0:
+                    if buffer.strip(): yield 0, buffer.rstrip(b"\n")
+                    return
+                start = max(0, buf_start - READ_BLOCK)
+                f.seek(start)
+                buffer = f.read(buf_start - start) + buffer
+                buf_start = start
+                continue
+            line = buffer[idx + 1:]
+            if line.strip(): yield buf_start + idx + 1, line.rstrip(b"\n")
+            buffer = buffer[:idx + 1]
+
+
+class _Head:
+    """In-process view of the chain head, valid while nobody else has appended."""
+    def __init__(self, segment: int, size: int, batches_size: int, seq: int, hash_: str,
+                 pending: List[Tuple[int, str, int, int]], last_batch: Optional[dict]):
+        self.segment = segment
+        self.size = size
+        self.batches_size = batches_size
+        self.seq = seq
+        self.hash = hash_
+        self.pending = pending  # (seq, hash, segment, offset) of records not yet sealed
+        self.last_batch = last_batch
+
+
+class Ledger:
+    def __init__(self, root: str, segment_max_bytes: int = SEGMENT_MAX_BYTES,
+                 batch_size: int = BATCH_SIZE, signer: Optional[BatchSigner] = None):
+        self.root = root
+        self.segment_max_bytes = segment_max_bytes
+        self.batch_size = batch_size
+        self.signer = signer
+        self._active: Optional[int] = None
+        self._head: Optional[_Head] = None
+        self._batches: List[dict] = []
+        self._batches_offset = 0
+        self._index_synced = False
+        self._packed: "OrderedDict[int, ledger_codec.PackedSegment]" = OrderedDict()
+        self._packed_lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self.index = LedgerIndex(root)
+
+    # --- SEGMENTS ---
+    def segment_path(self, number: int) -> str:
+        return os.path.join(self.root, _segment_name(number))
+
+    def packed_path(self, number: int) -> str:
+        return os.path.join(self.root, _segment_name(number, PACKED_SUFFIX))
+
+    @property
+    def batch_path(self) -> str:
+        return os.path.join(self.root, BATCH_FILE)
+
+    def segment_numbers(self) -> List[int]:
+        numbers = set()
+        for name in os.listdir(self.root):
+            stem, suffix = os.path.splitext(name)
+            if stem.startswith(SEGMENT_PREFIX) and suffix in (SEGMENT_SUFFIX, PACKED_SUFFIX):
+                try: numbers.add(int(stem[len(SEGMENT_PREFIX):]))
+                except ValueError: continue
+        return sorted(numbers)
+
+    def _packed_segment(self, number: int) -> ledger_codec.PackedSegment:
+        """Packed segments never change, so the most recently used few stay open."""
+        with self._packed_lock:
+            segment = self._packed.pop(number, None) or ledger_codec.PackedSegment(self.packed_path(number))
+            self._packed[number] = segment
+            while len(self._packed) > PACKED_CACHE:
+                self._packed.popitem(last=False)  # not closed: a reader may still hold it; the map goes with it
+        return segment
+
+    def _segment_entries(self, number: int, offset: int = 0, lazy: bool = False) -> Iterator[Tuple[int, int, int, dict]]:
+        """(index segment, offset, length, record) for every complete record of a segment from `offset` on."""
+        if os.path.exists(self.packed_path(number)):  # preferred: a JSONL twin is only a pack in progress
+            for position, length, record in self._packed_segment(number).entries(offset, lazy):
+                yield number | ledger_index.PACKED, position, length, record
+            return
+        with open(self.segment_path(number), "rb") as f:
+            position = f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"): break
+                yield number, position, len(line), json.loads(line)
+                position += len(line)
+
+    def _active_segment(self) -> int:
+        # Caller holds the lock. The directory is listed once per instance;
+        # afterwards we only probe for segments rotated in by other writers.
+        if self._active is None:
+            numbers = self.segment_numbers()
+            self._active = numbers[-1] if numbers else 0
+        while os.path.exists(self.segment_path(self._active + 1)):
+            self._active += 1
+        return self._active
+
+    def _locked(self):
+        return locked(os.path.join(self.root, LOCK_FILE))
+
+    def _open_for_append(self, size_hint: int) -> Tuple[int, int, int, bool]:
+        """Return (fd, segment, size, created) for where the next `size_hint` bytes go."""
+        number = self._active_segment()
+        path = self.segment_path(number)
+        try: size = os.path.getsize(path)
+        except FileNotFoundError: size = 0
+        if size and size + size_hint > self.segment_max_bytes:
+            number += 1
+            self._active = number
+            path = self.segment_path(number)
+            size = 0
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | O_BINARY, 0o644)
+        if size:
+            # A crash mid-write leaves a torn last line; drop it so the next
+            # record does not get glued onto the fragment.
+            os.lseek(fd, size - 1, os.SEEK_SET)
+            if os.read(fd, 1) != b"\n":
+                size = self._truncate_torn_tail(fd, size)
+        return fd, number, size, size == 0
+
+    @staticmethod
+    def _truncate_torn_tail(fd: int, size: int) -> int:
+        end = size
+        while end > 0:
+            start = max(0, end - READ_BLOCK)
+            os.lseek(fd, start, os.SEEK_SET)
+            block = os.read(fd, end - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                os.ftruncate(fd, start + newline + 1)
+                return start + newline + 1
+            end = start
+        os.ftruncate(fd, 0)
+        return 0
+
+    # --- CHAIN HEAD ---
+    def _file_size(self, path: str) -> int:
+        try: return os.path.getsize(path)
+        except FileNotFoundError: return 0
+
+    def _load_head(self) -> _Head:
+        # Caller holds the lock. Reuse the cached head unless another writer
+        # has touched the active segment or the batch file since we last wrote.
+        segment = self._active_segment()
+        size = self._file_size(self.segment_path(segment))
+        batches_size = self._file_size(self.batch_path)
+        head = self._head
+        if head and head.segment == segment and head.size == size and head.batches_size == batches_size:
+            return head
+
+        last_batch = None
+        if batches_size:
+            for _, line in _iter_reversed_lines(self.batch_path):
+                try: last_batch = json.loads(line)
+                except ValueError: continue
+                break
+        last = self._tail_entries(1)
+        seq, hash_ = (last[0][2]["seq"], last[0][2]["hash"]) if last else (-1, GENESIS_HASH)
+        sealed_through = last_batch["last_seq"] if last_batch else -1
+        pending = [(r["seq"], r["hash"], seg, off) for seg, off, r in self._tail_entries(seq - sealed_through)]
+        self._head = _Head(segment, size, batches_size, seq, hash_, pending, last_batch)
+        return self._head
+
+    def _seal(self, head: _Head):
+        chunk = head.pending[:self.batch_size]
+        leaves = [merkle.leaf_hash(bytes.fromhex(h)) for _, h, _, _ in chunk]
+        prev = head.last_batch
+        batch = {
+            "batch": prev["batch"] + 1 if prev else 0,
+            "first_seq": chunk[0][0],
+            "last_seq": chunk[-1][0],
+            "root": merkle.merkle_root(leaves).hex(),
+            "prev_root": prev["root"] if prev else GENESIS_HASH,
+            "sealed_at": int(time.time()),
+        }
+        if self.signer:
+            batch.update(self.signer(batch_digest(batch)))
+        batch["locator"] = {"segment": chunk[0][2], "offset": chunk[0][3]}
+        line = _encode(batch)
+        _append_line(self.batch_path, line)
+        head.batches_size += len(line)
+        head.last_batch = batch
+        head.pending = head.pending[self.batch_size:]
+
+    # --- INDEX ---
+    def _iter_from(self, segment: int, offset: int, lazy: bool = False) -> Iterator[Tuple[int, int, int, dict]]:
+        """`_segment_entries` from a position onwards, following into later segments."""
+        for number in self.segment_numbers():
+            if number >= segment:
+                yield from self._segment_entries(number, offset if number == segment else 0, lazy)
+
+    def _catch_up_index(self, head: _Head):
+        """Bring the sidecar index level with the segments (caller holds the lock)."""
+        count = len(self.index)
+        if count > head.seq + 1:
+            count = head.seq + 1  # segments lost a torn tail the index had already seen
+        self.index.truncate(count)
+        if count <= head.seq:
+            last = self.index.get(count - 1) if count else None
+            start = (last.segment & ~ledger_index.PACKED, last.offset + last.length) if last else (self.segment_numbers()[0], 0)
+            batch: List[bytes] = []
+            for segment, offset, length, record in self._iter_from(*start, lazy=True):
+                batch.append(ledger_index.pack(record, segment, offset, length))
+                if len(batch) == 4096:
+                    self.index.append(batch)
+                    batch = []
+            self.index.append(batch)
+        self._index_synced = True
+
+    def sync_index(self):
+        """Rebuild any missing index entries; done once per instance before the first indexed read."""
+        if not self._index_synced:
+            with self._locked():
+                self._catch_up_index(self._load_head())
+
+    # --- WRITES ---
+    def append(self, record: dict) -> dict:
+        return self.extend([record])[0]
+
+    def extend(self, records: Iterable[dict]) -> List[dict]:
+        """Chain and append records under a single lock; returns the stored records."""
+        records = [{k: v for k, v in r.items() if k not in CHAIN_FIELDS} for r in records]
+        if not records:
+            return []
+        with self._locked():
+            self._extend_locked(records)
+        return records
+
+    def _extend_locked(self, records: List[dict]):
+        """`extend` for a caller already holding the ledger lock; chain fields are filled in place."""
+        head = self._load_head()
+        self._catch_up_index(head)
+        fd = number = None
+        size, created = 0, False
+        indexed: List[bytes] = []
+        try:
+            for record in records:
+                record["seq"] = head.seq + 1
+                record["prev_hash"] = head.hash
+                record["hash"] = record_hash(record)
+                line = _encode(record)
+                if fd is not None and size + len(line) > self.segment_max_bytes:
+                    os.fsync(fd)
+                    os.close(fd)
+                    fd = None
+                if fd is None:
+                    fd, number, size, new_segment = self._open_for_append(len(line))
+                    created = created or new_segment
+                _write_all(fd, line)
+                indexed.append(ledger_index.pack(record, number, size, len(line)))
+                head.pending.append((record["seq"], record["hash"], number, size))
+                head.seq, head.hash = record["seq"], record["hash"]
+                size += len(line)
+                if len(head.pending) >= self.batch_size:
+                    os.fsync(fd)  # only seal records that are durable
+                    self._seal(head)
+            os.fsync(fd)
+            self.index.append(indexed)  # only after the records it points at are durable
+        except BaseException:
+            self._head = None  # the on-disk state is authoritative after a failure
+            raise
+        finally:
+            if fd is not None: os.close(fd)
+        head.segment, head.size = number, size
+        if created: fsync_dir(self.root)
+
+    # --- READS ---
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_records()
+
+    def iter_records(self) -> Iterator[dict]:
+        """Stream every record in append order without loading a segment into memory."""
+        for number in self.segment_numbers():
+            for _, _, _, record in self._segment_entries(number):
+                yield record
+
+    def read_from(self, segment: int, offset: int, count: int) -> List[dict]:
+        """Read `count` records starting at a byte offset in that segment's own form, following into later segments."""
+        return [record for _, _, _, record in itertools.islice(self._iter_from(segment, offset), count)]
+
+    def _reversed_records(self, number: int) -> Iterator[Tuple[int, dict]]:
+        if os.path.exists(self.packed_path(number)):
+            yield from reversed([(offset, record) for _, offset, _, record in self._segment_entries(number)])
+            return
+        for offset, line in _iter_reversed_lines(self.segment_path(number)):
+            try: yield offset, json.loads(line)
+            except ValueError: continue  # torn tail from an interrupted write
+
+    def _tail_entries(self, n: int) -> List[Tuple[int, int, dict]]:
+        out: List[Tuple[int, int, dict]] = []
+        if n <= 0:
+            return out
+        for number in reversed(self.segment_numbers()):
+            for offset, record in self._reversed_records(number):
+                out.append((number, offset, record))
+                if len(out) == n:
+                    return out[::-1]
+        return out[::-1]
+
+    def tail(self, n: int) -> List[dict]:
+        """Return the last `n` records (oldest first), reading only the end of the ledger."""
+        return [record for _, _, record in self._tail_entries(n)]
+
+    def is_empty(self) -> bool:
+        return not any(self._file_size(self.segment_path(n)) or os.path.exists(self.packed_path(n)) for n in self.segment_numbers())
+
+    # --- INDEXED READS ---
+    def count(self) -> int:
+        self.sync_index()
+        return len(self.index)
+
+    def read_entries(self, entries: Iterable[ledger_index.IndexEntry]) -> List[dict]:
+        """Load the records behind index entries with one positioned read each."""
+        out, files = [], {}
+        try:
+            for entry in entries:
+                if entry.segment & ledger_index.PACKED:
+                    out.append(self._packed_segment(entry.segment & ~ledger_index.PACKED).record(entry.offset))
+                    continue
+                if entry.segment not in files:
+                    files[entry.segment] = open(self.segment_path(entry.segment), "rb")
+                f = files[entry.segment]
+                f.seek(entry.offset)
+                out.append(json.loads(f.read(entry.length)))
+        finally:
+            for f in files.values(): f.close()
+        return out
+
+    def page(self, page: int, per_page: int = 5) -> List[dict]:
+        """Page `page` (0 = newest) of records, newest first; cost is independent of ledger size."""
+        stop = self.count() - page * per_page
+        return self.read_entries(reversed(self.index.read(stop - per_page, stop)))
+
+    def between(self, start: float, end: float, limit: Optional[int] = None) -> List[dict]:
+        """Records with start <= timestamp < end, oldest first, located by bisecting the index."""
+        self.sync_index()
+        first, last = self.index.bisect_time(start), self.index.bisect_time(end)
+        if limit is not None: last = min(last, first + limit)
+        return self.read_entries(self.index.read(first, last))
+
+    def find_tweet(self, tweet_id) -> Optional[dict]:
+        self.sync_index()
+        for seq in self.index.scan(ledger_index.tweet_hash(tweet_id), ledger_index.TWEET_FIELD_OFFSET):
+            record = self.read_entries([self.index.get(seq)])[0]
+            if str(record.get("tweet_id")) == str(tweet_id):  # guard against 64-bit prefix collisions
+                return record
+        return None
+
+    def by_key(self, key_id: str, limit: int = 20) -> List[dict]:
+        """Newest records signed by `key_id`."""
+        self.sync_index()
+        key = ledger_index.key_bytes({"key_id": key_id})
+        entries = []
+        for seq in self.index.scan(key, ledger_index.KEY_FIELD_OFFSET):
+            entries.append(self.index.get(seq))
+            if len(entries) == limit: break
+        return self.read_entries(entries)
+
+    # --- PACKING ---
+    def pack_segments(self, compress: bool = False) -> List[int]:
+        """Rewrite rotated-out segments in the binary `ledger_codec` form; returns the segments packed.
+
+        The active segment stays JSONL, so appends are unaffected. Each packed
+        file is durable and the index repointed at it before the JSONL original
+        is removed, so a crash at any step leaves every index entry naming a
+        file that exists.
+        """
+        packed = []
+        with self._locked():
+            head = self._load_head()
+            self._catch_up_index(head)
+            for number in self.segment_numbers():
+                source = self.segment_path(number)
+                if number >= head.segment or not os.path.exists(source):
+                    continue
+                if not os.path.exists(self.packed_path(number)):  # else an earlier run stopped before the removal
+                    with open(source, "rb") as f:
+                        ledger_codec.write_packed(self.packed_path(number), (json.loads(line) for line in f if line.endswith(b"\n")), compress)
+                segment = self._packed_segment(number)
+                self.index.rewrite(segment.first_seq, (ledger_index.pack(record, number | ledger_index.PACKED, offset, length)
+                                                       for offset, length, record in segment.entries(lazy=True)))
+                os.remove(source)
+                fsync_dir(self.root)
+                packed.append(number)
+        return packed
+
+    # --- BATCHES & PROOFS ---
+    def batches(self) -> List[dict]:
+        """Sealed batch headers, loaded incrementally from `batches.jsonl`."""
+        if self._file_size(self.batch_path) > self._batches_offset:
+            with open(self.batch_path, "rb") as f:
+                f.seek(self._batches_offset)
+                for line in f:
+                    if not line.endswith(b"\n"): break
+                    self._batches.append(json.loads(line))
+                    self._batches_offset += len(line)
+        return self._batches
+
+    def sealed_through(self) -> int:
+        batches = self.batches()
+        return batches[-1]["last_seq"] if batches else -1
+
+    def batch_for(self, seq: int) -> Optional[dict]:
+        batches = self.batches()
+        i = bisect.bisect_left([b["last_seq"] for b in batches], seq)
+        if i < len(batches) and batches[i]["first_seq"] <= seq:
+            return batches[i]
+        return None
+
+    def batch_records(self, batch: dict) -> List[dict]:
+        # Located through the index rather than `locator`, whose offsets go stale once a segment is packed
+        self.sync_index()
+        return self.read_entries(self.index.read(batch["first_seq"], batch["last_seq"] + 1))
+
+    def prove(self, seq: int) -> dict:
+        """Inclusion proof for record `seq` against its batch's signed root."""
+        batch = self.batch_for(seq)
+        if batch is None:
+            raise LedgerError(f"record {seq} is not sealed into a batch yet")
+        records = self.batch_records(batch)
+        leaves = [merkle.leaf_hash(bytes.fromhex(r["hash"])) for r in records]
+        index = seq - batch["first_seq"]
+        return {
+            "record": records[index],
+            "batch": {k: v for k, v in batch.items() if k != "locator"},
+            "path": merkle.merkle_path(leaves, index),
+        }
+
+    # --- VERIFICATION ---
+    def verify_batches(self, verifier: Optional[BatchVerifier] = None) -> dict:
+        """Tamper check that reads only the batch roots: root chaining, seq coverage and signatures."""
+        errors = []
+        prev = None
+        batches = self.batches()
+        for batch in batches:
+            expected_first = prev["last_seq"] + 1 if prev else 0
+            expected_root = prev["root"] if prev else GENESIS_HASH
+            if batch["batch"] != (prev["batch"] + 1 if prev else 0): errors.append((batch["batch"], "batch number gap"))
+            if batch["first_seq"] != expected_first: errors.append((batch["batch"], "seq coverage gap"))
+            if batch["prev_root"] != expected_root: errors.append((batch["batch"], "root chain broken"))
+            if verifier is not None:
+                if "signature" not in batch: errors.append((batch["batch"], "unsigned root"))
+                elif not verifier(batch_digest(batch), batch): errors.append((batch["batch"], "bad root signature"))
+            prev = batch
+        return {"batches": len(batches), "sealed_through": prev["last_seq"] if prev else -1, "ok": not errors, "errors": errors}
+
+    def verify_batch(self, batch: dict) -> bool:
+        """Deep check of one batch: every record hash, chain link and the Merkle root."""
+        records = self.batch_records(batch)
+        if len(records) != batch["last_seq"] - batch["first_seq"] + 1:
+            return False
+        for i, r in enumerate(records):
+            if r.get("seq") != batch["first_seq"] + i or record_hash(r) != r.get("hash"): return False
+            if i and r["prev_hash"] != records[i - 1]["hash"]: return False
+        leaves = [merkle.leaf_hash(bytes.fromhex(r["hash"])) for r in records]
+        return merkle.merkle_root(leaves).hex() == batch["root"]
+
+    def verify_chain(self) -> dict:
+        """Full scan: recompute every record hash and prev_hash link."""
+        prev_hash, expected_seq, count = GENESIS_HASH, 0, 0
+        for record in self.iter_records():
+            if record.get("seq") != expected_seq or record.get("prev_hash") != prev_hash or record_hash(record) != record.get("hash"):
+                return {"records": count, "ok": False, "first_bad_seq": expected_seq}
+            prev_hash, expected_seq, count = record["hash"], expected_seq + 1, count + 1
+        return {"records": count, "ok": True, "first_bad_seq": None}
+
+
+def verify_proof(proof: dict) -> bool:
+    """Check an inclusion proof from `Ledger.prove` without touching the ledger."""
+    record = proof["record"]
+    if record_hash(record) != record.get("hash"):
+        return False
+    leaf = merkle.leaf_hash(bytes.fromhex(record["hash"]))
+    return merkle.verify_path(leaf, proof["path"], bytes.fromhex(proof["batch"]["root"]))
+
+
+# --- LEGACY IMPORT ---
+def import_json_array(ledger: Ledger, source: str) -> int:
+    """One-time import of a legacy `posts_log.json` array into the ledger.
+
+    The check, the import and the marker that records it all happen under the
+    ledger lock, so processes starting together import once. Entries whose
+    tweet id is already logged are skipped, so an import that crashed before
+    writing its marker is finished rather than repeated. The source file is
+    left untouched.
+    """
+    marker = os.path.join(ledger.root, IMPORT_MARKER)
+    if os.path.exists(marker) or not os.path.exists(source):
+        return 0
+    with open(source, "r", encoding="utf-8") as f:
+        try: entries = json.load(f)
+        except ValueError: entries = []
+    with ledger._locked():
+        if os.path.exists(marker):  # another process imported while we waited for the lock
+            return 0
+        ledger._catch_up_index(ledger._load_head())  # find_tweet must see every record, including a crashed import's
+        records = [{k: v for k, v in e.items() if k not in CHAIN_FIELDS} for e in entries if isinstance(e, dict)]
+        records = [r for r in records if r.get("tweet_id") is None or ledger.find_tweet(r["tweet_id"]) is None]
+        if records: ledger._extend_locked(records)
+        write_atomic(marker, json.dumps({"source": os.path.abspath(source), "count": len(records)}).encode("utf-8"))
+    return len(records)
+
+
+def _batch_signature_verifier(public_keys: Dict[str, str]) -> BatchVerifier:
+    import signing
+
+    def verify(digest: bytes, batch: dict) -> bool:
+        public_key = signing.resolve_public_key(batch, public_keys)
+        if not public_key or "signature" not in batch or signing.key_mismatch(batch, public_keys):
+            return False
+        return signing.verify_digest(batch.get("curve", signing.CURVE), public_key, batch["signature"], digest)
+    return verify
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AuthentiPost ledger tools")
+    parser.add_argument("--ledger", default="ledger", help="ledger directory")
+    parser.add_argument("--keys", default="keys", help="key store directory, for batch-root signatures")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_import = sub.add_parser("import", help="import a legacy JSON array log")
+    p_import.add_argument("source", nargs="?", default="posts_log.json")
+    p_tail = sub.add_parser("tail", help="print the newest records")
+    p_tail.add_argument("-n", type=int, default=5)
+    p_find = sub.add_parser("find", help="look up a record by tweet id via the index")
+    p_find.add_argument("tweet_id")
+    p_verify = sub.add_parser("verify", help="tamper-check the signed batch roots")
+    p_verify.add_argument("--deep", action="store_true", help="also rehash every record")
+    p_prove = sub.add_parser("prove", help="print an inclusion proof for a record")
+    p_prove.add_argument("seq", type=int)
+    p_pack = sub.add_parser("pack", help="rewrite rotated-out segments in the compact binary form")
+    p_pack.add_argument("--zstd", action="store_true", help="also compress them (needs zstandard)")
+    args = parser.parse_args(argv)
+
+    def sign_root(digest: bytes) -> dict:
+        from keystore import KeyStore  # opened only when a batch is sealed, so read-only commands never create a key
+        return KeyStore(args.keys).sign_digest(digest)
+
+    ledger = Ledger(args.ledger, signer=sign_root)  # sealed roots must verify under `verify`, as the app's do
+    if args.cmd == "import":
+        print(f"Imported {import_json_array(ledger, args.source)} entries into {args.ledger}")
+    elif args.cmd == "tail":
+        for record in ledger.tail(args.n):
+            print(json.dumps(record, ensure_ascii=False))
+    elif args.cmd == "find":
+        record = ledger.find_tweet(args.tweet_id)
+        print(json.dumps(record, ensure_ascii=False) if record else f"No record for tweet {args.tweet_id}")
+        raise SystemExit(0 if record else 1)
+    elif args.cmd == "verify":
+        from keystore import load_key_table
+        public_keys = {kid: meta["public_key"] for kid, meta in load_key_table(args.keys).items()}
+        report = ledger.verify_batches(_batch_signature_verifier(public_keys))
+        if args.deep: report["chain"] = ledger.verify_chain()
+        print(json.dumps(report, indent=4))
+        raise SystemExit(0 if report["ok"] and report.get("chain", {"ok": True})["ok"] else 1)
+    elif args.cmd == "prove":
+        proof = ledger.prove(args.seq)
+        print(json.dumps({**proof, "valid": verify_proof(proof)}, indent=4, ensure_ascii=False))
+    elif args.cmd == "pack":
+        packed = ledger.pack_segments(args.zstd)
+        print(f"Packed {len(packed)} segments" + (f" ({packed[0]}..{packed[-1]})" if packed else ""))
+
+
+if __name__ == "__main__":
+    main()
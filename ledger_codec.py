@@ -0,0 +1,287 @@
+"""Compact binary encoding for ledger records.
+
+JSON stores every signature, public key and hash as hex, which doubles
+their size, and a scan has to parse all of it even when it only needs one
+field. A packed file keeps those fields as raw bytes:
+
+    header   magic "APLS", version u8, flags u8, reserved u16, first_seq u64, count u32
+    body     one frame per record, optionally zstd-compressed as a whole
+    frame    length u32 | field mask u8 | len u8 per masked field | raw bytes of those fields | compact JSON of the rest
+
+Only lowercase hex values of `RAW_FIELDS` are stored raw, so decoding gives
+back exactly the record that was encoded and record hashes still match.
+Uncompressed files are memory-mapped, and `LazyRecord` decodes a field only
+when it is read; records share a few field layouts, so decoding is one cached
+`struct` unpack plus a `json.loads` of the (much shorter) remainder.
+Compression needs the optional `zstandard` package.
+
+    python ledger_codec.py pack posts_log.json posts_log.pack --zstd
+    python ledger_codec.py unpack posts_log.pack posts_log.json
+    python ledger_codec.py stats posts_log.json posts_log.pack
+"""
+import os
+import json
+import mmap
+import struct
+import argparse
+from functools import lru_cache
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from filelock import write_atomic
+
+try:
+    import zstandard
+except ImportError:  # optional; packed files are then written uncompressed
+    zstandard = None
+
+MAGIC = b"APLS"
+VERSION = 1
+ZSTD = 0x01
+ZSTD_LEVEL = 3
+HEADER = struct.Struct("<4sBBHQI")
+FRAME = struct.Struct("<I")
+# The bit position of each field is part of the format: append, never reorder.
+RAW_FIELDS = ("hash", "prev_hash", "signature", "public_key", "key_id")
+
+_POPCOUNT = bytes(bin(mask).count("1") for mask in range(256))
+_scan = json.JSONDecoder().scan_once  # the C scanner, minus json.loads' encoding sniffing and whitespace checks
+
+
+def _json(text: str) -> dict:
+    return _scan(text, 0)[0]
+
+
+class CodecError(Exception):
+    pass
+
+
+def _zstd():
+    if zstandard is None:
+        raise CodecError("zstd-compressed ledger files need the 'zstandard' package")
+    return zstandard
+
+
+def _raw(value) -> Optional[bytes]:
+    """Raw bytes for a value that hex-decodes back to itself exactly, else None."""
+    if not isinstance(value, str) or len(value) % 2 or len(value) > 510:
+        return None
+    try: raw = bytes.fromhex(value)
+    except ValueError: return None
+    return raw if raw.hex() == value else None
+
+
+# --- RECORDS ---
+def encode(record: dict) -> bytes:
+    """One length-prefixed frame for `record`."""
+    mask, raws, rest = 0, [], dict(record)
+    for bit, name in enumerate(RAW_FIELDS):
+        raw = _raw(record.get(name))
+        if raw is not None:
+            mask |= 1 << bit
+            raws.append(raw)
+            del rest[name]
+    payload = (bytes([mask] + [len(raw) for raw in raws]) + b"".join(raws)
+               + json.dumps(rest, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    return FRAME.pack(len(payload)) + payload
+
+
+@lru_cache(maxsize=256)
+def _layout(prefix: bytes) -> Tuple[Tuple[str, ...], struct.Struct, Tuple[Tuple[int, int], ...]]:
+    """Field names, unpacker and (start, end) spans for a payload's mask-and-lengths prefix."""
+    names = tuple(name for bit, name in enumerate(RAW_FIELDS) if prefix[0] >> bit & 1)
+    lengths = prefix[1:]
+    spans, pos = [], len(prefix)
+    for n in lengths:
+        spans.append((pos, pos + n))
+        pos += n
+    return names, struct.Struct("<" + "".join(f"{n}s" for n in lengths)), tuple(spans)
+
+
+def _prefix(payload: bytes) -> bytes:
+    return payload[:1 + _POPCOUNT[payload[0]]]
+
+
+def decode(payload: bytes) -> dict:
+    """The record a frame payload (the bytes after the length prefix) encodes."""
+    prefix = _prefix(payload)
+    names, unpacker, _ = _layout(prefix)
+    start = len(prefix)
+    record = _json(payload[start + unpacker.size:].decode("utf-8"))
+    record.update(zip(names, map(bytes.hex, unpacker.unpack_from(payload, start))))
+    return record
+
+
+class LazyRecord(Mapping):
+    """A packed record that decodes each part only when it is first read."""
+    __slots__ = ("_payload", "_spans", "_rest", "_json")
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+        self._spans: Optional[Dict[str, Tuple[int, int]]] = None
+        self._rest = 0
+        self._json: Optional[dict] = None
+
+    def _raw_spans(self) -> Dict[str, Tuple[int, int]]:
+        if self._spans is None:
+            names, unpacker, spans = _layout(_prefix(self._payload))
+            self._spans, self._rest = dict(zip(names, spans)), spans[-1][1] if spans else len(names) + 1
+        return self._spans
+
+    def _fields(self) -> dict:
+        if self._json is None:
+            self._raw_spans()
+            self._json = _json(self._payload[self._rest:].decode("utf-8"))
+        return self._json
+
+    def raw(self, name: str) -> Optional[bytes]:
+        """A raw field's bytes, without the round trip through hex."""
+        span = self._raw_spans().get(name)
+        return self._payload[span[0]:span[1]] if span else None
+
+    def __getitem__(self, key: str):
+        span = self._raw_spans().get(key)
+        if span:
+            return self._payload[span[0]:span[1]].hex()
+        return self._fields()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._fields()
+        yield from self._raw_spans()
+
+    def __len__(self) -> int:
+        return len(self._fields()) + len(self._raw_spans())
+
+    def to_dict(self) -> dict:
+        return decode(self._payload)
+
+
+# --- FILES ---
+def pack(records: Iterable[dict], compress: bool = False, level: int = ZSTD_LEVEL) -> Tuple[bytes, List[Tuple[int, int]]]:
+    """A packed file's bytes and the (body offset, frame length) of every record in it."""
+    frames, entries, offset, first_seq = [], [], 0, None
+    for record in records:
+        if first_seq is None: first_seq = record.get("seq") or 0
+        frame = encode(record)
+        frames.append(frame)
+        entries.append((offset, len(frame)))
+        offset += len(frame)
+    body = b"".join(frames)
+    if compress:
+        body = _zstd().ZstdCompressor(level=level).compress(body)
+    header = HEADER.pack(MAGIC, VERSION, ZSTD if compress else 0, 0, first_seq or 0, len(entries))
+    return header + body, entries
+
+
+def write_packed(path: str, records: Iterable[dict], compress: bool = False) -> List[Tuple[int, int]]:
+    """Write `records` to a packed file atomically; returns each record's (offset, length)."""
+    data, entries = pack(records, compress)
+    write_atomic(path, data)
+    return entries
+
+
+def is_packed(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class PackedSegment:
+    """Read access to a packed file: mapped when uncompressed, decompressed once otherwise."""
+    def __init__(self, path: str):
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise CodecError(f"{path}: truncated header")
+            magic, version, flags, _, self.first_seq, self.count = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise CodecError(f"{path}: not a version {VERSION} packed ledger file")
+            self.compressed = bool(flags & ZSTD)
+            if self.compressed:
+                self._buf, self._base = _zstd().ZstdDecompressor().decompress(f.read()), 0
+            else:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._buf, self._base = self._map, HEADER.size
+        self.body_size = len(self._buf) - self._base
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._map is not None: self._map.close()
+
+    def _payload(self, offset: int) -> Tuple[bytes, int]:
+        start = self._base + offset
+        (size,) = FRAME.unpack_from(self._buf, start)
+        return self._buf[start + FRAME.size:start + FRAME.size + size], FRAME.size + size
+
+    def record(self, offset: int, lazy: bool = False):
+        payload, _ = self._payload(offset)
+        return LazyRecord(payload) if lazy else decode(payload)
+
+    def entries(self, offset: int = 0, lazy: bool = False) -> Iterator[Tuple[int, int, dict]]:
+        """(offset, frame length, record) for every record from a body offset onwards."""
+        buf, base, unpack, load = self._buf, self._base, FRAME.unpack_from, LazyRecord if lazy else decode
+        position, end = base + offset, base + self.body_size
+        while position < end:
+            (size,) = unpack(buf, position)
+            start = position + FRAME.size
+            yield position - base, FRAME.size + size, load(buf[start:start + size])
+            position = start + size
+
+    def __iter__(self) -> Iterator[dict]:
+        return (record for _, _, record in self.entries())
+
+
+# --- JSON FORMS ---
+def read_json(path: str) -> List[dict]:
+    """Records from a JSON array (the legacy `posts_log.json`) or a JSONL file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [r for r in json.loads(text) if isinstance(r, dict)]
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def read_any(path: str) -> List[dict]:
+    if is_packed(path):
+        with PackedSegment(path) as segment:
+            return list(segment)
+    return read_json(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert AuthentiPost ledger files between JSON and the packed binary form")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_pack = sub.add_parser("pack", help="JSON array or JSONL -> packed")
+    p_pack.add_argument("source")
+    p_pack.add_argument("dest")
+    p_pack.add_argument("--zstd", action="store_true", help="compress the body (needs zstandard)")
+    p_unpack = sub.add_parser("unpack", help="packed -> JSON array, or JSONL with --jsonl")
+    p_unpack.add_argument("source")
+    p_unpack.add_argument("dest")
+    p_unpack.add_argument("--jsonl", action="store_true")
+    p_stats = sub.add_parser("stats", help="record count and size of each file")
+    p_stats.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "pack":
+        entries = write_packed(args.dest, read_json(args.source), args.zstd)
+        print(f"Packed {len(entries)} records: {os.path.getsize(args.source)} -> {os.path.getsize(args.dest)} bytes")
+    elif args.cmd == "unpack":
+        records = read_any(args.source)
+        with open(args.dest, "w", encoding="utf-8") as f:
+            if args.jsonl: f.writelines(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+            else: json.dump(records, f, indent=4)
+        print(f"Unpacked {len(records)} records to {args.dest}")
+    elif args.cmd == "stats":
+        for path in args.paths:
+            print(f"{path:<40}{len(read_any(path)):>10} records{os.path.getsize(path):>14} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Fixed-width sidecar index over the ledger segments.
+
+One 40-byte entry per record, at offset `seq * ENTRY_SIZE`, so entry `seq`
+is a single seek away and the file never needs parsing as a whole:
+
+    timestamp   f64   broadcast time
+    segment     u32   segment file number, `PACKED` bit set once it is packed
+    offset      u64   byte offset of the record's line (or packed frame) in that segment
+    length      u32   line or frame length in bytes, newline included
+    tweet       8B    first 8 bytes of sha256(tweet_id)
+    key         8B    signer key id (16 hex chars) as raw bytes
+
+Writers append entries under the ledger lock only after the records they
+describe are durable, so the index may lag the segments after a crash but
+never runs ahead of them; `Ledger` catches it up on open. Timestamps follow
+append order, which lets time-range queries bisect the file.
+"""
+import os
+import mmap
+import struct
+import hashlib
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from filelock import O_BINARY
+
+INDEX_FILE = "index-v1.bin"
+ENTRY = struct.Struct("<dIQI8s8s")
+ENTRY_SIZE = ENTRY.size
+TWEET_FIELD_OFFSET = 24  # byte position of `tweet` within an entry
+KEY_FIELD_OFFSET = 32
+NO_KEY = b"\x00" * 8
+PACKED = 1 << 31  # segment flag: the record lives in the binary `ledger_codec` file
+
+
+class IndexEntry(NamedTuple):
+    seq: int
+    timestamp: float
+    segment: int
+    offset: int
+    length: int
+    tweet: bytes
+    key: bytes
+
+
+def tweet_hash(tweet_id) -> bytes:
+    return hashlib.sha256(str(tweet_id).encode("utf-8")).digest()[:8]
+
+
+def key_bytes(record: dict) -> bytes:
+    """Raw signer key id for a record, whether it names its key or embeds it (legacy entries)."""
+    kid = record.get("key_id")
+    if not kid and record.get("public_key"):
+        from signing import key_id
+        kid = key_id(record["public_key"])
+    try: return bytes.fromhex(kid)[:8].ljust(8, b"\x00") if kid else NO_KEY
+    except ValueError: return NO_KEY
+
+
+def pack(record: dict, segment: int, offset: int, length: int) -> bytes:
+    return ENTRY.pack(float(record.get("timestamp") or 0), segment, offset, length,
+                      tweet_hash(record.get("tweet_id")), key_bytes(record))
+
+
+class LedgerIndex:
+    def __init__(self, root: str):
+        self.path = os.path.join(root, INDEX_FILE)
+
+    def __len__(self) -> int:
+        try: return os.path.getsize(self.path) // ENTRY_SIZE
+        except FileNotFoundError: return 0
+
+    def truncate(self, count: int):
+        """Drop entries from `count` on, including a torn partial entry (caller holds the ledger lock)."""
+        if os.path.exists(self.path) and os.path.getsize(self.path) != count * ENTRY_SIZE:
+            with open(self.path, "r+b") as f:
+                f.truncate(count * ENTRY_SIZE)
+
+    def append(self, packed: Iterable[bytes]):
+        data = b"".join(packed)
+        if not data:
+            return
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | O_BINARY, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def rewrite(self, start: int, packed: Iterable[bytes]):
+        """Overwrite entries in place from seq `start`, e.g. once their segment is repacked (caller holds the ledger lock)."""
+        data = b"".join(packed)
+        if not data:
+            return
+        with open(self.path, "r+b") as f:
+            f.seek(start * ENTRY_SIZE)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, start: int, stop: int) -> List[IndexEntry]:
+        """Entries for seq in [start, stop), clamped to what the index holds."""
+        start, stop = max(0, start), min(stop, len(self))
+        if start >= stop:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(start * ENTRY_SIZE)
+            data = f.read((stop - start) * ENTRY_SIZE)
+        return [IndexEntry(start + i, *fields) for i, fields in enumerate(ENTRY.iter_unpack(data))]
+
+    def get(self, seq: int) -> Optional[IndexEntry]:
+        entries = self.read(seq, seq + 1)
+        return entries[0] if entries else None
+
+    def bisect_time(self, timestamp: float) -> int:
+        """First seq whose timestamp is >= `timestamp`; O(log n) single-entry reads."""
+        lo, hi = 0, len(self)
+        if not hi:
+            return 0
+        with open(self.path, "rb") as f:
+            while lo < hi:
+                mid = (lo + hi) // 2
+                f.seek(mid * ENTRY_SIZE)
+                if ENTRY.unpack(f.read(ENTRY_SIZE))[0] < timestamp: lo = mid + 1
+                else: hi = mid
+        return lo
+
+    def scan(self, value: bytes, field_offset: int, newest_first: bool = True) -> Iterator[int]:
+        """Seqs whose 8-byte field at `field_offset` equals `value`, via a C-speed search of the mapped file."""
+        count = len(self)
+        if not count:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), count * ENTRY_SIZE, access=mmap.ACCESS_READ) as mm:
+            find = mm.rfind if newest_first else mm.find
+            lo, hi = 0, count * ENTRY_SIZE
+            while lo < hi:
+                pos = find(value, lo, hi)
+                if pos == -1:
+                    return
+                if pos % ENTRY_SIZE == field_offset:
+                    yield pos // ENTRY_SIZE
+                if newest_first: hi = pos + len(value) - 1
+                else: lo = pos + 1
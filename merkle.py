@@ -0,0 +1,80 @@
+"""Binary Merkle trees over SHA-256 with domain-separated leaves and nodes.
+
+An unpaired node at the end of a level is promoted unchanged, so there is no
+duplicated-leaf ambiguity. Proof paths are lists of `[side, hex]` pairs where
+`side` tells whether the sibling sits on the left ("L") or right ("R").
+"""
+import hashlib
+from typing import List, Sequence
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def _next_level(level: Sequence[bytes]) -> List[bytes]:
+    nxt = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        nxt.append(level[-1])
+    return nxt
+
+
+def merkle_root(leaves: Sequence[bytes]) -> bytes:
+    """Root over already leaf-hashed values."""
+    if not leaves:
+        raise ValueError("cannot build a Merkle tree with no leaves")
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+
+def merkle_path(leaves: Sequence[bytes], index: int) -> List[List[str]]:
+    if not 0 <= index < len(leaves):
+        raise IndexError(f"leaf {index} out of range for {len(leaves)} leaves")
+    path = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(["L" if sibling < index else "R", level[sibling].hex()])
+        level = _next_level(level)
+        index //= 2
+    return path
+
+
+def merkle_paths(leaves: Sequence[bytes]) -> List[List[List[str]]]:
+    """Every leaf's proof path in one O(n log n) pass; same result as `merkle_path` per leaf."""
+    if not leaves:
+        raise ValueError("cannot build a Merkle tree with no leaves")
+    paths: List[List[List[str]]] = [[] for _ in leaves]
+    positions = list(range(len(leaves)))  # each leaf's index within the current level
+    level = list(leaves)
+    while len(level) > 1:
+        for leaf, index in enumerate(positions):
+            sibling = index ^ 1
+            if sibling < len(level):
+                paths[leaf].append(["L" if sibling < index else "R", level[sibling].hex()])
+            positions[leaf] = index // 2
+        level = _next_level(level)
+    return paths
+
+
+def root_from_path(leaf: bytes, path: Sequence[Sequence[str]]) -> bytes:
+    node = leaf
+    for side, sibling_hex in path:
+        sibling = bytes.fromhex(sibling_hex)
+        node = node_hash(sibling, node) if side == "L" else node_hash(node, sibling)
+    return node
+
+
+def verify_path(leaf: bytes, path: Sequence[Sequence[str]], root: bytes) -> bool:
+    try: return root_from_path(leaf, path) == root
+    except (ValueError, TypeError): return False
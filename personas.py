@@ -0,0 +1,214 @@
+"""Versioned brand personas, so one deployment can run many brands.
+
+`personas.json` maps each brand id to its persona history. A save appends a
+new version (description and sample posts) to that brand, keeps the last
+`HISTORY` versions, and bumps the store-wide `version`:
+
+    {"version": 4, "brands": {"default": {"name": "Default", "versions": [
+        {"version": 1, "description": "...", "sample_posts": [], "updated": 1771226162}, ...]}}}
+
+The file is parsed once per process and kept in memory, so `get()` on the
+hot path (swarm runs, batch topics) never reads it. Changes from another
+process are picked up on the first call after `RECHECK_SECONDS`, when one
+`stat` shows a new mtime or size; saves from this process apply at once.
+Saves hold a file lock and re-read the file first, so concurrent saves from
+separate processes do not drop each other's versions.
+
+A legacy single-brand `brand_profile.json` is served as brand "default"
+until the first save writes `personas.json`; the old file is left as is.
+
+    python personas.py list
+    python personas.py show default --version 2
+    python personas.py set acme "A fintech brand that explains money plainly" --name Acme
+"""
+import os
+import copy
+import json
+import time
+import logging
+import argparse
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from filelock import locked, write_atomic
+
+PERSONAS_FILE = os.getenv("PERSONAS_FILE", "personas.json")
+BRAND_FILE = "brand_profile.json"
+DEFAULT_BRAND = "default"
+DEFAULT_DESCRIPTION = "A cybersecurity researcher who likes to share tips in a witty way."
+HISTORY = 20  # versions kept per brand
+RECHECK_SECONDS = float(os.getenv("PERSONA_RECHECK_SECONDS", "2"))
+
+log = logging.getLogger(__name__)
+
+
+class PersonaError(Exception):
+    pass
+
+
+class Persona(NamedTuple):
+    brand_id: str
+    name: str
+    version: int
+    description: str
+    sample_posts: Tuple[str, ...]
+    updated: int
+
+
+def _stamp(path: str) -> Optional[Tuple[int, int]]:
+    try: st = os.stat(path)
+    except FileNotFoundError: return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _persona(brand_id: str, brand: dict, entry: dict) -> Persona:
+    return Persona(brand_id, brand.get("name") or brand_id, entry["version"], entry["description"],
+                   tuple(entry.get("sample_posts") or ()), entry.get("updated", 0))
+
+
+class PersonaStore:
+    def __init__(self, path: str = PERSONAS_FILE, legacy: str = BRAND_FILE):
+        self.path = path
+        self.legacy = legacy
+        self._lock = threading.Lock()
+        self._data: Optional[dict] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._latest: Dict[str, Persona] = {}
+
+    # --- LOADING ---
+    def _current_stamp(self) -> Optional[Tuple[int, int]]:
+        return _stamp(self.path) or _stamp(self.legacy)
+
+    def _read(self) -> dict:
+        """The store as on disk, or the legacy profile as brand "default" if there is no store yet.
+
+        A corrupt store keeps the last good snapshot in service (or the legacy
+        profile, if this process never loaded one) rather than failing every read.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f: return json.load(f)
+        except FileNotFoundError: pass
+        except ValueError as e:
+            log.warning("%s is not valid JSON (%s); serving the %s", self.path, e,
+                        "last good snapshot" if self._data is not None else "legacy profile")
+            if self._data is not None:
+                return copy.deepcopy(self._data)  # save() edits what it reads
+        legacy, updated = {}, 0
+        try:
+            with open(self.legacy, "r", encoding="utf-8") as f: legacy = json.load(f)
+            updated = int(os.path.getmtime(self.legacy))
+        except (FileNotFoundError, ValueError): pass
+        entry = {"version": 1, "description": legacy.get("description") or DEFAULT_DESCRIPTION,
+                 "sample_posts": legacy.get("sample_posts") or [], "updated": updated}
+        return {"version": 1, "brands": {DEFAULT_BRAND: {"name": "Default", "versions": [entry]}}}
+
+    def _install(self, data: dict, stamp: Optional[Tuple[int, int]]):
+        self._latest = {bid: _persona(bid, brand, brand["versions"][-1]) for bid, brand in data["brands"].items() if brand["versions"]}
+        self._data, self._stamp, self._checked = data, stamp, time.monotonic()
+
+    def _snapshot(self) -> dict:
+        with self._lock:
+            if self._data is None or time.monotonic() - self._checked >= RECHECK_SECONDS:
+                stamp = self._current_stamp()
+                if self._data is None or stamp != self._stamp:
+                    self._install(self._read(), stamp)
+                self._checked = time.monotonic()
+            return self._data
+
+    def reload(self):
+        with self._lock:
+            self._data = None
+
+    # --- READS ---
+    @property
+    def version(self) -> int:
+        """Bumped by every save; a cheap staleness check for anything derived from personas."""
+        return self._snapshot()["version"]
+
+    def brand_ids(self) -> List[str]:
+        self._snapshot()
+        return sorted(self._latest)
+
+    def get(self, brand_id: str = DEFAULT_BRAND, version: Optional[int] = None) -> Persona:
+        """The latest (or a given) version of a brand's persona, from memory."""
+        data = self._snapshot()
+        if version is None and brand_id in self._latest:
+            return self._latest[brand_id]
+        brand = data["brands"].get(brand_id)
+        entry = next((v for v in brand["versions"] if v["version"] == version), None) if brand else None
+        if entry is None:
+            raise PersonaError(f"unknown brand {brand_id!r}" + (f" version {version}" if version and brand else ""))
+        return _persona(brand_id, brand, entry)
+
+    def history(self, brand_id: str) -> List[Persona]:
+        brand = self._snapshot()["brands"].get(brand_id)
+        if brand is None:
+            raise PersonaError(f"unknown brand {brand_id!r}")
+        return [_persona(brand_id, brand, entry) for entry in brand["versions"]]
+
+    # --- WRITES ---
+    def save(self, brand_id: str, description: str, sample_posts: Optional[Sequence[str]] = None,
+             name: Optional[str] = None) -> Persona:
+        """Add a version of `brand_id`'s persona; sample posts carry over unless given."""
+        brand_id = brand_id.strip()
+        if not brand_id:
+            raise PersonaError("brand id must not be empty")
+        with locked(self.path + ".lock"):
+            data = self._read()
+            brand = data["brands"].setdefault(brand_id, {"name": name or brand_id, "versions": []})
+            last = brand["versions"][-1] if brand["versions"] else {}
+            brand["versions"].append({
+                "version": last.get("version", 0) + 1,
+                "description": description.strip(),
+                "sample_posts": list(last.get("sample_posts", []) if sample_posts is None else sample_posts),
+                "updated": int(time.time()),
+            })
+            del brand["versions"][:-HISTORY]
+            if name: brand["name"] = name
+            data["version"] += 1
+            write_atomic(self.path, json.dumps(data, indent=4, ensure_ascii=False).encode("utf-8"))
+            with self._lock:
+                self._install(data, _stamp(self.path))
+        return self._latest[brand_id]
+
+
+@lru_cache(maxsize=None)
+def get_store(path: str = PERSONAS_FILE, legacy: str = BRAND_FILE) -> PersonaStore:
+    return PersonaStore(path, legacy)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage AuthentiPost brand personas")
+    parser.add_argument("--store", default=PERSONAS_FILE, help="persona store JSON")
+    parser.add_argument("--legacy", default=BRAND_FILE, help="single-brand profile served as 'default' until the first save")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="brands with their latest version")
+    p_show = sub.add_parser("show", help="print a brand's persona")
+    p_show.add_argument("brand_id")
+    p_show.add_argument("--version", type=int, default=None)
+    p_set = sub.add_parser("set", help="save a new persona version")
+    p_set.add_argument("brand_id")
+    p_set.add_argument("description")
+    p_set.add_argument("--name", default=None)
+    p_set.add_argument("--sample-post", action="append", dest="sample_posts", help="replaces the sample posts (repeatable)")
+    args = parser.parse_args(argv)
+
+    store = PersonaStore(args.store, args.legacy)
+    try:
+        if args.cmd == "list":
+            for brand_id in store.brand_ids():
+                persona = store.get(brand_id)
+                print(f"{brand_id:<20}v{persona.version:<5}{persona.name:<24}{persona.description[:60]}")
+        elif args.cmd == "show":
+            print(json.dumps(store.get(args.brand_id, args.version)._asdict(), indent=4, ensure_ascii=False))
+        elif args.cmd == "set":
+            persona = store.save(args.brand_id, args.description, args.sample_posts, args.name)
+            print(f"Saved {persona.brand_id} v{persona.version} (store version {store.version})")
+    except PersonaError as e:
+        raise SystemExit(str(e))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Local pre-screen for drafts, so the LLM Critic only sees the close calls.
+
+Each draft is scored on cheap signals, computed with numpy for all of a
+run's drafts at once:
+
+* length against X's 280-character limit;
+* hashtag and emoji density;
+* banned phrases (`BANNED_PHRASES` plus `PRESCREEN_BANNED`);
+* overlap with the persona's keywords;
+* near-duplication of recent ledger posts: word-set Jaccard similarity, as
+  in `search`, for every draft/post pair in one matrix product over hashed
+  word vectors.
+
+A hard fault (over the limit, a banned phrase, a near-duplicate, hashtag or
+emoji spam) fails a draft outright. Otherwise the weighted score passes it
+at `PRESCREEN_PASS` or above, fails it below `PRESCREEN_FAIL`, and leaves
+anything in between for the Critic. Settled drafts get a short local note
+instead of a model call.
+
+    PRESCREEN=off            every draft goes to the Critic
+    PRESCREEN_PASS=0.75      score at or above which a draft passes
+    PRESCREEN_FAIL=0.45      score below which a draft fails
+    PRESCREEN_BANNED="a;b"   extra banned phrases
+
+    python prescreen.py "First draft" "Second draft" --brand acme --ledger ledger
+"""
+import os
+import re
+import zlib
+import argparse
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+import tracing
+from search import DUPLICATE_THRESHOLD, shingles
+
+PASS_AT = float(os.getenv("PRESCREEN_PASS", "0.75"))
+FAIL_AT = float(os.getenv("PRESCREEN_FAIL", "0.45"))
+MAX_CHARS = 280
+MIN_CHARS = 40
+IDEAL_CHARS = (80, 260)
+MAX_HASHTAGS, SPAM_HASHTAGS = 2, 5  # more than MAX lowers the score; SPAM fails outright
+MAX_EMOJI, SPAM_EMOJI = 3, 6
+NOVEL_BELOW = 0.3  # Jaccard similarity to the nearest recent post that costs nothing
+VOICE_FULL = 0.2  # share of persona keywords a draft needs for full voice credit
+RECENT_POSTS = 200  # latest ledger posts checked for near-duplicates
+DIMENSIONS = 1 << 12  # hashed word-vector width; collisions only nudge similarities up
+WEIGHTS = {"length": 0.25, "hashtags": 0.2, "emoji": 0.15, "voice": 0.1, "novelty": 0.3}
+BANNED_PHRASES = ("guaranteed", "click here", "act now", "limited time", "100% secure", "unhackable", "dm me")
+PASS, FAIL, REVIEW = "pass", "fail", "review"
+
+_HASHTAG = re.compile(r"(?<!\w)#\w+")
+_EMOJI = re.compile("[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]")
+_STOPWORDS = frozenset("the and for with that this your you who likes like way about from into are was were has have how "
+                       "what when where their them they our its not but can will just more most very".split())
+
+
+class Verdict(NamedTuple):
+    decision: str  # PASS, FAIL or REVIEW (left for the Critic)
+    score: float
+    reasons: Tuple[str, ...]
+
+    def feedback(self) -> str:
+        return f"Prescreen {self.decision} ({self.score:.2f}): " + ("; ".join(self.reasons) or "clear on every local check")
+
+
+def enabled() -> bool:
+    return os.getenv("PRESCREEN", "on").lower() not in ("0", "off", "false", "no")
+
+
+def banned_phrases() -> Tuple[str, ...]:
+    return BANNED_PHRASES + tuple(p.strip().lower() for p in os.getenv("PRESCREEN_BANNED", "").split(";") if p.strip())
+
+
+@lru_cache(maxsize=8)
+def _banned_pattern(phrases: Tuple[str, ...]) -> re.Pattern:
+    return re.compile(r"(?<!\w)(" + "|".join(map(re.escape, phrases)) + r")(?!\w)", re.I)
+
+
+# --- VECTORS ---
+@lru_cache(maxsize=65536)
+def _slot(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8")) & (DIMENSIONS - 1)
+
+
+def vectors(word_sets: Sequence[FrozenSet[str]]) -> np.ndarray:
+    """One binary hashed word vector per word set."""
+    matrix = np.zeros((len(word_sets), DIMENSIONS), dtype=np.float32)
+    rows = [i for i, words in enumerate(word_sets) for _ in words]
+    matrix[rows, [_slot(w) for words in word_sets for w in words]] = 1
+    return matrix
+
+
+@lru_cache(maxsize=4)
+def _recent_vectors(posts: Tuple[str, ...]) -> np.ndarray:
+    return vectors([shingles(p) for p in posts])  # the same snapshot is screened against for a whole run
+
+
+@lru_cache(maxsize=64)
+def _persona_vector(persona: str) -> np.ndarray:
+    return vectors([shingles(persona) - _STOPWORDS])[0]
+
+
+def nearest_similarity(drafts: np.ndarray, recent: np.ndarray) -> np.ndarray:
+    """Each draft's highest Jaccard similarity to any recent post (0 with none)."""
+    if not len(recent) or not len(drafts):
+        return np.zeros(len(drafts), dtype=np.float32)
+    shared = drafts @ recent.T
+    union = drafts.sum(axis=1)[:, None] + recent.sum(axis=1)[None, :] - shared
+    return np.divide(shared, union, out=np.zeros_like(shared), where=union > 0).max(axis=1)
+
+
+def _ramp(value: np.ndarray, zero_at: float, one_at: float) -> np.ndarray:
+    return np.clip((value - zero_at) / (one_at - zero_at), 0.0, 1.0)
+
+
+class Prescreener:
+    """Scores drafts for one persona against a snapshot of recent posts."""
+    def __init__(self, persona: str = "", recent: Sequence[str] = (), banned: Optional[Sequence[str]] = None):
+        self.persona = _persona_vector(persona or "")
+        self.recent = _recent_vectors(tuple(recent))
+        self.banned = _banned_pattern(tuple(banned) if banned is not None else banned_phrases())
+
+    def features(self, posts: Sequence[str]) -> Dict[str, np.ndarray]:
+        posts = [p.strip() for p in posts]
+        words = vectors([shingles(p) for p in posts])
+        keywords = self.persona.sum()
+        return {
+            "chars": np.fromiter(map(len, posts), dtype=np.int32, count=len(posts)),
+            "hashtags": np.fromiter((len(_HASHTAG.findall(p)) for p in posts), dtype=np.int32, count=len(posts)),
+            "emoji": np.fromiter((len(_EMOJI.findall(p)) for p in posts), dtype=np.int32, count=len(posts)),
+            "banned": np.array([m.group(0).lower() if (m := self.banned.search(p)) else "" for p in posts], dtype=object),
+            "voice": words @ self.persona / keywords if keywords else np.ones(len(posts), dtype=np.float32),
+            "nearest": nearest_similarity(words, self.recent),
+        }
+
+    def scores(self, f: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """The weighted score and each component, all in [0, 1]."""
+        parts = {
+            "length": np.minimum(_ramp(f["chars"], MIN_CHARS, IDEAL_CHARS[0]), _ramp(f["chars"], MAX_CHARS, IDEAL_CHARS[1])),
+            "hashtags": _ramp(f["hashtags"], SPAM_HASHTAGS, MAX_HASHTAGS),
+            "emoji": _ramp(f["emoji"], SPAM_EMOJI, MAX_EMOJI),
+            "voice": _ramp(f["voice"], 0.0, VOICE_FULL),
+            "novelty": _ramp(f["nearest"], DUPLICATE_THRESHOLD, NOVEL_BELOW),
+        }
+        return sum(WEIGHTS[name] * part for name, part in parts.items()), parts
+
+    def screen(self, posts: Sequence[str]) -> List[Verdict]:
+        """A verdict per draft; with the pre-screen off, every draft is left for the Critic."""
+        if not enabled():
+            return [Verdict(REVIEW, 0.0, ()) for _ in posts]
+        with tracing.span("prescreen", drafts=len(posts)):
+            f = self.features(posts)
+            score, parts = self.scores(f)
+            fault = ((f["chars"] > MAX_CHARS) | (f["chars"] < MIN_CHARS) | (f["banned"] != "") | (f["nearest"] >= DUPLICATE_THRESHOLD)
+                     | (f["hashtags"] >= SPAM_HASHTAGS) | (f["emoji"] >= SPAM_EMOJI))
+            decision = np.where(fault | (score < FAIL_AT), FAIL, np.where(score >= PASS_AT, PASS, REVIEW))
+        verdicts = [Verdict(str(decision[i]), round(float(score[i]), 3), _reasons(f, parts, i, decision[i] == PASS)) for i in range(len(posts))]
+        for verdict in verdicts:
+            tracing.count("prescreen.verdict", decision=verdict.decision)
+        return verdicts
+
+
+def _reasons(f: Dict[str, np.ndarray], parts: Dict[str, np.ndarray], i: int, passed: bool) -> Tuple[str, ...]:
+    reasons = []
+    chars = int(f["chars"][i])
+    if chars > MAX_CHARS: reasons.append(f"{chars} characters, over the {MAX_CHARS} limit")
+    elif parts["length"][i] < 1: reasons.append(f"{chars} characters, {'short' if chars < IDEAL_CHARS[0] else 'near the limit'}")
+    if f["banned"][i]: reasons.append(f"banned phrase {f['banned'][i]!r}")
+    if f["nearest"][i] >= DUPLICATE_THRESHOLD: reasons.append(f"{f['nearest'][i]:.0%} like a recent post")
+    elif parts["novelty"][i] < 1: reasons.append(f"close to a recent post ({f['nearest'][i]:.0%})")
+    if parts["hashtags"][i] < 1: reasons.append(f"{f['hashtags'][i]} hashtags")
+    if parts["emoji"][i] < 1: reasons.append(f"{f['emoji'][i]} emoji")
+    if parts["voice"][i] < 0.5 and not passed: reasons.append("few persona keywords")  # a weak signal on its own
+    return tuple(reasons)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-screen drafts locally, as the swarm does before the Critic")
+    parser.add_argument("posts", nargs="+", help="draft texts")
+    parser.add_argument("--brand", default=None, help="brand id in the persona store (default brand if omitted)")
+    parser.add_argument("--ledger", default=None, help="ledger directory whose recent posts drafts must not repeat")
+    args = parser.parse_args(argv)
+
+    import personas
+    persona = personas.get_store().get(args.brand or personas.DEFAULT_BRAND)
+    recent = []
+    if args.ledger:
+        from ledger import Ledger
+        recent = [r.get("content", "") for r in Ledger(args.ledger).tail(RECENT_POSTS)]
+    for n, verdict in enumerate(Prescreener(persona.description, recent).screen(args.posts), 1):
+        print(f"Draft {n}: {verdict.feedback()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Prompt assembly under token budgets.
+
+Every swarm prompt is `persona_prefix(brand_desc)` followed by the task, so
+the first part of each request is byte-identical across Architect, Creative
+and Critic calls and across runs: that is what model-side (implicit) context
+caching keys on, and it keeps the response cache's prompts stable too.
+
+Trend text from Tavily is cleaned (URLs, markdown, boilerplate and
+whitespace runs removed), split into sentences, deduplicated across results
+and packed round-robin into `TREND_TOKENS`, so every source gets a say before
+any one of them fills the budget. Posts shown to the Critic are capped at
+`POST_TOKENS` each.
+
+Architect and Creative replies are JSON (see `structured`); the prompts name
+the fields, and `reask` turns a prompt whose reply failed validation into a
+follow-up that says what was wrong.
+
+Token counts are estimated locally (about four characters per token for
+English; no network round trip) and reported per prompt kind through
+`tracing` counters `prompt.tokens` and `prompt.calls`.
+
+    PROMPT_PERSONA_TOKENS=200   persona budget
+    PROMPT_TREND_TOKENS=300     all trends together
+    PROMPT_POST_TOKENS=120      each post sent for review
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, List, Sequence
+
+import tracing
+from search import jaccard, shingles
+
+PERSONA_TOKENS = int(os.getenv("PROMPT_PERSONA_TOKENS", "200"))
+TREND_TOKENS = int(os.getenv("PROMPT_TREND_TOKENS", "300"))
+POST_TOKENS = int(os.getenv("PROMPT_POST_TOKENS", "120"))
+CHARS_PER_TOKEN = 4
+DUPLICATE_SENTENCE = 0.7  # word-set Jaccard above which two trend sentences say the same thing
+
+_URL = re.compile(r"https?://\S+|www\.\S+")
+_MARKDOWN = re.compile(r"!?\[([^\]]*)\]\([^)]*\)|[#*_`>|]+")
+_BOILERPLATE = re.compile(r"(?i)\b(subscribe|sign up|cookie|all rights reserved|read more|click here|advertisement)\b")
+_SPACE = re.compile(r"\s+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate(text: str, tokens: int) -> str:
+    """Cut `text` to about `tokens`, at a sentence or word boundary where one is near."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if boundary > limit // 2:
+        return cut[:boundary + 1]
+    return cut.rsplit(" ", 1)[0] + "…"
+
+
+def clean(text: str) -> str:
+    text = _URL.sub("", text or "")
+    text = _MARKDOWN.sub(lambda m: m.group(1) or " ", text)
+    return _SPACE.sub(" ", text).strip()
+
+
+def sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE.split(clean(text)) if len(s.strip()) > 20 and not _BOILERPLATE.search(s)]
+
+
+def compact_trends(trends: Iterable[str], budget: int = TREND_TOKENS) -> List[str]:
+    """Cleaned, deduplicated trend summaries that together fit `budget` tokens."""
+    sources = [sentences(t) for t in trends]
+    picked: List[List[str]] = [[] for _ in sources]
+    seen, used = [], 0
+    for rank in range(max(map(len, sources), default=0)):  # round-robin: each source's best sentence first
+        for i, source in enumerate(sources):
+            if rank >= len(source):
+                continue
+            sentence, words = source[rank], shingles(source[rank])
+            if any(jaccard(words, other) >= DUPLICATE_SENTENCE for other in seen):
+                continue
+            cost = estimate_tokens(sentence) + 1
+            if used + cost > budget:
+                return [" ".join(p) for p in picked if p]
+            seen.append(words)
+            picked[i].append(sentence)
+            used += cost
+    return [" ".join(p) for p in picked if p]
+
+
+@lru_cache(maxsize=64)
+def persona_prefix(brand_desc: str) -> str:
+    """The stable head of every prompt; depends only on the persona, so it is built once per persona version."""
+    return f"You write for this brand persona on X (Twitter).\nBrand persona: {truncate(clean(brand_desc), PERSONA_TOKENS)}\n\n"
+
+
+def _numbered(items: Sequence[str]) -> str:
+    return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+
+
+def build(kind: str, brand_desc: str, task: str) -> str:
+    prompt = persona_prefix(brand_desc) + task
+    tracing.count("prompt.tokens", estimate_tokens(prompt), kind=kind)
+    tracing.count("prompt.calls", kind=kind)
+    return prompt
+
+
+# --- SWARM PROMPTS ---
+def architect(brand_desc: str, trends: Sequence[str]) -> str:
+    return build("architect", brand_desc,
+                 f"Trends:\n{_numbered(compact_trends(trends)) or 'None found.'}\n\n"
+                 "Pick the best trend. Reply in JSON with \"trend\" (the trend in one sentence) and \"reason\" (why it suits the persona).")
+
+
+def architect_reason(brand_desc: str, trend: str) -> str:
+    return build("architect", brand_desc,
+                 f"Chosen trend: {truncate(clean(trend), POST_TOKENS)}\n\n"
+                 "Say why this trend suits the persona. Reply in JSON with \"reason\".")
+
+
+def creative(brand_desc: str, trend: str, reason: str, count: int = 3, written: Sequence[str] = ()) -> str:
+    already = f"Already written, do not repeat:\n{_numbered([truncate(p.strip(), POST_TOKENS) for p in written])}\n" if written else ""
+    return build("creative", brand_desc,
+                 f"Topic: {truncate(clean(trend), POST_TOKENS)}\nReason: {truncate(clean(reason), POST_TOKENS)}\n{already}"
+                 f"Write {count} X post{'s' if count != 1 else ''}. Reply in JSON with \"posts\", a list of the post texts only: "
+                 "no numbering, titles or introduction.")
+
+
+def single_draft(brand_desc: str, trend: str, reason: str, angle: str) -> str:
+    return build("draft", brand_desc,
+                 f"Topic: {truncate(clean(trend), POST_TOKENS)}\nReason: {truncate(clean(reason), POST_TOKENS)}\n"
+                 f"Write exactly one X post built around {angle}. Reply in JSON with \"post\", the post text only.")
+
+
+def reask(prompt: str, problem: str, attempt: int = 1) -> str:
+    """`prompt` again, saying why the last reply was unusable; each attempt differs, so none replays a cached bad reply."""
+    tracing.count("prompt.calls", kind="reask")
+    return f"{prompt}\n\nRetry {attempt}: the previous reply could not be used ({problem}). Reply again in the JSON format asked for."
+
+
+def critic(brand_desc: str, posts: Sequence[str]) -> str:
+    return build("critic", brand_desc,
+                 f"Posts:\n{_numbered([truncate(p.strip(), POST_TOKENS) for p in posts])}\n\n"
+                 "Review these posts for brand consistency. Give short feedback.")
@@ -0,0 +1,245 @@
+"""Shared rate limiting and retry scheduling for outbound API calls.
+
+Every call to a rate-limited service goes through `call(service, fn)`:
+
+* a token bucket caps the request rate and a semaphore caps how many
+  requests are in flight at once;
+* the rate adapts (AIMD): it is halved on every throttling response and
+  creeps back up on success, so several processes sharing one API key
+  settle near the quota instead of hammering it;
+* a server retry hint (Gemini's `retry_delay { seconds: N }`, "retry in Ns",
+  `Retry-After`, X's `x-rate-limit-reset`) pauses the whole bucket, not
+  just the caller that got it;
+* other retries use exponential backoff with full jitter, so callers that
+  failed together do not retry together.
+
+Streaming responses go through `stream(service, fn)`, which holds the
+request's concurrency slot until the stream is consumed or closed.
+
+Limits are configured per service from the environment:
+
+    RATE_LIMIT_GEMINI_RPM=60          steady-state requests per minute
+    RATE_LIMIT_GEMINI_BURST=8         bucket size
+    RATE_LIMIT_GEMINI_CONCURRENCY=4   requests in flight
+    RATE_LIMIT_GEMINI_ATTEMPTS=5      tries per call before giving up
+"""
+import os
+import re
+import time
+import random
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, Optional
+
+import tracing
+
+DEFAULT_LIMITS = {
+    "gemini": {"rpm": 60, "burst": 8, "concurrency": 4, "attempts": 5},
+    "tavily": {"rpm": 100, "burst": 6, "concurrency": 3, "attempts": 4},
+    "x": {"rpm": 6, "burst": 5, "concurrency": 4, "attempts": 4},  # POST /2/tweets: 100 per 15 min per user
+}
+FALLBACK_LIMITS = {"rpm": 60, "burst": 4, "concurrency": 2, "attempts": 3}
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+MIN_RATE_FRACTION = 0.05  # never adapt below 5% of the configured rate
+
+THROTTLE_STATUS = {429}
+TRANSIENT_STATUS = {500, 502, 503, 504}
+THROTTLE_ERRORS = {"ResourceExhausted", "TooManyRequests", "UsageLimitExceededError", "TavilyKeylessLimitError"}
+TRANSIENT_ERRORS = {"ServiceUnavailable", "InternalServerError", "DeadlineExceeded", "GatewayTimeout", "BadGateway",
+                    "TimeoutError", "Timeout", "ReadTimeout", "ConnectTimeout", "ConnectionError"}
+
+_HINT_PATTERNS = (
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)"),
+    re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry-after:?\s*([\d.]+)", re.IGNORECASE),
+)
+# A status code only counts where a message puts one: leading ("503 Service Unavailable"),
+# labelled ("status 429", "HTTP/1.1 503", "status_code=502") or before its reason phrase
+_STATUS_PATTERN = re.compile(
+    r"^\s*(429|50[0234])\b"
+    r"|\b(?:status(?:[ _]?code)?|http(?:/[\d.]+)?|error code)\s*[:=]?\s*(429|50[0234])\b"
+    r"|\b(429|50[0234])\s+(?:too many requests|internal server error|server error|bad gateway|service unavailable|gateway time-?out)",
+    re.IGNORECASE)
+
+
+# --- ERROR CLASSIFICATION ---
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK exception, wherever that SDK keeps it."""
+    for candidate in (getattr(error, "code", None), getattr(error, "status_code", None),
+                      getattr(getattr(error, "response", None), "status_code", None)):
+        try: return int(candidate)
+        except (TypeError, ValueError): continue
+    match = _STATUS_PATTERN.search(str(error))
+    return int(next(code for code in match.groups() if code)) if match else None
+
+
+def is_throttle(error: BaseException) -> bool:
+    return type(error).__name__ in THROTTLE_ERRORS or status_of(error) in THROTTLE_STATUS
+
+
+def is_retryable(error: BaseException) -> bool:
+    return is_throttle(error) or type(error).__name__ in TRANSIENT_ERRORS or status_of(error) in TRANSIENT_STATUS
+
+
+def retry_hint(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, if it said."""
+    for attr in ("retry_after", "retry_after_seconds"):
+        value = getattr(error, attr, None)
+        if value is not None:
+            try: return float(value)
+            except (TypeError, ValueError): pass
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try: return float(headers.get("Retry-After"))
+    except (TypeError, ValueError): pass
+    try: return max(0.0, float(headers.get("x-rate-limit-reset")) - time.time())  # epoch seconds
+    except (TypeError, ValueError): pass
+    text = str(error)
+    for pattern in _HINT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def backoff_delay(attempt: int, hint: Optional[float] = None, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Full-jitter exponential backoff; a server hint sets the floor."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, hint + random.uniform(0, base)) if hint is not None else delay
+
+
+# --- LIMITER ---
+class AdaptiveLimiter:
+    def __init__(self, name: str, rpm: float, burst: int, concurrency: int, attempts: int):
+        self.name = name
+        self.max_rate = rpm / 60.0
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.rate = self.max_rate
+        self.burst = max(1, burst)
+        self.attempts = max(1, attempts)
+        self.concurrency = max(1, concurrency)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self.throttled = 0
+        self.retries = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire_token(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                self._cond.wait(wait)
+
+    @contextmanager
+    def slot(self):
+        """Hold one unit of concurrency and spend one token for a single request."""
+        with self._slots:
+            self.acquire_token()
+            yield
+
+    def on_success(self):
+        with self._cond:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_retry(self, throttled: bool, hint: Optional[float] = None):
+        with self._cond:
+            self.retries += 1
+            if not throttled:
+                return
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if hint:
+                self._paused_until = max(self._paused_until, time.monotonic() + hint)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"rpm": round(self.rate * 60, 1), "max_rpm": round(self.max_rate * 60, 1),
+                    "throttled": self.throttled, "retries": self.retries}
+
+
+def _env_limits(service: str) -> dict:
+    limits = dict(DEFAULT_LIMITS.get(service, FALLBACK_LIMITS))
+    for field in limits:
+        value = os.getenv(f"RATE_LIMIT_{service.upper()}_{field.upper()}")
+        if value:
+            limits[field] = float(value) if field == "rpm" else int(value)
+    return limits
+
+
+_init_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _configured_limiter(service: str) -> AdaptiveLimiter:
+    return AdaptiveLimiter(service, **_env_limits(service))
+
+
+def get_limiter(service: str) -> AdaptiveLimiter:
+    """Process-wide limiter for `service`, shared by every session and worker thread."""
+    with _init_lock:
+        return _configured_limiter(service)
+
+
+def call(service: str, fn: Callable, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` under `service`'s limiter, retrying throttled and transient failures."""
+    limiter = get_limiter(service)
+    for attempt in range(limiter.attempts):
+        with limiter.slot():
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == limiter.attempts - 1:
+                    raise
+                hint = retry_hint(e)
+                limiter.on_retry(is_throttle(e), hint)
+                tracing.count("ratelimit.retry", service=service, throttled=is_throttle(e))
+            else:
+                limiter.on_success()
+                return result
+        with tracing.span(f"{service}.backoff"):
+            time.sleep(backoff_delay(attempt, hint))  # outside the slot so others can proceed
+
+
+def stream(service: str, fn: Callable[..., Iterable], *args, **kwargs) -> Iterator:
+    """Yield the items of the streamed response `fn(*args, **kwargs)` under `service`'s limiter.
+
+    The concurrency slot is held until the stream is exhausted or the
+    generator is closed, since the request stays in flight until then. A
+    failure before the first item is retried as in `call`; once items have
+    been yielded it propagates, as a retry would repeat them.
+    """
+    limiter = get_limiter(service)
+    for attempt in range(limiter.attempts):
+        started = False
+        with limiter.slot():
+            try:
+                for item in fn(*args, **kwargs):
+                    started = True
+                    yield item
+            except Exception as e:
+                if started or not is_retryable(e) or attempt == limiter.attempts - 1:
+                    raise
+                hint = retry_hint(e)
+                limiter.on_retry(is_throttle(e), hint)
+                tracing.count("ratelimit.retry", service=service, throttled=is_throttle(e))
+            else:
+                limiter.on_success()
+                return
+        with tracing.span(f"{service}.backoff"):
+            time.sleep(backoff_delay(attempt, hint))
@@ -0,0 +1,182 @@
+"""Full-text and near-duplicate search over ledger content.
+
+Two derived indexes live in one SQLite file next to the ledger:
+
+* an FTS5 inverted index (contentless, rowid = ledger seq) for ranked
+  keyword search;
+* MinHash signatures over each post's word set, stored as LSH band keys
+  (10 bands of 3 rows). Posts sharing a band key are candidates; the few
+  with the most shared bands are confirmed by exact Jaccard similarity, so
+  a near-duplicate query is one indexed lookup of 10 keys.
+
+Both are updated incrementally: `sync()` reads only ledger records past the
+last indexed seq through the ledger's sidecar index, and never rescans.
+
+    python search.py "phishing tips"
+    python search.py --dup "Never click links in unexpected emails"
+"""
+import os
+import re
+import struct
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import FrozenSet, Iterable, List, Optional
+
+from ledger import Ledger
+
+SEARCH_FILE = "search.sqlite3"
+BANDS = 10
+ROWS = 3
+NUM_PERM = BANDS * ROWS
+DUPLICATE_THRESHOLD = 0.6  # Jaccard similarity of word sets; ~90% of pairs at 0.6 share a band
+CANDIDATES = 20
+SYNC_CHUNK = 2048
+_HASHES = struct.Struct(f"<{NUM_PERM}I")
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(content, content='', tokenize='unicode61 remove_diacritics 2');
+CREATE TABLE IF NOT EXISTS lsh (key INTEGER NOT NULL, seq INTEGER NOT NULL, PRIMARY KEY (key, seq)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+# --- FINGERPRINTS ---
+def shingles(text: str) -> FrozenSet[str]:
+    """Distinct lower-cased words of three or more characters; short words only add noise."""
+    return frozenset(w for w in _WORD.findall(text.lower()) if len(w) >= 3)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def minhash(words: FrozenSet[str]) -> List[int]:
+    """NUM_PERM independent 32-bit hashes per word (one SHAKE-128 call), minimised column-wise."""
+    rows = [_HASHES.unpack(hashlib.shake_128(w.encode("utf-8")).digest(_HASHES.size)) for w in words]
+    return list(map(min, zip(*rows)))
+
+
+def band_keys(signature: List[int]) -> List[int]:
+    """One signed 64-bit key per band; the band number is mixed in so bands never collide."""
+    keys = []
+    for band in range(BANDS if signature else 0):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr((band, rows)).encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def fts_query(text: str) -> str:
+    """Free text to an FTS5 query in which every word must match; quoting neutralises FTS syntax."""
+    return " ".join(f'"{w}"' for w in _WORD.findall(text))
+
+
+class SearchIndex:
+    def __init__(self, ledger: Ledger, path: Optional[str] = None):
+        self.ledger = ledger
+        self.path = path or os.path.join(ledger.root, SEARCH_FILE)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def indexed_through(self) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'last_seq'").fetchone()
+        return row[0] if row else -1
+
+    # --- UPDATES ---
+    def sync(self) -> int:
+        """Index ledger records appended since the last sync; returns how many were added."""
+        added = 0
+        with self._lock:
+            conn = self._conn()
+            while True:
+                conn.execute("BEGIN IMMEDIATE")  # serialises syncs across processes too
+                try:
+                    start = self.indexed_through() + 1
+                    entries = self.ledger.index.read(start, start + SYNC_CHUNK) if start < self.ledger.count() else []
+                    records = self.ledger.read_entries(entries)
+                    self._add(conn, records)
+                    if records:
+                        conn.execute("INSERT OR REPLACE INTO meta VALUES ('last_seq', ?)", (records[-1]["seq"],))
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                added += len(records)
+                if len(records) < SYNC_CHUNK:
+                    return added
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, records: Iterable[dict]):
+        fts, keys = [], []
+        for record in records:
+            content = record.get("content") or ""
+            fts.append((record["seq"], content))
+            keys.extend((key, record["seq"]) for key in band_keys(minhash(shingles(content))))
+        conn.executemany("INSERT INTO posts_fts(rowid, content) VALUES (?, ?)", fts)
+        conn.executemany("INSERT OR IGNORE INTO lsh VALUES (?, ?)", keys)
+
+    # --- QUERIES ---
+    def search(self, query: str, limit: int = 10) -> List[dict]:
+        """Ledger records matching `query`, best BM25 match first, each with a `score`."""
+        match = fts_query(query)
+        if not match:
+            return []
+        rows = self._conn().execute("SELECT rowid, bm25(posts_fts) FROM posts_fts WHERE posts_fts MATCH ? ORDER BY rank LIMIT ?",
+                                    (match, limit)).fetchall()
+        rows = [(self.ledger.index.get(seq), score) for seq, score in rows]
+        rows = [(entry, score) for entry, score in rows if entry is not None]  # FTS can run ahead of the sidecar index
+        records = self.ledger.read_entries(entry for entry, _ in rows)
+        return [{**record, "score": round(-score, 3)} for record, (_, score) in zip(records, rows)]
+
+    def near_duplicates(self, text: str, threshold: float = DUPLICATE_THRESHOLD, limit: int = 5) -> List[dict]:
+        """Past posts whose word-set Jaccard similarity with `text` is at least `threshold`, closest first."""
+        words = shingles(text)
+        keys = band_keys(minhash(words))
+        if not keys:
+            return []
+        rows = self._conn().execute(
+            f"SELECT seq FROM lsh WHERE key IN ({','.join('?' * len(keys))}) GROUP BY seq ORDER BY COUNT(*) DESC LIMIT ?",
+            (*keys, CANDIDATES)).fetchall()
+        entries = (self.ledger.index.get(seq) for seq, in rows)
+        candidates = self.ledger.read_entries(entry for entry in entries if entry is not None)
+        scored = [(jaccard(words, shingles(r.get("content") or "")), r) for r in candidates]
+        hits = sorted((pair for pair in scored if pair[0] >= threshold), key=lambda pair: -pair[0])[:limit]
+        return [{**record, "similarity": round(similarity, 3)} for similarity, record in hits]
+
+    def duplicate_of(self, text: str, threshold: float = DUPLICATE_THRESHOLD) -> Optional[dict]:
+        """The closest near-duplicate of `text` in the ledger, or None if the draft is new."""
+        matches = self.near_duplicates(text, threshold, limit=1)
+        return matches[0] if matches else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search AuthentiPost ledger content")
+    parser.add_argument("query", help="search text (or the draft to check with --dup)")
+    parser.add_argument("--ledger", default="ledger", help="ledger directory")
+    parser.add_argument("--dup", action="store_true", help="list near-duplicates instead of keyword matches")
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    index = SearchIndex(Ledger(args.ledger))
+    index.sync()
+    results = index.near_duplicates(args.query, limit=args.n) if args.dup else index.search(args.query, args.n)
+    for r in results:
+        print(f"#{r['seq']:<8}{r['similarity'] if args.dup else r['score']:>8}  {r.get('tweet_id')}  {r.get('content', '')[:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""Signed-record format, pluggable signing backends and verification helpers.
+
+A signed record holds everything needed to check it with a single hash and
+verify: the exact payload that was signed, the hash algorithm, the curve,
+the key id and the signature. Entries logged before the format existed
+("legacy" entries) only carry `content` and the broadcast time, so their
+payload has to be searched for; see `find_legacy_payload`.
+
+Format-2 records come from `sign_batch`: a whole campaign is signed once
+through a manifest naming the Merkle root of its payloads, and each record
+adds the manifest and its inclusion path (see `merkle`).
+
+Signing and verification go through a `SigningBackend`. The pure-Python
+`ecdsa` package is always available; `coincurve` (libsecp256k1) and
+`cryptography` (OpenSSL) are used when installed, and `cryptography` also
+provides optional Ed25519 keys. The signing backend is chosen once per
+process from `AUTHENTIPOST_SIGNER` (`auto`, `secp256k1`, `cryptography`,
+`ecdsa` or `ed25519`); verification always uses the fastest backend
+available for the record's curve. All secp256k1 backends share the same
+raw key and `r||s` signature encoding, so records signed by one verify
+under any other.
+
+Parsed keys are cached per public key, so verifying many posts from the
+same author costs one point decode rather than one per entry.
+"""
+import os
+import time
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import merkle
+import tracing
+
+VERIFY_ERRORS = (ValueError, TypeError, AssertionError)
+LEGACY_TS_WINDOW = 60
+SIGNER_ENV = "AUTHENTIPOST_SIGNER"
+
+RECORD_FORMAT = 1
+BATCH_RECORD_FORMAT = 2
+SUPPORTED_FORMATS = (RECORD_FORMAT, BATCH_RECORD_FORMAT)
+HASH_ALG = "sha256"
+CURVE = "secp256k1"
+RECORD_FIELDS = ("format", "payload", "hash_alg", "curve", "key_id", "public_key", "signature", "manifest", "merkle_path")
+
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+class SigningBackendUnavailable(Exception):
+    pass
+
+
+# --- BACKENDS ---
+class SigningBackend:
+    """Raw-bytes signing interface: 32-byte private keys, raw public keys and signatures."""
+    name = ""
+    curve = CURVE
+
+    def generate_private_key(self) -> bytes:
+        raise NotImplementedError
+
+    def public_key(self, private_key: bytes) -> bytes:
+        raise NotImplementedError
+
+    def sign_digest(self, private_key: bytes, digest: bytes) -> bytes:
+        raise NotImplementedError
+
+    def verify_digest(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        raise NotImplementedError
+
+    def verify_legacy(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        """Legacy posts were signed with `ecdsa`'s default SHA-1 prehash over the SHA-256 digest."""
+        raise NotImplementedError
+
+    def precompute(self, public_key: bytes):
+        """Parse (and where supported, build lookup tables for) a key that will verify many times."""
+        self._public(public_key)
+
+
+class EcdsaBackend(SigningBackend):
+    name = "ecdsa"
+
+    def __init__(self):
+        import ecdsa
+        from ecdsa.errors import MalformedPointError
+        self._ecdsa = ecdsa
+        self._errors = (ecdsa.BadSignatureError, MalformedPointError, *VERIFY_ERRORS)
+        self._signing_key = lru_cache(maxsize=64)(
+            lambda private_key: ecdsa.SigningKey.from_string(private_key, curve=ecdsa.SECP256k1))
+        self._verifying_key = lru_cache(maxsize=4096)(
+            lambda public_key: ecdsa.VerifyingKey.from_string(public_key, curve=ecdsa.SECP256k1))
+
+    def generate_private_key(self) -> bytes:
+        return self._ecdsa.SigningKey.generate(curve=self._ecdsa.SECP256k1).to_string()
+
+    def public_key(self, private_key: bytes) -> bytes:
+        return self._signing_key(private_key).verifying_key.to_string()
+
+    def sign_digest(self, private_key: bytes, digest: bytes) -> bytes:
+        return self._signing_key(private_key).sign_digest(digest)
+
+    def verify_digest(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        try: return self._verifying_key(public_key).verify_digest(signature, digest)
+        except self._errors: return False
+
+    def verify_legacy(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        try: return self._verifying_key(public_key).verify(signature, digest)
+        except self._errors: return False
+
+    def precompute(self, public_key: bytes):
+        # Point-multiplication tables make repeated pure-Python verifies several times faster.
+        self._verifying_key(public_key).precompute()
+
+
+class CryptographyBackend(SigningBackend):
+    name = "cryptography"
+
+    def __init__(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.asymmetric.utils import Prehashed, decode_dss_signature, encode_dss_signature
+        self._ec = ec
+        self._decode, self._encode = decode_dss_signature, encode_dss_signature
+        self._errors = (InvalidSignature, *VERIFY_ERRORS)
+        self._prehashed = ec.ECDSA(Prehashed(hashes.SHA256()))
+        self._legacy = ec.ECDSA(hashes.SHA1())
+        self._private = lru_cache(maxsize=64)(
+            lambda private_key: ec.derive_private_key(int.from_bytes(private_key, "big"), ec.SECP256K1()))
+        self._public = lru_cache(maxsize=4096)(
+            lambda public_key: ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), b"\x04" + public_key))
+
+    def generate_private_key(self) -> bytes:
+        key = self._ec.generate_private_key(self._ec.SECP256K1())
+        return key.private_numbers().private_value.to_bytes(32, "big")
+
+    def public_key(self, private_key: bytes) -> bytes:
+        numbers = self._private(private_key).public_key().public_numbers()
+        return numbers.x.to_bytes(32, "big") + numbers.y.to_bytes(32, "big")
+
+    def sign_digest(self, private_key: bytes, digest: bytes) -> bytes:
+        r, s = self._decode(self._private(private_key).sign(digest, self._prehashed))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def _verify(self, public_key: bytes, signature: bytes, data: bytes, algorithm) -> bool:
+        if len(signature) != 64:
+            return False
+        der = self._encode(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+        try:
+            self._public(public_key).verify(der, data, algorithm)
+            return True
+        except self._errors:
+            return False
+
+    def verify_digest(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        return self._verify(public_key, signature, digest, self._prehashed)
+
+    def verify_legacy(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        return self._verify(public_key, signature, digest, self._legacy)
+
+
+class Secp256k1Backend(SigningBackend):
+    """libsecp256k1 through `coincurve`."""
+    name = "secp256k1"
+
+    def __init__(self):
+        import coincurve
+        from coincurve.ecdsa import cdata_to_der, der_to_cdata, deserialize_compact, serialize_compact
+        self._coincurve = coincurve
+        self._to_der = lambda raw: cdata_to_der(deserialize_compact(raw))
+        self._from_der = lambda der: serialize_compact(der_to_cdata(der))
+        self._private = lru_cache(maxsize=64)(coincurve.PrivateKey)
+        self._public = lru_cache(maxsize=4096)(lambda public_key: coincurve.PublicKey(b"\x04" + public_key))
+
+    def generate_private_key(self) -> bytes:
+        return self._coincurve.PrivateKey().secret
+
+    def public_key(self, private_key: bytes) -> bytes:
+        return self._private(private_key).public_key.format(compressed=False)[1:]
+
+    def sign_digest(self, private_key: bytes, digest: bytes) -> bytes:
+        return self._from_der(self._private(private_key).sign(digest, hasher=None))
+
+    def _verify(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        if len(signature) != 64:
+            return False
+        # libsecp256k1 only accepts low-S signatures; `ecdsa` emits either form.
+        s = int.from_bytes(signature[32:], "big")
+        if s > SECP256K1_ORDER // 2:
+            signature = signature[:32] + (SECP256K1_ORDER - s).to_bytes(32, "big")
+        try: return self._public(public_key).verify(self._to_der(signature), digest, hasher=None)
+        except VERIFY_ERRORS: return False
+
+    def verify_digest(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        return self._verify(public_key, signature, digest)
+
+    def verify_legacy(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        # A 160-bit hash is used as-is by ECDSA, so left-padding it to 32 bytes is equivalent.
+        return self._verify(public_key, signature, hashlib.sha1(digest).digest().rjust(32, b"\0"))
+
+
+class Ed25519Backend(SigningBackend):
+    name = "ed25519"
+    curve = "ed25519"
+
+    def __init__(self):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ed25519
+        self._ed25519 = ed25519
+        self._raw = (serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        self._errors = (InvalidSignature, *VERIFY_ERRORS)
+        self._private = lru_cache(maxsize=64)(ed25519.Ed25519PrivateKey.from_private_bytes)
+        self._public = lru_cache(maxsize=4096)(ed25519.Ed25519PublicKey.from_public_bytes)
+
+    def generate_private_key(self) -> bytes:
+        return os.urandom(32)
+
+    def public_key(self, private_key: bytes) -> bytes:
+        return self._private(private_key).public_key().public_bytes(*self._raw)
+
+    def sign_digest(self, private_key: bytes, digest: bytes) -> bytes:
+        return self._private(private_key).sign(digest)
+
+    def verify_digest(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        try:
+            self._public(public_key).verify(signature, digest)
+            return True
+        except self._errors:
+            return False
+
+    def verify_legacy(self, public_key: bytes, signature: bytes, digest: bytes) -> bool:
+        return False  # legacy posts were only ever signed with secp256k1
+
+
+BACKENDS = {
+    "secp256k1": Secp256k1Backend,
+    "cryptography": CryptographyBackend,
+    "ecdsa": EcdsaBackend,
+    "ed25519": Ed25519Backend,
+}
+# Fastest first; "auto" signs with the first secp256k1 backend that imports.
+SECP256K1_PREFERENCE = ("secp256k1", "cryptography", "ecdsa")
+
+
+@lru_cache(maxsize=None)
+def load_backend(name: str) -> SigningBackend:
+    if name not in BACKENDS:
+        raise SigningBackendUnavailable(f"unknown signing backend {name!r}; choose from {sorted(BACKENDS)}")
+    try:
+        return BACKENDS[name]()
+    except ImportError as e:
+        raise SigningBackendUnavailable(f"signing backend {name!r} is not installed ({e.name})") from e
+
+
+def available_backends() -> Dict[str, SigningBackend]:
+    found = {}
+    for name in BACKENDS:
+        try: found[name] = load_backend(name)
+        except SigningBackendUnavailable: continue
+    return found
+
+
+@lru_cache(maxsize=None)
+def get_backend() -> SigningBackend:
+    """The process-wide signing backend, chosen from AUTHENTIPOST_SIGNER at first use."""
+    name = os.getenv(SIGNER_ENV, "auto").strip().lower()
+    return load_backend(name) if name != "auto" else backend_for(CURVE)
+
+
+@lru_cache(maxsize=None)
+def backend_for(curve: str) -> SigningBackend:
+    names = SECP256K1_PREFERENCE if curve == CURVE else [n for n, b in BACKENDS.items() if b.curve == curve]
+    for name in names:
+        try: return load_backend(name)
+        except SigningBackendUnavailable: continue
+    raise SigningBackendUnavailable(f"no installed backend can handle curve {curve!r}")
+
+
+# --- SIGNED RECORDS ---
+def key_id(public_key_hex: str) -> str:
+    """Short, stable key identifier; its first 8 chars are the sidebar fingerprint."""
+    return hashlib.sha256(public_key_hex.encode()).hexdigest()[:16]
+
+
+def make_payload(content: str, timestamp: int) -> str:
+    return f"{content}|TS:{timestamp}"
+
+
+def payload_content(payload: str) -> str:
+    return payload.rsplit("|TS:", 1)[0]
+
+
+def payload_digest(payload: str) -> bytes:
+    return hashlib.sha256(payload.encode("utf-8")).digest()
+
+
+def generate_keys(backend: Optional[SigningBackend] = None):
+    """Return (private_key_bytes, public_key_hex) for a fresh key on `backend`."""
+    backend = backend or get_backend()
+    private_key = backend.generate_private_key()
+    return private_key, backend.public_key(private_key).hex()
+
+
+def sign_record(private_key: bytes, content: str, timestamp: Optional[int] = None,
+                backend: Optional[SigningBackend] = None, embed_public_key: bool = True) -> dict:
+    """Sign `content` and return a format-1 signed record.
+
+    The signature covers SHA-256(payload) directly (legacy entries were
+    signed over that digest through ecdsa's default SHA-1 prehash). With
+    `embed_public_key=False` the record names its key only by `key_id`,
+    and verifiers resolve it from a key store.
+    """
+    backend = backend or get_backend()
+    payload = make_payload(content, int(time.time()) if timestamp is None else timestamp)
+    public_key = backend.public_key(private_key).hex()
+    record = {
+        "format": RECORD_FORMAT,
+        "payload": payload,
+        "hash_alg": HASH_ALG,
+        "curve": backend.curve,
+        "key_id": key_id(public_key),
+        "public_key": public_key,
+        "signature": backend.sign_digest(private_key, payload_digest(payload)).hex(),
+    }
+    if not embed_public_key:
+        del record["public_key"]
+    return record
+
+
+def make_manifest(root: bytes, count: int, timestamp: int) -> str:
+    return f"MANIFEST:v1|ROOT:{root.hex()}|N:{count}|TS:{timestamp}"
+
+
+def manifest_root(manifest: str) -> Optional[bytes]:
+    try: return bytes.fromhex(manifest.split("|ROOT:", 1)[1].split("|", 1)[0])
+    except (IndexError, ValueError, AttributeError): return None
+
+
+def sign_batch(private_key: bytes, contents: Sequence[str], timestamp: Optional[int] = None,
+               backend: Optional[SigningBackend] = None, embed_public_key: bool = True) -> List[dict]:
+    """Sign many posts with one signature: a format-2 record per post.
+
+    The payloads are Merkle leaves and only the manifest naming their root
+    is signed, so the cost is one ECDSA operation plus O(n log n) hashes.
+    Each record carries the shared manifest and signature and its own
+    inclusion path; verifying one post is a path walk and one verify.
+    """
+    if not contents:
+        return []
+    backend = backend or get_backend()
+    ts = int(time.time()) if timestamp is None else timestamp
+    payloads = [make_payload(content, ts) for content in contents]
+    leaves = [merkle.leaf_hash(p.encode("utf-8")) for p in payloads]
+    manifest = make_manifest(merkle.merkle_root(leaves), len(leaves), ts)
+    public_key = backend.public_key(private_key).hex()
+    shared = {
+        "format": BATCH_RECORD_FORMAT,
+        "hash_alg": HASH_ALG,
+        "curve": backend.curve,
+        "key_id": key_id(public_key),
+        "public_key": public_key,
+        "manifest": manifest,
+        "signature": backend.sign_digest(private_key, payload_digest(manifest)).hex(),
+    }
+    if not embed_public_key:
+        del shared["public_key"]
+    return [{**shared, "payload": payload, "merkle_path": path} for payload, path in zip(payloads, merkle.merkle_paths(leaves))]
+
+
+def key_mismatch(record: dict, public_keys: Optional[Mapping[str, str]] = None) -> bool:
+    """True when an embedded public key contradicts the record's `key_id` or the trusted key for it."""
+    embedded, kid = record.get("public_key"), record.get("key_id")
+    if not embedded:
+        return False
+    trusted = (public_keys or {}).get(kid)
+    try: return key_id(embedded) != kid or (trusted is not None and trusted.lower() != embedded.lower())
+    except AttributeError: return True
+
+
+def resolve_public_key(record: dict, public_keys: Optional[Mapping[str, str]] = None) -> Optional[str]:
+    """The key a record must verify under, or None.
+
+    A `key_id` in the trusted `public_keys` table always resolves to that
+    table's key. An embedded `public_key` is used only when nothing is
+    trusted for the id and the key hashes to that id, so a record cannot
+    claim a known id while carrying someone else's key.
+    """
+    trusted = (public_keys or {}).get(record.get("key_id"))
+    if trusted:
+        return trusted
+    return None if key_mismatch(record) else record.get("public_key")
+
+
+def verify_digest(curve: str, public_key_hex: str, signature_hex: str, digest: bytes,
+                  backend: Optional[SigningBackend] = None) -> bool:
+    """Verify with `backend`, or by default the fastest installed backend for `curve`."""
+    if backend is not None and backend.curve != curve:
+        return False
+    try:
+        return (backend or backend_for(curve)).verify_digest(bytes.fromhex(public_key_hex), bytes.fromhex(signature_hex), digest)
+    except (SigningBackendUnavailable, *VERIFY_ERRORS):
+        return False
+
+
+@lru_cache(maxsize=4096)
+def _verify_manifest(curve: str, public_key_hex: str, signature_hex: str, manifest: str,
+                     backend: Optional[SigningBackend] = None) -> bool:
+    """Posts from one batch share a manifest signature; bulk verification checks it once."""
+    return verify_digest(curve, public_key_hex, signature_hex, payload_digest(manifest), backend)
+
+
+@tracing.traced("verify")
+def verify_record(record: dict, public_keys: Optional[Mapping[str, str]] = None, window: int = LEGACY_TS_WINDOW,
+                  backend: Optional[SigningBackend] = None) -> bool:
+    """Check a format-1 or format-2 record, or a legacy entry signed up to `window` seconds before it was logged.
+
+    `backend` pins the verifier; by default it is the fastest installed one for the record's curve.
+    """
+    if record.get("format") is None and "content" in record:
+        return find_legacy_payload(record, window, backend) is not None
+    if record.get("format") not in SUPPORTED_FORMATS or record.get("hash_alg") != HASH_ALG:
+        return False
+    if key_mismatch(record, public_keys):
+        return False
+    public_key = resolve_public_key(record, public_keys)
+    if not public_key:
+        return False
+    try:
+        if record["format"] == RECORD_FORMAT:
+            return verify_digest(record["curve"], public_key, record["signature"], payload_digest(record["payload"]), backend)
+        root = manifest_root(record["manifest"])
+        leaf = merkle.leaf_hash(record["payload"].encode("utf-8"))
+        return (root is not None and merkle.verify_path(leaf, record["merkle_path"], root)
+                and _verify_manifest(record["curve"], public_key, record["signature"], record["manifest"], backend))
+    except (KeyError, AttributeError, TypeError):
+        return False
+
+
+# --- LEGACY ENTRIES ---
+def verify_payload(payload: str, signature_hex: str, public_key_hex: str) -> bool:
+    try:
+        backend = backend_for(CURVE)
+        return backend.verify_legacy(bytes.fromhex(public_key_hex), bytes.fromhex(signature_hex),
+                                     hashlib.sha256(payload.encode()).digest())
+    except VERIFY_ERRORS:
+        return False
+
+
+def find_legacy_payload(entry: dict, window: int = LEGACY_TS_WINDOW, backend: Optional[SigningBackend] = None) -> Optional[str]:
+    """Recover the signed payload of a legacy entry.
+
+    Old entries store only `content` and the broadcast timestamp, while the
+    signature covers `content|TS:<sign time>`, which is up to `window`
+    seconds earlier. Returns the matching payload or None.
+    """
+    try:
+        public_key = bytes.fromhex(entry["public_key"])
+        signature = bytes.fromhex(entry["signature"])
+        content, timestamp = entry["content"], int(entry["timestamp"])
+    except (KeyError, *VERIFY_ERRORS):
+        return None
+    backend = backend or backend_for(CURVE)
+    if backend.curve != CURVE:
+        return None
+    for delta in range(window + 1):
+        payload = make_payload(content, timestamp - delta)
+        if backend.verify_legacy(public_key, signature, hashlib.sha256(payload.encode()).digest()):
+            return payload
+    return None
@@ -0,0 +1,206 @@
+"""Schema-constrained JSON output for the Architect and Creative, and its validating parser.
+
+Both nodes ask Gemini for JSON (`response_mime_type` plus one of the
+schemas below) instead of free text, since free text drifted: a preamble
+such as "Here are 3 X posts" was split off as a post and signed, and a
+reply without "TREND:"/"REASON:" left the Architect's fields empty.
+
+Parsing is forgiving about the wrapper and strict about the content. Code
+fences and text around the JSON are dropped, and a reply in the old
+"TREND: ... REASON: ..." or '---' format is still read. Every field is
+validated against its schema. Posts lose list labels and meta
+preambles/outros, and must be longer than `MIN_POST_CHARS`. Complete posts
+are recovered from a truncated JSON array. The parsers return only what is
+valid, so the caller can re-ask for just the missing part (see `swarm`)
+instead of rerunning the graph.
+"""
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+MIN_POST_CHARS = 10
+SEPARATOR = "---"  # the pre-JSON Creative format
+
+ARCHITECT = {"type": "OBJECT", "properties": {"trend": {"type": "STRING"}, "reason": {"type": "STRING"}},
+             "required": ["trend", "reason"]}
+REASON = {"type": "OBJECT", "properties": {"reason": {"type": "STRING"}}, "required": ["reason"]}
+POSTS = {"type": "OBJECT", "properties": {"posts": {"type": "ARRAY", "items": {"type": "STRING"}}}, "required": ["posts"]}
+POST = {"type": "OBJECT", "properties": {"post": {"type": "STRING"}}, "required": ["post"]}
+
+_TYPES = {"OBJECT": dict, "ARRAY": list, "STRING": str}
+_FENCE = re.compile(r"^\s*```[a-zA-Z]*\s*|\s*```\s*$")
+_OPENER = re.compile(r"\{")  # inside prose only objects count: "[1]" in a post is not a reply
+_LABEL = re.compile(r"^\s*(?:\*\*)?(?:(?:post|draft|tweet|option)\s*#?\d*|\d+)\s*[:.)]\s*(?:\*\*)?\s*", re.I)
+_PREAMBLE = re.compile(r"^(?:sure|okay|ok|certainly|absolutely|of course|here(?:'s| is| are)|below (?:is|are))\b.*\b(?:posts?|tweets?|drafts?|options?)\b", re.I)
+_OUTRO = re.compile(r"^(?:let me know|hope (?:this|these)|feel free|i hope)\b", re.I)
+_POSTS_ARRAY = re.compile(r'"posts"\s*:\s*\[')
+_STRING = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+
+
+def generation_config(schema: dict) -> dict:
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
+
+def problems(value: Any, schema: dict, path: str = "$") -> List[str]:
+    """Where `value` breaks `schema` (types, required keys, non-blank strings); empty when valid."""
+    expected = _TYPES[schema["type"]]
+    if not isinstance(value, expected):
+        return [f"{path}: expected {schema['type'].lower()}"]
+    found = []
+    if expected is dict:
+        found += [f"{path}.{key}: missing" for key in schema.get("required", ()) if key not in value]
+        for key, sub in schema.get("properties", {}).items():
+            if key in value: found += problems(value[key], sub, f"{path}.{key}")
+    elif expected is list:
+        for i, item in enumerate(value):
+            found += problems(item, schema["items"], f"{path}[{i}]")
+    elif not value.strip():
+        found.append(f"{path}: empty")
+    return found
+
+
+def extract_json(text: str) -> Any:
+    """The first JSON value in `text`, ignoring code fences and prose around it; None if there is none."""
+    text = _FENCE.sub("", text or "")
+    try: return json.loads(text)
+    except ValueError: pass
+    decoder = json.JSONDecoder()
+    for match in _OPENER.finditer(text):
+        try: return decoder.raw_decode(text, match.start())[0]
+        except ValueError: continue
+    return None
+
+
+def _looks_like_json(text: str) -> bool:
+    return _FENCE.sub("", text or "").lstrip().startswith(("{", "["))
+
+
+# --- FIELDS ---
+def _labelled(text: str, names: List[str]) -> Dict[str, str]:
+    """Fields from the old "TREND: ... REASON: ..." form, for any reply that ignored JSON mode."""
+    keys = "|".join(map(re.escape, names))
+    pattern = re.compile(rf"\b({keys})\s*:\s*(.*?)(?=\b(?:{keys})\s*:|$)", re.I | re.S)
+    return {m.group(1).lower(): m.group(2).strip().strip("*[]").strip() for m in pattern.finditer(text or "")}
+
+
+def parse_fields(text: str, schema: dict) -> Tuple[Dict[str, str], List[str]]:
+    """The valid string fields of a reply to `schema`, and the required ones still missing."""
+    value = extract_json(text)
+    if not isinstance(value, dict):
+        value = {} if _looks_like_json(text) else _labelled(text, list(schema["properties"]))
+    value, properties = {str(k).lower(): v for k, v in value.items()}, schema["properties"]
+    fields = {key: " ".join(value[key].split()) for key in properties if key in value and not problems(value[key], properties[key])}
+    return fields, [key for key in schema.get("required", ()) if key not in fields]
+
+
+# --- POSTS ---
+def clean_post(text: str) -> str:
+    """Post text without list labels, quotes, or a meta preamble/outro around it."""
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", (text or "").strip()) if p.strip()]
+    if len(paragraphs) > 1 and _PREAMBLE.match(paragraphs[0]): paragraphs.pop(0)
+    if len(paragraphs) > 1 and _OUTRO.match(paragraphs[-1]): paragraphs.pop()
+    post = "\n\n".join(paragraphs)
+    if post.rstrip().endswith(":") and _PREAMBLE.match(post): return ""
+    post = _LABEL.sub("", post, count=1).strip()
+    return post[1:-1].strip() if len(post) > 1 and post[0] == post[-1] and post[0] in "\"'" else post
+
+
+def is_post(text: str) -> bool:
+    """Long enough and not a bare preamble or outro; a long text opening with "Here's..." is a real post."""
+    return len(text) > MIN_POST_CHARS and not (len(text) <= 200 and (_PREAMBLE.match(text) or _OUTRO.match(text)))
+
+
+def _item_text(item: Any) -> Optional[str]:
+    if isinstance(item, dict):
+        item = next((item[k] for k in ("post", "text", "content") if isinstance(item.get(k), str)), None)
+    return item if isinstance(item, str) else None
+
+
+def _unique_posts(items) -> List[str]:
+    posts = []
+    for item in items:
+        post = clean_post(_item_text(item) or "")
+        if is_post(post) and post not in posts:
+            posts.append(post)
+    return posts
+
+
+def parse_posts(text: str) -> List[str]:
+    """The valid, distinct posts in a Creative reply; complete posts survive a truncated JSON reply."""
+    value = extract_json(text)
+    if isinstance(value, dict):
+        value = value.get("posts", next((v for v in value.values() if isinstance(v, list)), None))
+    if isinstance(value, list):
+        return _unique_posts(value)
+    if _looks_like_json(text):
+        stream = PostStream()
+        return stream.feed(text)
+    return _unique_posts(text.split(SEPARATOR))
+
+
+def parse_post(text: str) -> Optional[str]:
+    """The post in a single-draft reply, or None when the reply holds no usable post."""
+    value = extract_json(text)
+    if isinstance(value, dict):
+        value = next((value[k] for k in ("post", "text", "content") if isinstance(value.get(k), str)), None)
+    elif isinstance(value, list):
+        value = next(iter(_unique_posts(value)), None)
+    elif _looks_like_json(text):
+        return None
+    else:
+        value = text
+    post = clean_post(value) if isinstance(value, str) else ""
+    return post if is_post(post) else None
+
+
+class PostStream:
+    """Posts from a streamed {"posts": [...]} reply, each released when its closing quote arrives."""
+    def __init__(self):
+        self.text = ""
+        self.posts: List[str] = []
+        self._position: Optional[int] = None  # scan position inside the posts array, once it has opened
+        self._open: Optional[int] = None  # where the string being streamed starts
+
+    def feed(self, chunk: str) -> List[str]:
+        """Add a chunk and return the posts it completed."""
+        self.text += chunk
+        done = []
+        if self._position is None:
+            opened = _POSTS_ARRAY.search(self.text)
+            if not opened:
+                return done
+            self._position = opened.end()
+        while True:
+            start = self.text.find('"', self._position)
+            end = self.text.find("]", self._position)
+            if start == -1 or -1 < end < start:
+                self._open = None
+                return done
+            match = _STRING.match(self.text, start)
+            if not match:
+                self._open = start
+                return done
+            self._position = match.end()
+            try: post = clean_post(json.loads(match.group(0)))
+            except ValueError: continue
+            if is_post(post) and post not in self.posts:
+                self.posts.append(post)
+                done.append(post)
+
+    @property
+    def pending(self) -> str:
+        """The post being streamed so far, for progress display."""
+        if self._open is None:
+            return ""
+        raw = self.text[self._open + 1:]
+        try: return json.loads('"' + raw.rstrip("\\") + '"').strip()
+        except ValueError: return raw.replace("\\n", "\n").replace('\\"', '"').strip()
+
+    def close(self) -> List[str]:
+        """Posts only parseable once the reply is complete (one that ignored JSON mode)."""
+        self._open = None
+        if self._position is not None:
+            return []
+        late = [p for p in parse_posts(self.text) if p not in self.posts]
+        self.posts += late
+        return late
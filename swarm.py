@@ -0,0 +1,522 @@
+"""Agent swarm: Scout -> Architect -> Creative -> Critic as a LangGraph workflow.
+
+The nodes know nothing about Streamlit. Progress is reported through a
+`status` factory with the same shape as `st.status` (a context manager whose
+value has `.update(label=..., state=...)`), supplied per run with
+`graph.invoke(state, config=run_config(status=st.status))`; headless callers
+get a no-op. Graphs are compiled once per mode and shared (`get_workflow`).
+
+Three execution modes are available from `get_workflow(mode=...)`:
+
+* "serial" — the original chain, one network call at a time.
+* "concurrent" — Scout fans out several Tavily queries at once, Creative
+  requests each draft separately, and Critic reviews each draft as soon as
+  it arrives. Independent calls run on a shared bounded thread pool, so
+  end-to-end latency approaches the slowest branch instead of the sum.
+* "streaming" — like "concurrent", but Creative writes all drafts in one
+  streamed request; post boundaries are parsed as tokens arrive, each draft
+  is reported to a `listener` and sent to the Critic as soon as it is
+  complete, so time-to-first-draft no longer waits on the last draft.
+
+In every mode the Scout first asks the local trend index (`trends`), which
+background ingestion keeps fresh, and only searches live for a topic that
+has not been pulled recently; live results are ingested for next time.
+
+Architect and Creative reply in schema-constrained JSON (see `structured`).
+A reply that fails validation costs one follow-up request for only the
+missing part: the reason for a chosen trend, or the drafts still missing.
+The graph is never rerun.
+
+Before the Critic, `prescreen` scores every draft locally; drafts that
+clearly pass or clearly fail get its note instead of a model call, and only
+the borderline ones are sent to Gemini.
+"""
+import os
+import time
+import threading
+from contextlib import closing, contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional, Tuple, TypedDict
+
+import prompts
+import personas
+import prescreen
+import ratelimit
+import structured
+import trends
+import tracing
+from cache import cache_key, get_cache
+
+SWARM_MAX_WORKERS = int(os.getenv("SWARM_MAX_WORKERS", "8"))
+DRAFT_COUNT = 3
+REASKS = 2  # follow-up requests per part of a reply that fails validation
+TREND_COUNT = 3
+SCOUT_QUERY_SUFFIXES = ("", " latest news", " emerging trends")
+DRAFT_ANGLES = ("a practical tip", "a witty observation", "a question that sparks replies")
+
+
+class AgentState(TypedDict):
+    topic: str
+    brand_id: str
+    persona_version: int
+    brand_desc: str
+    raw_trends: List[str]
+    selected_trend: str
+    architect_reasoning: str
+    final_posts: List[str]
+    critic_feedback: str
+
+
+def initial_state(topic: str, brand_desc: Optional[str] = None, brand_id: str = personas.DEFAULT_BRAND) -> AgentState:
+    """A fresh run; the persona comes from the in-memory store unless `brand_desc` is given outright."""
+    persona = personas.get_store().get(brand_id) if brand_desc is None else None
+    return {"topic": topic, "brand_id": brand_id, "persona_version": persona.version if persona else 0,
+            "brand_desc": persona.description if persona else brand_desc,
+            "raw_trends": [], "selected_trend": "", "architect_reasoning": "", "final_posts": [], "critic_feedback": ""}
+
+
+# --- CLIENTS ---
+_client_lock = threading.Lock()
+
+
+def get_model():
+    with _client_lock:  # nodes call this from pool threads; build the client once
+        return _build_model()
+
+
+@lru_cache(maxsize=None)
+def _build_model():
+    import google.generativeai as genai  # ~1 s to import; deferred until the first model call
+    try:
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        return genai.GenerativeModel('models/gemini-2.5-flash-lite')
+    except Exception:
+        return genai.GenerativeModel('models/gemini-1.5-flash')
+
+
+@lru_cache(maxsize=None)
+def get_tavily():
+    from tavily import TavilyClient
+    api_key = os.getenv("TAVILY_API_KEY")
+    return TavilyClient(api_key=api_key) if api_key else None
+
+
+@lru_cache(maxsize=None)
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=SWARM_MAX_WORKERS, thread_name_prefix="swarm")
+
+
+# Streaming progress callback: listener(event, index, text) with event one of
+# "partial" (draft `index` so far), "draft" (draft finished) or "review" (Critic's feedback on it).
+DraftListener = Callable[[str, int, str], None]
+
+
+# Draft filter: is_novel(post) is False for drafts that repeat past posts (see `search.SearchIndex.duplicate_of`).
+NoveltyCheck = Callable[[str], bool]
+
+
+def _always_novel(post: str) -> bool:
+    return True
+
+
+# Pre-screen context: recent_posts() gives the latest published posts, which drafts must not near-duplicate.
+RecentPosts = Callable[[], List[str]]
+
+
+def _no_recent_posts() -> List[str]:
+    return []
+
+
+def prescreener(state: AgentState, recent_posts: RecentPosts) -> prescreen.Prescreener:
+    return prescreen.Prescreener(state["brand_desc"], recent_posts())
+
+
+class _NullStatus:
+    def update(self, **kwargs):
+        pass
+
+
+@contextmanager
+def null_status(label: str = "", **kwargs):
+    yield _NullStatus()
+
+
+def _count_usage(response):
+    """Report Gemini's own token counts, including how much of the prompt it served from its context cache."""
+    usage = getattr(response, "usage_metadata", None)
+    for field in ("prompt_token_count", "candidates_token_count", "cached_content_token_count"):
+        value = getattr(usage, field, None)
+        if value: tracing.count(f"gemini.{field.removesuffix('_count')}s", value)
+
+
+def _options(schema: Optional[dict]) -> dict:
+    return {"generation_config": structured.generation_config(schema)} if schema else {}
+
+
+def safe_generate_content(prompt, schema: Optional[dict] = None):
+    """One Gemini request under the shared rate limiter (see `ratelimit`); JSON matching `schema` when given."""
+    with tracing.span("gemini.generate"):
+        response = ratelimit.call("gemini", get_model().generate_content, prompt, **_options(schema))
+    _count_usage(response)
+    return response
+
+
+class CachedResponse:
+    """A model response replayed from the response cache; only `.text` is kept."""
+    def __init__(self, text: str):
+        self.text = text
+
+
+def generate_content(prompt, schema: Optional[dict] = None):
+    """safe_generate_content behind the content-addressed response cache."""
+    cache = get_cache()
+    if cache is None:
+        return safe_generate_content(prompt, schema)
+    key = cache_key("gemini", get_model().model_name, prompt, {"schema": schema} if schema else None)
+    text = cache.get("gemini", key)
+    if text is not None:
+        return CachedResponse(text)
+    response = safe_generate_content(prompt, schema)
+    cache.put("gemini", key, response.text)
+    return response
+
+
+def stream_content(prompt, schema: Optional[dict] = None) -> Iterator[str]:
+    """Yield the response text chunk by chunk as Gemini streams it; cache hits arrive as one chunk."""
+    cache = get_cache()
+    key = cache_key("gemini", get_model().model_name, prompt, {"schema": schema} if schema else None) if cache else None
+    if cache:
+        text = cache.get("gemini", key)
+        if text is not None:
+            yield text
+            return
+    started, error, responses = time.perf_counter(), None, []
+
+    def request():
+        responses.append(get_model().generate_content(prompt, stream=True, **_options(schema)))
+        return responses[-1]
+    try:
+        parts = []
+        for chunk in ratelimit.stream("gemini", request):  # holds a concurrency slot until the stream ends or is closed
+            try: text = chunk.text
+            except ValueError: continue  # chunks without text parts (e.g. the final finish_reason chunk)
+            if not parts: tracing.record("gemini.stream.first_chunk", time.perf_counter() - started)
+            parts.append(text)
+            yield text
+        _count_usage(responses[-1])  # a fully iterated stream reports usage for the whole request
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:  # a span cannot stay open across yields, so the stream is accounted when it ends
+        tracing.record("gemini.stream", time.perf_counter() - started, error)
+    if cache:
+        cache.put("gemini", key, "".join(parts))
+
+
+def tavily_search(query: str):
+    params = {"search_depth": "basic"}
+    def search():
+        with tracing.span("tavily.search"):
+            return ratelimit.call("tavily", get_tavily().search, query=query, **params)['results']
+    cache = get_cache()
+    if cache is None:
+        return search()
+    return cache.get_or_compute("tavily", cache_key("tavily", "search", query, params), search)
+
+
+def scout_queries(topic: str) -> List[str]:
+    return [topic + suffix for suffix in SCOUT_QUERY_SUFFIXES]
+
+
+def indexed_trends(topic: str) -> List[str]:
+    """Fresh trends for `topic` from the local index; empty when it has none or is disabled."""
+    index = trends.get_index()
+    if index is None:
+        return []
+    with tracing.span("trends.query"):
+        return [t["content"] for t in index.query(topic, TREND_COUNT)]
+
+
+def remember_trends(topic: str, results: List[dict]):
+    """Ingest live results, so later runs on `topic` read them from the index while they are fresh."""
+    index = trends.get_index()
+    if index is None or not results:
+        return
+    try: index.ingest(topic, results)
+    except Exception: tracing.count("trends.ingest_failed")  # this run has its trends; only the next one loses out
+
+
+# --- PROMPTS ---
+# Built by `prompts` under token budgets, behind a persona prefix shared by every call.
+def architect_prompt(state: AgentState) -> str:
+    return prompts.architect(state["brand_desc"], state["raw_trends"])
+
+
+def creative_prompt(state: AgentState, count: int = DRAFT_COUNT, written: List[str] = ()) -> str:
+    return prompts.creative(state["brand_desc"], state["selected_trend"], state["architect_reasoning"], count, written)
+
+
+def single_draft_prompt(state: AgentState, index: int) -> str:
+    angle = DRAFT_ANGLES[index % len(DRAFT_ANGLES)]
+    return prompts.single_draft(state["brand_desc"], state["selected_trend"], state["architect_reasoning"], angle)
+
+
+def critic_prompt(state: AgentState, posts: List[str]) -> str:
+    return prompts.critic(state["brand_desc"], posts)
+
+
+# --- STRUCTURED REPLIES ---
+# Validated by `structured`; a part that fails is asked for again, alone, up to REASKS times.
+def choose_trend(state: AgentState) -> Tuple[str, str]:
+    """The Architect's (trend, reason); a reply without a usable reason re-asks for the reason alone."""
+    fields, missing = structured.parse_fields(generate_content(architect_prompt(state), structured.ARCHITECT).text, structured.ARCHITECT)
+    for attempt in range(1, REASKS + 1):
+        if not missing:
+            break
+        tracing.count("structured.reask", kind="architect")
+        if "trend" in fields:
+            prompt, schema = prompts.architect_reason(state["brand_desc"], fields["trend"]), structured.REASON
+            prompt = prompts.reask(prompt, "no reason", attempt - 1) if attempt > 1 else prompt
+        else:
+            prompt, schema = prompts.reask(architect_prompt(state), "no trend", attempt), structured.ARCHITECT
+        more, _ = structured.parse_fields(generate_content(prompt, schema).text, schema)
+        fields = {**more, **fields}
+        missing = [key for key in structured.ARCHITECT["required"] if key not in fields]
+    if "trend" not in fields:
+        tracing.count("structured.failed", kind="architect")
+    return fields.get("trend", state["topic"]), fields.get("reason", "")
+
+
+def top_up_posts(state: AgentState, posts: List[str]) -> List[str]:
+    """Drafts to add to `posts` (the valid ones so far), asking for only as many as are missing."""
+    added = []
+    for _ in range(REASKS):
+        missing = DRAFT_COUNT - len(posts) - len(added)
+        if missing <= 0:
+            break
+        tracing.count("structured.reask", kind="creative")
+        try: more = structured.parse_posts(generate_content(creative_prompt(state, missing, posts + added), structured.POSTS).text)
+        except Exception: break  # the drafts already written go ahead without the rest
+        added += [p for p in more if p not in posts and p not in added][:missing]
+    return added
+
+
+def write_draft(state: AgentState, index: int) -> str:
+    """One draft for `index`'s angle, asked for again if the reply holds no usable post."""
+    prompt = single_draft_prompt(state, index)
+    post = structured.parse_post(generate_content(prompt, structured.POST).text)
+    for attempt in range(1, REASKS + 1):
+        if post is not None:
+            break
+        tracing.count("structured.reask", kind="draft")
+        post = structured.parse_post(generate_content(prompts.reask(prompt, "no usable post", attempt), structured.POST).text)
+    return post or ""
+
+
+# --- AGENT NODES (serial) ---
+def scout_node(state: AgentState, status=null_status):
+    with status("📡 **Scout** researching live trends...", expanded=False) as s:
+        state["raw_trends"] = indexed_trends(state["topic"])
+        if state["raw_trends"]:
+            s.update(label=f"✅ Scout found {len(state['raw_trends'])} indexed trends", state="complete")
+            return state
+        try:
+            results = tavily_search(state["topic"])
+            state["raw_trends"] = [r['content'] for r in results[:TREND_COUNT]]
+            remember_trends(state["topic"], results)
+            s.update(label="✅ Scout found 3 live trends", state="complete")
+        except Exception:
+            state["raw_trends"] = ["No live trends found."]
+            s.update(label="⚠️ Scout research limited", state="error")
+    return state
+
+
+def architect_node(state: AgentState, status=null_status):
+    with status("📐 **Architect** strategizing...", expanded=False) as s:
+        state["selected_trend"], state["architect_reasoning"] = choose_trend(state)
+        s.update(label="✅ Architect strategy finalized", state="complete")
+    return state
+
+
+def creative_node(state: AgentState, status=null_status, is_novel: NoveltyCheck = _always_novel):
+    with status("🎨 **Creative** drafting content...", expanded=False) as s:
+        posts = structured.parse_posts(generate_content(creative_prompt(state), structured.POSTS).text)
+        posts += top_up_posts(state, posts)
+        state["final_posts"] = [p for p in posts if is_novel(p)]
+        s.update(label=f"✅ Creative generated {len(state['final_posts'])} drafts", state="complete")
+    return state
+
+
+def critic_node(state: AgentState, status=null_status, recent_posts: RecentPosts = _no_recent_posts):
+    with status("⚖️ **Critic** reviewing for consistency...", expanded=False) as s:
+        posts = state["final_posts"]
+        verdicts = prescreener(state, recent_posts).screen(posts)
+        notes = [f"Draft {i + 1}: {v.feedback()}" for i, v in enumerate(verdicts) if v.decision != prescreen.REVIEW]
+        borderline = [i for i, v in enumerate(verdicts) if v.decision == prescreen.REVIEW]
+        if borderline:
+            review = generate_content(critic_prompt(state, [posts[i] for i in borderline])).text
+            notes.append(review if not notes else f"Critic on drafts {', '.join(str(i + 1) for i in borderline)}: {review}")
+        state["critic_feedback"] = "\n\n".join(notes)
+        s.update(label=f"✅ Critic review complete ({len(posts) - len(borderline)} of {len(posts)} settled locally)", state="complete")
+    return state
+
+
+# --- AGENT NODES (concurrent) ---
+def scout_fanout_node(state: AgentState, status=null_status):
+    with status("📡 **Scout** researching live trends in parallel...", expanded=False) as s:
+        state["raw_trends"] = indexed_trends(state["topic"])
+        if state["raw_trends"]:
+            s.update(label=f"✅ Scout found {len(state['raw_trends'])} indexed trends", state="complete")
+            return state
+        queries = scout_queries(state["topic"])
+        futures = [get_executor().submit(tavily_search, q) for q in queries]
+        results, seen = [], set()
+        for future in futures:
+            try: batch = future.result()
+            except Exception: continue
+            for r in batch:
+                if r.get('content') and r['content'] not in seen:
+                    seen.add(r['content'])
+                    results.append(r)
+        results.sort(key=lambda r: r.get('score', 0), reverse=True)
+        remember_trends(state["topic"], results)
+        if results:
+            state["raw_trends"] = [r['content'] for r in results[:TREND_COUNT]]
+            s.update(label=f"✅ Scout merged {len(results)} results from {len(queries)} searches", state="complete")
+        else:
+            state["raw_trends"] = ["No live trends found."]
+            s.update(label="⚠️ Scout research limited", state="error")
+    return state
+
+
+def _review_draft(state: AgentState, post: str, screen: prescreen.Prescreener) -> str:
+    """The pre-screen's note when it settles the draft, else the Critic's."""
+    verdict = screen.screen([post])[0]
+    if verdict.decision != prescreen.REVIEW:
+        return verdict.feedback()
+    return generate_content(critic_prompt(state, [post])).text.strip()
+
+
+def draft_and_review_node(state: AgentState, status=null_status, is_novel: NoveltyCheck = _always_novel,
+                          recent_posts: RecentPosts = _no_recent_posts):
+    """Creative and Critic pipelined: each draft is its own request and is reviewed as soon as it lands."""
+    with status("🎨 **Creative** drafting while ⚖️ **Critic** reviews...", expanded=False) as s:
+        pool, screen = get_executor(), prescreener(state, recent_posts)
+        drafts = {pool.submit(write_draft, state, i): i for i in range(DRAFT_COUNT)}
+        posts, reviews = {}, {}
+        for future in as_completed(drafts):
+            i = drafts[future]
+            try: post = future.result()
+            except Exception: continue
+            if post and is_novel(post):
+                posts[i] = post
+                reviews[i] = pool.submit(_review_draft, state, post, screen)
+                s.update(label=f"🎨 Creative delivered draft {len(posts)}/{DRAFT_COUNT}, Critic reviewing...")
+        order = sorted(posts)
+        state["final_posts"] = [posts[i] for i in order]
+        feedback = []
+        for n, i in enumerate(order, 1):
+            try: feedback.append(f"Draft {n}: {reviews[i].result()}")
+            except Exception: feedback.append(f"Draft {n}: review unavailable")
+        state["critic_feedback"] = "\n\n".join(feedback)
+        s.update(label=f"✅ {len(order)} drafts generated and reviewed", state="complete")
+    return state
+
+
+# --- AGENT NODES (streaming) ---
+def _null_listener(event: str, index: int, text: str):
+    pass
+
+
+def stream_draft_and_review_node(state: AgentState, status=null_status, listener: Optional[DraftListener] = None,
+                                 is_novel: NoveltyCheck = _always_novel, recent_posts: RecentPosts = _no_recent_posts):
+    """Creative streams all drafts in one request; each is handed to the Critic the moment its closing quote arrives."""
+    listener = listener or _null_listener
+    with status("🎨 **Creative** streaming drafts while ⚖️ **Critic** reviews...", expanded=False) as s:
+        pool, screen = get_executor(), prescreener(state, recent_posts)
+        stream = structured.PostStream()
+        posts, feedback, reviews = [], {}, {}
+
+        def land(post: str):
+            if not is_novel(post):
+                return
+            reviews[pool.submit(_review_draft, state, post, screen)] = len(posts)
+            posts.append(post)
+            listener("draft", len(posts) - 1, post)
+            s.update(label=f"🎨 Creative delivered draft {len(posts)}, Critic reviewing...")
+
+        def collect(futures):
+            for future in futures:
+                i = reviews.pop(future)
+                try: feedback[i] = future.result()
+                except Exception: feedback[i] = "review unavailable"
+                listener("review", i, feedback[i])
+
+        with closing(stream_content(creative_prompt(state), structured.POSTS)) as chunks:  # frees the slot even if a hook raises
+            for chunk in chunks:
+                for post in stream.feed(chunk):
+                    land(post)
+                if stream.pending:
+                    listener("partial", len(posts), stream.pending)
+                collect([f for f in reviews if f.done()])
+        for post in stream.close():
+            land(post)
+        for post in top_up_posts(state, stream.posts):
+            land(post)
+        collect(as_completed(list(reviews)))
+
+        state["final_posts"] = posts
+        state["critic_feedback"] = "\n\n".join(f"Draft {i + 1}: {feedback[i]}" for i in range(len(posts)))
+        s.update(label=f"✅ {len(posts)} drafts streamed and reviewed", state="complete")
+    return state
+
+
+def _hooked(node, *hooks):
+    """Adapt a node so its progress hooks come from the invoke-time config, letting one compiled graph serve every run."""
+    span_name = "node." + node.__name__.removesuffix("_node")
+    def run(state: AgentState, config):
+        configurable = config.get("configurable", {})
+        with tracing.span(span_name):
+            return node(state, **{name: configurable[name] for name in hooks if configurable.get(name) is not None})
+    return run
+
+
+def run_config(status=None, listener: Optional[DraftListener] = None, is_novel: Optional[NoveltyCheck] = None,
+               recent_posts: Optional[RecentPosts] = None) -> dict:
+    """Per-run hooks for `graph.invoke(state, config=run_config(...))`."""
+    return {"configurable": {"status": status, "listener": listener, "is_novel": is_novel, "recent_posts": recent_posts}}
+
+
+def build_workflow(mode: str = "serial"):
+    """Compile the swarm graph for `mode`; progress hooks are passed per run via `run_config`."""
+    from langgraph.graph import StateGraph, END  # deferred: langgraph is the slowest import in the app
+    workflow = StateGraph(AgentState)
+    if mode in ("concurrent", "streaming"):
+        workflow.add_node("scout", _hooked(scout_fanout_node, "status"))
+        workflow.add_node("architect", _hooked(architect_node, "status"))
+        if mode == "streaming":
+            workflow.add_node("creative", _hooked(stream_draft_and_review_node, "status", "listener", "is_novel", "recent_posts"))
+        else:
+            workflow.add_node("creative", _hooked(draft_and_review_node, "status", "is_novel", "recent_posts"))
+        workflow.set_entry_point("scout")
+        workflow.add_edge("scout", "architect")
+        workflow.add_edge("architect", "creative")
+        workflow.add_edge("creative", END)
+        return workflow.compile()
+    workflow.add_node("scout", _hooked(scout_node, "status"))
+    workflow.add_node("architect", _hooked(architect_node, "status"))
+    workflow.add_node("creative", _hooked(creative_node, "status", "is_novel"))
+    workflow.add_node("critic", _hooked(critic_node, "status", "recent_posts"))
+    workflow.set_entry_point("scout")
+    workflow.add_edge("scout", "architect")
+    workflow.add_edge("architect", "creative")
+    workflow.add_edge("creative", "critic")
+    workflow.add_edge("critic", END)
+    return workflow.compile()
+
+
+@lru_cache(maxsize=None)
+def get_workflow(mode: str = "serial"):
+    """Process-wide compiled graph per mode; compiled graphs hold no run state and are safe to share."""
+    return build_workflow(mode)
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+import ratelimit
+import x_api
+from jobqueue import JobQueue, BroadcastWorkers, BROADCAST
+
+
+@pytest.fixture
+def x_env(monkeypatch):
+    for name in ("X_CONSUMER_KEY", "X_CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET"):
+        monkeypatch.setenv(name, "test")
+    # Leave the throttling to the stand-in, so its 429s reach the limiter's retry path
+    monkeypatch.setenv("RATE_LIMIT_X_RPM", "1000000")
+    monkeypatch.setenv("RATE_LIMIT_X_ATTEMPTS", "10")
+    ratelimit._configured_limiter.cache_clear()
+    yield
+    ratelimit._configured_limiter.cache_clear()
+
+
+def _broadcast(tmp_path, server, posts: int, workers: int = 2):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    run_id = queue.add_run("test", {"final_posts": [f"post number {i}" for i in range(posts)]})
+    jobs = queue.run(run_id)["jobs"]
+    for job in jobs:
+        queue.sign(job["id"], job["content"], {"signature": f"sig-{job['id']}", "payload": job["content"]})
+    client = x_api.build_client(server.url)
+    recorded = []
+    broadcaster = BroadcastWorkers(queue, lambda job: x_api.post_tweet(job["content"], client),
+                                   lambda job, tweet_id: recorded.append((job["id"], tweet_id)), workers=workers, poll_seconds=0.01)
+    try:
+        for job in jobs:
+            queue.enqueue(job["id"])
+        broadcaster.notify()
+        deadline = time.time() + 30
+        while queue.counts().get(BROADCAST, 0) < posts and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        broadcaster.stop()
+    return queue, queue.run(run_id)["jobs"], recorded
+
+
+def _assert_posted_once(server, jobs, recorded):
+    assert [job["status"] for job in jobs] == [BROADCAST] * len(jobs)
+    assert sorted(server.tweets.values()) == sorted(job["content"] for job in jobs)
+    assert {job["tweet_id"]: job["content"] for job in jobs} == server.tweets
+    assert sorted(recorded) == sorted((job["id"], job["tweet_id"]) for job in jobs)
+
+
+def test_each_job_is_posted_once(x_env, tmp_path):
+    server = x_api.StandInServer().start()
+    try:
+        _, jobs, recorded = _broadcast(tmp_path, server, posts=6)
+    finally:
+        server.shutdown()
+    _assert_posted_once(server, jobs, recorded)
+    assert server.rejected == 0
+
+
+def test_each_job_is_posted_once_after_429_retries(x_env, tmp_path):
+    server = x_api.StandInServer(limit=2, window=1.0).start()
+    try:
+        _, jobs, recorded = _broadcast(tmp_path, server, posts=5, workers=3)
+    finally:
+        server.shutdown()
+    assert server.rejected > 0
+    _assert_posted_once(server, jobs, recorded)
+    assert all(job["attempts"] == 1 for job in jobs)  # retried inside the limiter, never re-claimed
@@ -0,0 +1,63 @@
+import types
+
+import pytest
+
+import cache
+from cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock for the cache module; every read advances it a millisecond so accesses are ordered."""
+    now = [1_771_226_100.0]
+
+    def time():
+        now[0] += 0.001
+        return now[0]
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=time))
+    return now
+
+
+def _tracked_bytes(store: ResponseCache) -> int:
+    tracked, summed = store._conn().execute("SELECT bytes, (SELECT COALESCE(SUM(size), 0) FROM entries) FROM usage").fetchone()
+    assert tracked == summed
+    return tracked
+
+
+def test_entries_expire_after_their_namespace_ttl(tmp_path, clock):
+    store = ResponseCache(str(tmp_path / "cache.sqlite3"), ttls={"tavily": 60})
+    store.put("tavily", "trend", {"results": ["a"]})
+    store.put("gemini", "draft", "a post")
+    store.put("gemini", "short", "a post", ttl=5)
+    clock[0] += 30
+    assert store.get("tavily", "trend") == {"results": ["a"]} and store.get("gemini", "short") is None
+    clock[0] += 60
+    assert store.get("tavily", "trend") is None and store.get("gemini", "draft") == "a post"
+    store.put("gemini", "next", "x")  # a put purges what has expired
+    assert store.stats()["entries"] == 2 and _tracked_bytes(store) == len('"a post"') + len('"x"')
+
+
+def test_eviction_drops_the_least_recently_used_entries_first(tmp_path, clock):
+    value = "v" * 98  # 100 bytes once JSON-encoded
+    store = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=150 * 100)
+    for i in range(150):
+        store.put("gemini", f"k{i}", value)
+    for i in range(10):
+        assert store.get("gemini", f"k{i}") == value  # the oldest ten are now the most recently used
+    assert store.stats()["entries"] == 150
+    store.put("gemini", "k150", value)  # over budget: one chunk of the least recently used goes
+    kept = {i for i in range(151) if store.get("gemini", f"k{i}") is not None}
+    assert kept == set(range(10)) | set(range(74, 151))
+    assert _tracked_bytes(store) == len(kept) * 100 <= store.max_bytes
+
+
+def test_tracked_size_follows_overwrites_clears_and_reopening(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    store = ResponseCache(path)
+    store.put("gemini", "a", "x" * 10)
+    store.put("gemini", "b", "y" * 20)
+    store.put("gemini", "a", "z" * 40)  # an upsert: the size change goes through the resize trigger
+    assert _tracked_bytes(store) == 42 + 22
+    assert _tracked_bytes(ResponseCache(path)) == 64  # reopening does not seed the total twice
+    store.clear()
+    assert _tracked_bytes(store) == 0 and store.stats()["bytes"] == 0
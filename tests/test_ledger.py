@@ -0,0 +1,97 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import merkle
+import ledger
+from ledger import Ledger, import_json_array
+
+
+def _legacy_log(path, n: int = 5) -> str:
+    entries = [{"timestamp": 1_771_226_100 + i, "content": f"legacy post {i}", "tweet_id": f"DEMO_{i}",
+                "signature": "00", "public_key": "00"} for i in range(n)]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    return str(path)
+
+
+def test_legacy_import_runs_once_even_when_processes_start_together(tmp_path):
+    source = _legacy_log(tmp_path / "posts_log.json")
+    root = str(tmp_path / "ledger")
+    with ThreadPoolExecutor(4) as pool:
+        imported = list(pool.map(lambda _: import_json_array(Ledger(root), source), range(4)))
+    assert sorted(imported) == [0, 0, 0, 5]
+    assert Ledger(root).count() == 5 and Ledger(root).verify_chain()["ok"]
+
+
+def test_legacy_import_finishes_after_a_crash_before_its_marker(tmp_path):
+    source = _legacy_log(tmp_path / "posts_log.json")
+    log = Ledger(str(tmp_path / "ledger"))
+    with open(source, encoding="utf-8") as f:
+        log.extend(json.load(f)[:3])  # the crashed import got this far
+    assert import_json_array(log, source) == 2
+    assert [r["tweet_id"] for r in Ledger(log.root).tail(10)] == [f"DEMO_{i}" for i in range(5)]
+    assert os.path.exists(os.path.join(log.root, ledger.IMPORT_MARKER))
+    assert import_json_array(log, source) == 0
+
+
+def _sealed_ledger(root, n: int = 10, batch_size: int = 4) -> Ledger:
+    log = Ledger(root, batch_size=batch_size)
+    log.extend([{"timestamp": 1_771_226_100 + i, "content": f"post {i}"} for i in range(n)])
+    return log
+
+
+def _tamper(log: Ledger, seq: int, **changes):
+    """Rewrite one stored record in place, as an attacker editing the segment file would."""
+    path = log.segment_path(0)
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines[seq] = json.dumps({**json.loads(lines[seq]), **changes}, separators=(",", ":")) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+@pytest.mark.parametrize("n", range(1, 10))
+def test_every_merkle_path_proves_its_leaf_and_no_other(n):
+    leaves = [merkle.leaf_hash(bytes([i])) for i in range(n)]
+    root = merkle.merkle_root(leaves)
+    paths = merkle.merkle_paths(leaves)
+    assert paths == [merkle.merkle_path(leaves, i) for i in range(n)]
+    for i, path in enumerate(paths):
+        assert merkle.verify_path(leaves[i], path, root)
+        assert not merkle.verify_path(merkle.leaf_hash(b"forged"), path, root)
+    assert len(paths[0]) <= max(1, (n - 1).bit_length())
+
+
+def test_inclusion_proofs_verify_and_fail_once_the_record_is_altered(tmp_path):
+    log = _sealed_ledger(str(tmp_path / "ledger"))
+    assert log.sealed_through() == 7  # two full batches of 4; seqs 8-9 await a seal
+    for seq in range(8):
+        assert ledger.verify_proof(log.prove(seq))
+    proof = log.prove(5)
+    assert not ledger.verify_proof({**proof, "record": {**proof["record"], "content": "edited"}})
+    with pytest.raises(ledger.LedgerError):
+        log.prove(8)
+
+
+def test_editing_a_stored_record_breaks_the_chain_and_its_batch(tmp_path):
+    root = str(tmp_path / "ledger")
+    _sealed_ledger(root)
+    _tamper(Ledger(root), 5, content="edited")
+    log = Ledger(root)
+    assert log.verify_chain() == {"records": 5, "ok": False, "first_bad_seq": 5}
+    assert [log.verify_batch(b) for b in log.batches()] == [True, False]
+
+
+def test_rehashing_an_edited_record_still_breaks_the_next_link(tmp_path):
+    root = str(tmp_path / "ledger")
+    _sealed_ledger(root)
+    log = Ledger(root)
+    forged = {**next(r for r in log if r["seq"] == 2), "content": "edited"}
+    _tamper(log, 2, content="edited", hash=ledger.record_hash(forged))
+    log = Ledger(root)
+    assert log.verify_chain()["first_bad_seq"] == 3
+    assert not log.verify_batch(log.batches()[0])
+    assert log.verify_batches()["ok"]  # the roots alone cannot see it; that is what the deep check is for
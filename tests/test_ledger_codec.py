@@ -0,0 +1,52 @@
+import pytest
+
+import signing
+import ledger_codec
+from ledger import Ledger, record_hash
+
+
+def _signed_records(root, n: int = 12) -> list:
+    private_key, _ = signing.generate_keys()
+    log = Ledger(root, segment_max_bytes=4096)
+    log.extend([signing.sign_record(private_key, f"Rotate your keys, post {i} — ünïcode too.", 1_771_226_100 + i)
+                for i in range(n)])
+    log.extend([  # values that must not be stored raw: upper-case, odd-length and non-string "hex"
+        {"content": "odd one", "signature": "ABCDEF", "public_key": "abc", "key_id": None},
+        {"content": "no crypto fields at all", "hash_alg": "sha256"},
+    ])
+    return list(log)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_packed_records_decode_to_the_same_records_and_hashes(tmp_path, compress):
+    records = _signed_records(str(tmp_path / "ledger"))
+    path = str(tmp_path / "records.pack")
+    entries = ledger_codec.write_packed(path, records, compress=compress)
+    with ledger_codec.PackedSegment(path) as segment:
+        assert segment.compressed == compress and segment.count == len(records)
+        assert list(segment) == records
+        for (offset, _), record in zip(entries, records):
+            lazy = segment.record(offset, lazy=True)
+            assert lazy.to_dict() == record and dict(lazy) == record
+            assert lazy["hash"] == record["hash"] == record_hash(record)
+    assert ledger_codec.read_any(path) == records
+
+
+def test_only_exact_lower_case_hex_is_stored_raw():
+    record = {"hash": "00ff", "signature": "ABCDEF", "public_key": "abc", "key_id": 7}
+    payload = ledger_codec.encode(record)[ledger_codec.FRAME.size:]
+    assert ledger_codec.LazyRecord(payload).raw("hash") == b"\x00\xff"
+    assert all(ledger_codec.LazyRecord(payload).raw(name) is None for name in ("signature", "public_key", "key_id"))
+    assert ledger_codec.decode(payload) == record
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_packing_rotated_segments_keeps_the_chain_verifiable(tmp_path, compress):
+    root = str(tmp_path / "ledger")
+    records = _signed_records(root)
+    log = Ledger(root, segment_max_bytes=4096)
+    assert log.pack_segments(compress=compress)
+    log = Ledger(root, segment_max_bytes=4096)
+    assert list(log) == records
+    assert log.verify_chain() == {"records": len(records), "ok": True, "first_bad_seq": None}
+    assert all(signing.verify_record(r) for r in records[:12])
@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+import personas
+from personas import PersonaStore
+
+
+@pytest.fixture(autouse=True)
+def _recheck_every_call(monkeypatch):
+    monkeypatch.setattr(personas, "RECHECK_SECONDS", 0)
+
+
+def _corrupt(path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"version": 2, "brands": {"acme"')  # a half-written hand edit
+
+
+def test_a_corrupt_store_keeps_serving_the_last_good_snapshot(tmp_path, caplog):
+    store = PersonaStore(str(tmp_path / "personas.json"), str(tmp_path / "brand_profile.json"))
+    store.save("acme", "Explains money plainly.")
+    _corrupt(store.path)
+    assert store.get("acme").description == "Explains money plainly."
+    assert "not valid JSON" in caplog.text
+    assert store.save("acme", "Explains money very plainly.").version == 2  # and a save repairs the file
+    with open(store.path, encoding="utf-8") as f:
+        assert [v["version"] for v in json.load(f)["brands"]["acme"]["versions"]] == [1, 2]
+
+
+def test_a_corrupt_store_on_startup_falls_back_to_the_legacy_profile(tmp_path):
+    legacy = tmp_path / "brand_profile.json"
+    legacy.write_text(json.dumps({"description": "A legacy voice."}), encoding="utf-8")
+    _corrupt(tmp_path / "personas.json")
+    store = PersonaStore(str(tmp_path / "personas.json"), str(legacy))
+    assert store.get().description == "A legacy voice."
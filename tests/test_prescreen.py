@@ -0,0 +1,65 @@
+import pytest
+
+import prescreen
+from prescreen import FAIL, PASS, REVIEW, Prescreener
+
+PERSONA = "A cybersecurity researcher who shares phishing and password tips in a witty way."
+RECENT = ["Attackers now send fake invoice emails that mimic your vendors; verify payment changes by phone before wiring money."]
+ON_VOICE = "Phishing tip: hover before you click, because the link text and the real address rarely agree when it's a scam."
+OFF_VOICE_SPAM = "Big weekend for tomatoes in the garden 🍅🌱🌞🌻 #garden #tomato #spring #grow"
+
+
+@pytest.fixture
+def screener(monkeypatch):
+    monkeypatch.delenv("PRESCREEN", raising=False)
+    monkeypatch.delenv("PRESCREEN_BANNED", raising=False)
+    return Prescreener(PERSONA, RECENT)
+
+
+def test_clean_on_voice_drafts_pass_without_the_critic(screener):
+    (verdict,) = screener.screen([ON_VOICE])
+    assert verdict.decision == PASS and verdict.score >= prescreen.PASS_AT and verdict.reasons == ()
+
+
+@pytest.mark.parametrize("draft, reason", [
+    ("x" * 300, "300 characters, over the 280 limit"),
+    ("Stay safe online.", "17 characters, short"),
+    ("Our new VPN is unhackable, so your password worries are over, and phishing is a solved problem now.", "banned phrase 'unhackable'"),
+    (RECENT[0].replace(".", "!"), "100% like a recent post"),
+    ("Phishing season again #a #b #c #d #e #f, so check every sender address carefully before you click.", "6 hashtags"),
+])
+def test_hard_faults_fail_whatever_the_score(screener, draft, reason):
+    (verdict,) = screener.screen([draft])
+    assert verdict.decision == FAIL and reason in verdict.reasons
+
+
+def test_close_calls_are_left_for_the_critic(screener):
+    near_copy = "Attackers send fake invoice emails that mimic vendors; always verify payment changes by phone today. Stay sharp friends."
+    verdicts = screener.screen([OFF_VOICE_SPAM, near_copy])
+    assert [v.decision for v in verdicts] == [REVIEW, REVIEW]
+    assert all(prescreen.FAIL_AT <= v.score < prescreen.PASS_AT for v in verdicts)
+    assert {"4 hashtags", "4 emoji"} <= set(verdicts[0].reasons)
+    assert verdicts[1].reasons[0].startswith("close to a recent post")
+
+
+def test_one_batch_screens_each_draft_on_its_own(screener):
+    drafts = [ON_VOICE, "Stay safe online.", OFF_VOICE_SPAM]
+    assert [v.decision for v in screener.screen(drafts)] == [PASS, FAIL, REVIEW]
+    assert screener.screen(drafts) == [screener.screen([d])[0] for d in drafts]
+
+
+def test_thresholds_and_the_off_switch(screener, monkeypatch):
+    monkeypatch.setattr(prescreen, "FAIL_AT", 0.7)
+    assert screener.screen([OFF_VOICE_SPAM])[0].decision == FAIL
+    monkeypatch.setattr(prescreen, "FAIL_AT", 0.45)
+    monkeypatch.setattr(prescreen, "PASS_AT", 0.6)
+    assert screener.screen([OFF_VOICE_SPAM])[0].decision == PASS
+    monkeypatch.setenv("PRESCREEN", "off")
+    assert screener.screen([ON_VOICE, "x" * 300]) == [prescreen.Verdict(REVIEW, 0.0, ())] * 2
+
+
+def test_extra_banned_phrases_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("PRESCREEN_BANNED", "zero trust ; Mega Deal")
+    draft = "Today's mega deal on training: learn why hovering over links still beats trusting the display text, every time."
+    (verdict,) = Prescreener(PERSONA, RECENT).screen([draft])
+    assert verdict.decision == FAIL and "banned phrase 'mega deal'" in verdict.reasons
@@ -0,0 +1,29 @@
+import pytest
+
+import ratelimit
+
+
+class _HTTPError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize("message, status", [
+    ("429 Resource has been exhausted (e.g. check quota).", 429),
+    ("503 Server Error: Service Unavailable for url: https://api.tavily.com/search", 503),
+    ("Request failed with status 502", 502),
+    ("upstream answered HTTP/1.1 504", 504),
+    ("backend said 500 Internal Server Error", 500),
+    ("Prompt mentions 500 users and a 503-day streak", None),
+    ("max_output_tokens 429 is not allowed", None),
+    ("Tweet 1800000000000000503 not found", None),
+])
+def test_status_is_read_only_where_a_message_states_one(message, status):
+    assert ratelimit.status_of(ValueError(message)) == status
+
+
+def test_status_attribute_wins_over_the_message():
+    assert ratelimit.status_of(_HTTPError("the 503 in this prompt", 400)) == 400
+    assert ratelimit.is_retryable(_HTTPError("no code in text", 503))
+    assert not ratelimit.is_retryable(ValueError("draft 3 of 500 rejected"))
@@ -0,0 +1,13 @@
+from ledger import Ledger
+from search import SearchIndex
+
+
+def test_search_skips_posts_the_sidecar_index_has_not_caught_up_with(tmp_path):
+    log = Ledger(str(tmp_path / "ledger"))
+    log.extend([{"timestamp": 1_771_226_100 + i, "content": f"phishing kits spread through fake invoices, wave {i}"}
+                for i in range(3)])
+    index = SearchIndex(log)
+    assert index.sync() == 3
+    log.index.truncate(1)  # as after a crash between the FTS commit and the sidecar index append
+    assert [r["seq"] for r in index.search("phishing invoices")] == [0]
+    assert [r["seq"] for r in index.near_duplicates("phishing kits spread through fake invoices, wave 0")] == [0]
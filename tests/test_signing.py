@@ -0,0 +1,72 @@
+import os
+import json
+import hashlib
+
+import ecdsa
+import pytest
+
+import signing
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _legacy_entry(content: str, signed_at: int, logged_at: int) -> dict:
+    """An entry as the original app logged it: ecdsa's default SHA-1 prehash over SHA-256(content|TS:<sign time>)."""
+    key = ecdsa.SigningKey.generate(curve=ecdsa.SECP256k1)
+    digest = hashlib.sha256(signing.make_payload(content, signed_at).encode()).digest()
+    return {"timestamp": logged_at, "content": content, "signature": key.sign(digest).hex(),
+            "tweet_id": f"DEMO_{logged_at}", "public_key": key.verifying_key.to_string().hex()}
+
+
+def test_baseline_log_entries_still_verify():
+    with open(os.path.join(ROOT, "posts_log.json"), encoding="utf-8") as f:
+        entries = [e for e in json.load(f) if e.get("signature")]
+    assert entries
+    assert all(signing.verify_record(entry) for entry in entries)
+
+
+def test_legacy_entry_verifies_within_the_timestamp_window():
+    entry = _legacy_entry("Rotate your API keys before they rotate you.", 1_771_226_100, 1_771_226_130)
+    assert signing.verify_record(entry)
+    assert not signing.verify_record(entry, window=10)
+    assert not signing.verify_record({**entry, "content": entry["content"] + "!"})
+
+
+def test_format_1_record_verifies():
+    private_key, _ = signing.generate_keys()
+    record = signing.sign_record(private_key, "Passkeys beat passwords.", timestamp=1_771_226_100)
+    assert record["format"] == signing.RECORD_FORMAT
+    assert signing.verify_record(record)
+    assert signing.verify_record({k: v for k, v in record.items() if k != "public_key"}, {record["key_id"]: record["public_key"]})
+    assert not signing.verify_record({**record, "payload": signing.make_payload("Passwords beat passkeys.", 1_771_226_100)})
+
+
+BACKENDS = signing.available_backends()
+PAIRS = [(signer, verifier) for signer in sorted(BACKENDS) for verifier in sorted(BACKENDS)
+         if BACKENDS[signer].curve == BACKENDS[verifier].curve]
+
+
+@pytest.mark.parametrize("signer, verifier", PAIRS)
+def test_records_signed_by_one_backend_verify_under_another(signer, verifier):
+    sign_with, verify_with = signing.load_backend(signer), signing.load_backend(verifier)
+    private_key = sign_with.generate_private_key()
+    record = signing.sign_record(private_key, "Same record, any backend.", backend=sign_with)
+    batch = signing.sign_batch(private_key, ["First of a batch.", "Second of a batch."], backend=sign_with)
+    assert signing.verify_record(record, backend=verify_with)
+    assert all(signing.verify_record(r, backend=verify_with) for r in batch)
+    forged = {**record, "payload": signing.make_payload("Not what was signed.", 0)}
+    assert not signing.verify_record(forged, backend=verify_with)
+
+
+@pytest.mark.parametrize("verifier", sorted(n for n, b in BACKENDS.items() if b.curve == signing.CURVE))
+def test_legacy_entries_verify_under_every_secp256k1_backend(verifier):
+    entry = _legacy_entry("Legacy posts predate pluggable backends.", 1_771_226_100, 1_771_226_105)
+    assert signing.verify_record(entry, backend=signing.load_backend(verifier))
+
+
+def test_a_verifier_for_another_curve_rejects_the_record():
+    if "ed25519" not in BACKENDS:
+        pytest.skip("no Ed25519 backend installed")
+    private_key, _ = signing.generate_keys(signing.backend_for(signing.CURVE))
+    record = signing.sign_record(private_key, "secp256k1 only.", backend=signing.backend_for(signing.CURVE))
+    assert not signing.verify_record(record, backend=BACKENDS["ed25519"])
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+import structured
+from structured import PostStream, parse_posts
+
+A = "Use a password manager; reuse is how one breach becomes ten."
+B = "Turn on MFA for email first, because every reset link lands there."
+TRICKY = 'Attackers love "urgent" invoices [and fake \\ paths] — slow down before you pay.'
+REPLY = json.dumps({"posts": [A, B]})
+
+
+@pytest.mark.parametrize("reply", [
+    REPLY,
+    f"```json\n{REPLY}\n```",
+    f"Sure! Here you go:\n{REPLY}\nHope this helps.",
+    json.dumps([A, {"content": B}]),
+    json.dumps({"drafts": [A, B]}),
+    json.dumps({"posts": [A, 42, {"text": B}, "short", A, None]}),
+    f'Here are 2 X posts:\n---\n1. {A}\n---\nPost 2: "{B}"\n---\nLet me know if you want more!',
+])
+def test_posts_survive_wrappers_and_junk_items(reply):
+    assert parse_posts(reply) == [A, B]
+
+
+@pytest.mark.parametrize("reply, posts", [
+    (REPLY[:REPLY.index(B) + 20], [A]),  # cut off inside the second post
+    (REPLY[:REPLY.index(B) - 3], [A]),  # cut off between the posts
+    (REPLY[:20], []),  # cut off inside the first post
+    ('{"posts": ["' + A + '", oops, "' + B + '"', [A, B]),  # invalid JSON between valid strings
+    ("{not json at all", []),
+    ("", []),
+])
+def test_partial_or_malformed_json_keeps_only_complete_posts(reply, posts):
+    assert parse_posts(reply) == posts
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_stream_releases_each_post_once_its_closing_quote_arrives(size):
+    reply = json.dumps({"posts": [A, TRICKY, B, A]})
+    stream, released = PostStream(), []
+    for i in range(0, len(reply), size):
+        chunk = reply[i:i + size]
+        released.append(stream.feed(chunk))
+        assert all(reply.index(json.dumps(p)) + len(json.dumps(p)) <= i + len(chunk) for p in released[-1])
+    assert [p for batch in released for p in batch] == [A, TRICKY, B] == parse_posts(reply)
+    assert stream.close() == [] and stream.pending == ""
+
+
+def test_stream_shows_the_post_in_progress():
+    stream = PostStream()
+    assert stream.feed('{"posts": ["' + A[:25]) == []
+    assert stream.pending == A[:25].strip()
+    assert stream.feed(A[25:] + '", "Line one\\') == [A]
+    assert stream.pending == "Line one"  # a dangling escape is not shown
+    assert stream.feed('nline two') == [] and stream.pending == "Line one\nline two"
+
+
+def test_stream_of_a_reply_that_ignored_json_mode_yields_its_posts_on_close():
+    stream = PostStream()
+    assert stream.feed(f"{A}\n---\n") == [] and stream.feed(B) == []
+    assert stream.close() == [A, B] and stream.posts == [A, B]
+
+
+def test_truncated_stream_keeps_the_posts_already_released():
+    stream = PostStream()
+    assert stream.feed(REPLY[:REPLY.index(B) + 20]) == [A]
+    assert stream.close() == [] and stream.posts == [A]
+
+
+@pytest.mark.parametrize("reply, fields, missing", [
+    ('{"trend": "AI phishing", "reason": "it is rising"}', {"trend": "AI phishing", "reason": "it is rising"}, []),
+    ('{"trend": "AI phishing", "reason": 5}', {"trend": "AI phishing"}, ["reason"]),
+    ("TREND: **AI phishing**\nREASON: it is rising", {"trend": "AI phishing", "reason": "it is rising"}, []),
+    ('{"trend": "AI ph', {}, ["trend", "reason"]),
+])
+def test_architect_fields_are_validated_and_missing_ones_named(reply, fields, missing):
+    assert structured.parse_fields(reply, structured.ARCHITECT) == (fields, missing)
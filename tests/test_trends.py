@@ -0,0 +1,116 @@
+import time
+import threading
+
+import pytest
+
+import trends
+
+
+class FakeSearch:
+    """Stands in for `swarm.tavily_search`: canned results per query, counting calls."""
+    def __init__(self, results: dict):
+        self.results = results
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, query: str):
+        with self.lock:
+            self.calls.append(query)
+        value = self.results[query]
+        if isinstance(value, Exception):
+            raise value
+        return [dict(r) for r in value]
+
+
+STORY = "Attackers now clone voices from a few seconds of audio to approve wire transfers."
+
+
+@pytest.fixture
+def index(tmp_path):
+    return trends.TrendIndex(str(tmp_path / "trends.sqlite3"))
+
+
+def test_ingest_merges_the_same_story_across_urls_and_queries(index):
+    search = FakeSearch({
+        "voice cloning": [
+            {"url": "https://www.example.com/voice-scams/?utm_source=x&utm_medium=social", "content": STORY, "score": 0.6},
+            {"url": "https://example.com/voice-scams#comments", "content": STORY + " (updated)", "score": 0.9},
+            {"url": "https://mirror.example.net/story/123", "content": STORY.upper().replace(".", "!"), "score": 0.4},
+        ],
+        "deepfake fraud": [
+            {"url": "https://example.com/voice-scams", "content": STORY, "score": 0.5},
+            {"url": "https://example.org/qr-phishing", "content": "QR codes in parking lots lead to fake payment pages.", "score": 0.7},
+        ],
+    })
+    ingestor = trends.TrendIngestor(index, search, queries=lambda topic: ["voice cloning", "deepfake fraud"])
+    assert ingestor.pull("Social engineering") == 2
+    assert index.stats() == {"trends": 2, "sightings": 5, "topics": 0}
+    best = index.query("social  ENGINEERING", limit=5)
+    assert [t["url"] for t in best] == ["https://example.com/voice-scams", "https://example.org/qr-phishing"]
+    assert best[0]["seen"] == 4 and best[0]["score"] == 0.9
+
+    assert ingestor.pull("Social engineering") == 0  # a repeat pull only adds sightings
+    assert index.stats()["trends"] == 2
+
+
+def test_run_once_refreshes_due_topics_and_keeps_failures_due(index):
+    search = FakeSearch({"passkeys": [{"url": "https://a.example/1", "content": "Passkeys reach half of logins."}],
+                         "sim swaps": RuntimeError("search down")})
+    index.watch("passkeys")
+    index.watch("sim swaps")
+    ingestor = trends.TrendIngestor(index, search, interval=3600)
+    report = ingestor.run_once()
+    assert report == {"passkeys": 1, "sim swaps": "RuntimeError: search down"}
+    assert index.due(3600) == ["sim swaps"]
+    assert [t["error"] for t in index.topics()] == [None, "RuntimeError: search down"]
+
+    search.results["sim swaps"] = [{"url": "https://b.example/2", "content": "Carriers add port-out PINs."}]
+    assert ingestor.run_once() == {"sim swaps": 1}  # passkeys is not due again yet
+    assert sorted(search.calls) == ["passkeys", "sim swaps", "sim swaps"]
+    assert index.due(3600) == []
+
+
+def test_live_searched_topics_are_not_pulled_in_the_background(index):
+    search = FakeSearch({"passkeys": [{"url": "https://a.example/1", "content": "Passkeys reach half of logins."}],
+                         "one-off topic": [{"url": "https://a.example/2", "content": "A topic typed once."}]})
+    index.watch("passkeys")
+    index.ingest("one-off topic", search("one-off topic"))  # what the Scout does after a live search
+    assert index.query("one-off topic")
+    ingestor = trends.TrendIngestor(index, search, interval=0)
+    for _ in range(3):
+        ingestor.run_once()
+    assert search.calls == ["one-off topic", "passkeys", "passkeys", "passkeys"]
+    assert [t["query"] for t in index.topics()] == ["passkeys"]
+
+    assert index.prune(now=time.time() + trends.MAX_AGE_H * 3600 + 1) == 2
+    assert index.due(0) == ["passkeys"]  # pruning forgets the idle topic, never a watched one
+    assert not index._conn().execute("SELECT 1 FROM topics WHERE topic = 'one-off topic'").fetchone()
+
+
+def test_stale_topics_are_not_served_until_refreshed(index):
+    search = FakeSearch({"ransomware": [{"url": "https://c.example/1", "content": "Ransomware crews now skip encryption."}]})
+    index.watch("ransomware")
+    ingestor = trends.TrendIngestor(index, search, interval=0)
+    ingestor.pull("ransomware")
+    later = time.time() + trends.FRESH_S + 1
+    assert index.query("ransomware") and not index.query("ransomware", now=later)
+
+    search.results["ransomware"].append({"url": "https://c.example/2", "content": "Backups are the first target."})
+    assert ingestor.run_once() == {"ransomware": 1}
+    assert {t["url"] for t in index.query("ransomware", limit=5)} == {"https://c.example/1", "https://c.example/2"}
+    assert index.prune(now=time.time() + trends.MAX_AGE_H * 3600 + 1) == 2
+    assert index.stats()["trends"] == 0
+
+
+def test_background_ingestor_pulls_newly_watched_topics(index):
+    search = FakeSearch({"MFA fatigue": [{"url": "https://d.example/1", "content": "Push bombing is back."}]})
+    ingestor = trends.TrendIngestor(index, search, poll_seconds=60).start()
+    try:
+        index.watch("MFA fatigue")
+        ingestor.notify()
+        deadline = time.time() + 5
+        while not index.query("mfa fatigue") and time.time() < deadline:
+            time.sleep(0.02)
+    finally:
+        ingestor.stop(5)
+    assert [t["url"] for t in index.query("mfa fatigue")] == ["https://d.example/1"]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import keystore
+import verify_ledger
+from ledger import Ledger
+
+
+def _populate(root: str, keys: str, n: int = 9):
+    store = keystore.KeyStore(keys)
+    store.rotate()
+    singles = [{**store.sign_record(f"single post {i}"), "content": f"single post {i}"} for i in range(n)]
+    batch = [{**r, "content": f"batched post {i}"} for i, r in enumerate(store.sign_batch([f"batched post {i}" for i in range(3)]))]
+    Ledger(root).extend(singles + batch + [{"content": "never signed", "timestamp": 1_771_226_100}])
+
+
+def _corrupt(root: str, seq: int, **changes):
+    log = Ledger(root)
+    path = log.segment_path(0)
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    lines[seq] = json.dumps({**json.loads(lines[seq]), **changes}, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_an_intact_ledger_verifies_apart_from_unsigned_posts(tmp_path, workers):
+    root, keys = str(tmp_path / "ledger"), str(tmp_path / "keys")
+    _populate(root, keys)
+    summary = verify_ledger.verify_ledger(root, keys, workers=workers, chunk_size=4)
+    assert (summary["total"], summary["valid"], summary["invalid"]) == (13, 12, 1)
+    assert summary["reasons"] == {"unsigned": 1}
+    assert summary["chain_ok"] and summary["first_bad_seq"] is None
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("seq, changes, reason", [
+    (4, {"content": "single post 4, edited"}, "content mismatch"),
+    (6, {"payload": "single post 6, edited|TS:1771226100"}, "bad signature"),
+    (10, {"payload": "batched post 1, edited"}, "bad signature"),
+    (2, {"key_id": "0000000000000000"}, "unknown key"),
+])
+def test_a_corrupted_entry_is_reported_with_its_reason_and_breaks_the_chain(tmp_path, workers, seq, changes, reason):
+    root, keys = str(tmp_path / "ledger"), str(tmp_path / "keys")
+    _populate(root, keys)
+    _corrupt(root, seq, **changes)
+    results = []
+    summary = verify_ledger.verify_ledger(root, keys, workers=workers, chunk_size=4, on_result=results.append)
+    assert [r["seq"] for r in results] == list(range(13))
+    assert [r["seq"] for r in results if not r["ok"]] == sorted([seq, 12])
+    assert results[seq]["reason"] == reason
+    assert not summary["chain_ok"] and summary["first_bad_seq"] == seq
@@ -0,0 +1,252 @@
+"""Lightweight spans, counters and latency histograms for the hot paths.
+
+    with tracing.span("gemini.generate", prompt_chars=len(prompt)):
+        ...
+    tracing.count("ratelimit.retry", service="gemini")
+
+Every finished span is observed into a per-name latency histogram (fixed
+millisecond buckets, so memory stays constant however long the process
+runs) and, when `TRACE_FILE` is set, appended to that JSONL file by a
+background writer so the caller never waits on disk. Spans nest per thread
+or task: each records its parent's id.
+
+`METRICS_PORT` makes `serve()` expose the registry over HTTP:
+
+    GET /metrics        Prometheus text format
+    GET /metrics.json   the `snapshot()` dict
+
+and `python tracing.py traces.jsonl` summarises an exported trace file.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import bisect
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE")
+METRICS_PORT = os.getenv("METRICS_PORT")
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+_current: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span", default=None)
+
+
+# --- METRICS ---
+class Histogram:
+    """Bucketed latency distribution; percentiles are read off the bucket bounds."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+
+    def observe(self, ms: float, error: bool = False):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.errors += error
+
+    def percentile(self, q: float) -> float:
+        rank, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= rank:
+                return round(min(bound, self.max_ms), 1)
+        return round(self.max_ms, 1)
+
+    def summary(self) -> dict:
+        return {"count": self.count, "errors": self.errors, "total_ms": round(self.total_ms, 1),
+                "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+                "p50_ms": self.percentile(0.5), "p95_ms": self.percentile(0.95), "max_ms": round(self.max_ms, 1)}
+
+
+def _series(name: str, labels: dict) -> str:
+    return name + ("{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}" if labels else "")
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+
+    def observe(self, name: str, ms: float, error: bool = False):
+        with self._lock:
+            if name not in self.histograms: self.histograms[name] = Histogram()
+            self.histograms[name].observe(ms, error)
+
+    def count(self, name: str, n: float = 1, **labels):
+        series = _series(name, labels)
+        with self._lock:
+            self.counters[series] = self.counters.get(series, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"spans": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                    "counters": dict(sorted(self.counters.items()))}
+
+    def prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                metric = "authentipost_span_ms"
+                cumulative = 0
+                for bound, n in zip(BUCKETS_MS + ("+Inf",), h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {h.total_ms:.3f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {h.count}')
+                lines.append(f'authentipost_span_errors_total{{span="{name}"}} {h.errors}')
+            for series, value in sorted(self.counters.items()):
+                name, _, labels = series.partition("{")
+                lines.append(f"authentipost_{name.replace('.', '_')}_total{'{' + labels if labels else ''} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+REGISTRY = Registry()
+
+
+# --- EXPORT ---
+class JsonlExporter:
+    """Appends span records to a JSONL file from a daemon thread, so spans never block on I/O."""
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[dict]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-export", daemon=True)
+        self._thread.start()
+
+    def export(self, record: dict):
+        self._queue.put(record)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                record = self._queue.get()
+                if record is None:
+                    return
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if self._queue.empty(): f.flush()  # batch writes while spans are arriving quickly
+
+
+_exporter: Optional[JsonlExporter] = JsonlExporter(TRACE_FILE) if TRACE_FILE else None
+
+
+# --- SPANS ---
+def record(name: str, seconds: float, error: Optional[str] = None, parent: Optional[str] = None, **attrs):
+    """Account a timed operation that could not be wrapped in `span` (e.g. one spread across a generator)."""
+    REGISTRY.observe(name, seconds * 1000, error is not None)
+    if _exporter:
+        _exporter.export({"name": name, "start": round(time.time() - seconds, 6), "ms": round(seconds * 1000, 3),
+                          "parent": parent, "thread": threading.current_thread().name, "error": error, **attrs})
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time the block as `name`; an exception marks the span as errored and is re-raised."""
+    span_id = uuid.uuid4().hex[:16]
+    parent = _current.get()
+    token = _current.set(span_id)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs  # callers may add attributes discovered inside the block
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        record(name, time.perf_counter() - started, error, parent, id=span_id, **attrs)
+
+
+def traced(name: str):
+    """Decorator form of `span`."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name: str, n: float = 1, **labels):
+    REGISTRY.count(name, n, **labels)
+
+
+def snapshot() -> dict:
+    return REGISTRY.snapshot()
+
+
+# --- ENDPOINT ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, kind = REGISTRY.prometheus().encode(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, kind = json.dumps(REGISTRY.snapshot()).encode(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", kind)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Expose the registry on http://host:port/metrics from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+# --- OFFLINE SUMMARY ---
+def summarize(lines: Iterable[str]) -> Dict[str, dict]:
+    registry = Registry()
+    for line in lines:
+        try: span_record = json.loads(line)
+        except ValueError: continue  # a torn last line from a killed process
+        registry.observe(span_record["name"], span_record["ms"], span_record.get("error") is not None)
+    return registry.snapshot()["spans"]
+
+
+def format_table(spans: Dict[str, dict]) -> List[str]:
+    rows = [f"{'span':<32}{'count':>8}{'errors':>8}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}"]
+    for name, s in sorted(spans.items(), key=lambda item: -item[1]["total_ms"]):
+        rows.append(f"{name:<32}{s['count']:>8}{s['errors']:>8}{s['mean_ms']:>10.1f}{s['p50_ms']:>10g}{s['p95_ms']:>10g}{s['total_ms'] / 1000:>10.2f}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise an AuthentiPost trace file")
+    parser.add_argument("path", nargs="?", default=TRACE_FILE or "traces.jsonl")
+    args = parser.parse_args(argv)
+    with open(args.path, encoding="utf-8") as f:
+        print("\n".join(format_table(summarize(f))))
+
+
+if __name__ == "__main__":
+    main()
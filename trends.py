@@ -0,0 +1,389 @@
+"""Local trend index, kept fresh by background ingestion.
+
+Instead of a blocking web search in every swarm run, `TrendIngestor` pulls
+search results for watched topics on a timer and `TrendIndex` stores them
+in SQLite (WAL mode, one connection per thread). The Scout then reads the
+best few in milliseconds and only falls back to a live search for a topic
+that has not been pulled recently; that live result is ingested too, so
+runs on the same topic are served from the index while it stays fresh.
+Only watched topics (`TREND_TOPICS`, or `python trends.py watch`) are
+pulled in the background, so the search quota does not grow with every
+topic a user types.
+
+Results are deduplicated by normalised URL (tracking parameters, fragments
+and `www.` dropped) and by a hash of their normalised text, so the same
+story syndicated under several URLs, or returned by several queries, is
+stored once; repeat sightings raise its `seen` count instead. Trends are
+ranked by source score, decayed by age (published date when the source
+gives one, else first sighting) with a `TRENDS_HALF_LIFE_H` half-life.
+
+    TRENDS=off               live search in every run, no index
+    TRENDS_DB=...            database location (default trends.sqlite3)
+    TREND_TOPICS="a;b"       topics watched from startup
+    TRENDS_INTERVAL_S=900    seconds between background pulls of a topic
+    TRENDS_WORKERS=2         topics pulled at once (searches still pass the rate limiter)
+    TRENDS_FRESH_S=3600      a topic pulled longer ago than this is searched live
+    TRENDS_HALF_LIFE_H=24    recency half-life used in ranking
+    TRENDS_MAX_AGE_H=168     trends not seen for this long are pruned
+
+    python trends.py watch "Latest social engineering tactics"
+    python trends.py ingest --once
+    python trends.py query "Latest social engineering tactics"
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Callable, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import tracing
+
+TRENDS_DB = "trends.sqlite3"
+INTERVAL_S = float(os.getenv("TRENDS_INTERVAL_S", "900"))
+FRESH_S = float(os.getenv("TRENDS_FRESH_S", "3600"))
+HALF_LIFE_H = float(os.getenv("TRENDS_HALF_LIFE_H", "24"))
+MAX_AGE_H = float(os.getenv("TRENDS_MAX_AGE_H", "168"))
+WORKERS = int(os.getenv("TRENDS_WORKERS", "2"))
+CANDIDATES = 200  # newest trends per topic considered for ranking
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|ref_src)$", re.I)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trends (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    content_hash TEXT NOT NULL UNIQUE,
+    title TEXT,
+    content TEXT NOT NULL,
+    score REAL NOT NULL,
+    published REAL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS trends_last_seen ON trends(last_seen);
+CREATE TABLE IF NOT EXISTS trend_topics (
+    topic TEXT NOT NULL,
+    trend_id INTEGER NOT NULL,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (topic, trend_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trend_topics_trend ON trend_topics(trend_id);
+CREATE TABLE IF NOT EXISTS topics (
+    topic TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    added REAL NOT NULL,
+    pulled REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    watched INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+log = logging.getLogger(__name__)
+
+
+# --- NORMALISATION ---
+def topic_key(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    """One spelling per page: lowercase host without `www.`, no fragment, tracking or trailing slash."""
+    if not url or not url.strip():
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."): host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/") or "/", query, ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash of the words alone, so punctuation, case, links and spacing differences collapse."""
+    words = re.findall(r"\w+", re.sub(r"https?://\S+", " ", text.lower()))
+    return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()[:32]
+
+
+def parse_published(value) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try: return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError: pass
+    try: return parsedate_to_datetime(str(value)).timestamp()
+    except (TypeError, ValueError): return None
+
+
+def rank(score: float, age_s: float, seen: int, half_life_h: float = HALF_LIFE_H) -> float:
+    return score * 0.5 ** (max(age_s, 0) / 3600 / half_life_h) * (1 + 0.25 * (min(seen, 5) - 1))
+
+
+class TrendIndex:
+    def __init__(self, path: str = TRENDS_DB):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+            if "watched" not in {row["name"] for row in conn.execute("PRAGMA table_info(topics)")}:
+                # indexes from before watching was explicit: every live-searched topic used to be pulled forever
+                conn.execute("ALTER TABLE topics ADD COLUMN watched INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # re-pullable from the source, so a cache in effect
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- TOPICS ---
+    def watch(self, topic: str):
+        """Pull `topic` in the background from now on."""
+        self._transaction(lambda conn: conn.execute("INSERT INTO topics (topic, query, added, watched) VALUES (?, ?, ?, 1) "
+                                                    "ON CONFLICT (topic) DO UPDATE SET watched = 1",
+                                                    (topic_key(topic), topic.strip(), time.time())))
+
+    def unwatch(self, topic: str):
+        self._transaction(lambda conn: conn.execute("DELETE FROM topics WHERE topic = ?", (topic_key(topic),)))
+
+    def topics(self) -> List[dict]:
+        """Watched topics and their last pull."""
+        return [dict(r) for r in self._conn().execute("SELECT * FROM topics WHERE watched ORDER BY topic")]
+
+    def due(self, interval: float = INTERVAL_S, now: Optional[float] = None) -> List[str]:
+        """Search queries of watched topics last pulled more than `interval` ago, stalest first."""
+        now = time.time() if now is None else now
+        return [r["query"] for r in self._conn().execute("SELECT query FROM topics WHERE watched AND pulled <= ? ORDER BY pulled",
+                                                         (now - interval,))]
+
+    def mark_failed(self, topic: str, error: str):
+        """Record a failed pull; the topic stays due, so it is retried on the next pass."""
+        self._transaction(lambda conn: conn.execute("UPDATE topics SET error = ? WHERE topic = ?", (error, topic_key(topic))))
+
+    # --- INGESTION ---
+    def ingest(self, topic: str, results: Iterable[dict], now: Optional[float] = None) -> int:
+        """Store search results for `topic`, merging duplicates; marks the topic pulled but does not watch it. Returns new trends."""
+        now = time.time() if now is None else now
+        key = topic_key(topic)
+        rows = []
+        for r in results:
+            text = " ".join(str(r.get("content") or "").split())
+            if text:
+                rows.append((normalize_url(r.get("url")), content_hash(text), r.get("title"), text,
+                             float(r.get("score") or 0.5), parse_published(r.get("published_date") or r.get("published"))))
+
+        def write(conn: sqlite3.Connection) -> int:
+            added = 0
+            for url, digest, title, text, score, published in rows:
+                match = conn.execute("SELECT id FROM trends WHERE content_hash = ? OR url = ? LIMIT 1", (digest, url)).fetchone()
+                if match is None:
+                    trend_id = conn.execute(
+                        "INSERT INTO trends (url, content_hash, title, content, score, published, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, digest, title, text, score, published, now, now)).lastrowid
+                    added += 1
+                else:
+                    trend_id = match["id"]
+                    conn.execute("UPDATE trends SET score = MAX(score, ?), last_seen = ?, seen = seen + 1, "
+                                 "published = COALESCE(published, ?) WHERE id = ?", (score, now, published, trend_id))
+                conn.execute("INSERT INTO trend_topics (topic, trend_id, last_seen) VALUES (?, ?, ?) "
+                             "ON CONFLICT (topic, trend_id) DO UPDATE SET last_seen = excluded.last_seen", (key, trend_id, now))
+            conn.execute("INSERT INTO topics (topic, query, added, pulled) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT (topic) DO UPDATE SET pulled = excluded.pulled, error = NULL", (key, topic.strip(), now, now))
+            return added
+        added = self._transaction(write)
+        tracing.count("trends.ingested", len(rows))
+        tracing.count("trends.new", added)
+        return added
+
+    def prune(self, max_age_h: float = MAX_AGE_H, now: Optional[float] = None) -> int:
+        cutoff = (time.time() if now is None else now) - max_age_h * 3600
+
+        def write(conn: sqlite3.Connection) -> int:
+            conn.execute("DELETE FROM trend_topics WHERE last_seen < ?", (cutoff,))
+            conn.execute("DELETE FROM topics WHERE NOT watched AND pulled < ?", (cutoff,))
+            return conn.execute("DELETE FROM trends WHERE last_seen < ?", (cutoff,)).rowcount
+        return self._transaction(write)
+
+    # --- QUERIES ---
+    def query(self, topic: str, limit: int = 3, fresh_within: Optional[float] = FRESH_S, now: Optional[float] = None) -> List[dict]:
+        """Best-ranked trends for `topic`; empty if it was never pulled or not within `fresh_within` seconds."""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        key = topic_key(topic)
+        if fresh_within is not None:
+            row = conn.execute("SELECT pulled FROM topics WHERE topic = ?", (key,)).fetchone()
+            if row is None or row["pulled"] < now - fresh_within:
+                return []
+        rows = conn.execute("SELECT t.* FROM trend_topics tt JOIN trends t ON t.id = tt.trend_id WHERE tt.topic = ? "
+                            "ORDER BY tt.last_seen DESC LIMIT ?", (key, CANDIDATES)).fetchall()
+        trends = [{**dict(r), "rank": rank(r["score"], now - (r["published"] or r["first_seen"]), r["seen"])} for r in rows]
+        trends.sort(key=lambda t: t["rank"], reverse=True)
+        return trends[:limit]
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        trends, seen = conn.execute("SELECT COUNT(*), COALESCE(SUM(seen), 0) FROM trends").fetchone()
+        topics = conn.execute("SELECT COUNT(*) FROM topics WHERE watched").fetchone()[0]
+        return {"trends": trends, "sightings": seen, "topics": topics}
+
+
+# --- INGESTION ---
+Fetch = Callable[[str], List[dict]]
+
+
+class TrendIngestor:
+    """A background thread that re-pulls every watched topic once per `interval`, `workers` topics at a time.
+
+    `fetch(query) -> results` is the search (e.g. `swarm.tavily_search`);
+    `queries(topic)` expands a topic into the searches made for it.
+    """
+    def __init__(self, index: TrendIndex, fetch: Fetch, interval: float = INTERVAL_S,
+                 queries: Callable[[str], List[str]] = lambda topic: [topic], poll_seconds: float = 30.0,
+                 workers: int = WORKERS):
+        self.index = index
+        self.fetch = fetch
+        self.interval = interval
+        self.queries = queries
+        self.poll_seconds = poll_seconds
+        self.workers = workers
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trend-ingest", daemon=True)
+
+    def start(self) -> "TrendIngestor":
+        self._thread.start()
+        return self
+
+    def notify(self):
+        """Pull newly watched topics now instead of at the next poll."""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive(): self._thread.join(timeout)
+
+    def pull(self, topic: str) -> int:
+        with tracing.span("trends.pull"):
+            results = []
+            for query in self.queries(topic):
+                results.extend(self.fetch(query))
+            return self.index.ingest(topic, results)
+
+    def run_once(self) -> dict:
+        """Pull every due topic once; returns {topic: new trends, or the error}."""
+        def pull(topic: str):
+            if self._stop.is_set():
+                return None
+            try:
+                return self.pull(topic)
+            except Exception as e:
+                log.warning("trend pull for %r failed: %s", topic, e)
+                self.index.mark_failed(topic, f"{type(e).__name__}: {e}")
+                return f"{type(e).__name__}: {e}"
+
+        due = self.index.due(self.interval)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(due) or 1)), thread_name_prefix="trend-pull") as pool:
+            report = dict(zip(due, pool.map(pull, due)))
+        self.index.prune()
+        return report
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error:
+                log.exception("trend index unavailable")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+
+def configured_topics() -> List[str]:
+    return [t.strip() for t in os.getenv("TREND_TOPICS", "").split(";") if t.strip()]
+
+
+_init_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _configured_index() -> Optional[TrendIndex]:
+    if os.getenv("TRENDS", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    index = TrendIndex(os.getenv("TRENDS_DB", TRENDS_DB))
+    for topic in configured_topics():
+        index.watch(topic)
+    return index
+
+
+def get_index() -> Optional[TrendIndex]:
+    """Process-wide trend index configured from the environment, or None when disabled."""
+    with _init_lock:  # the first calls can race in from the swarm's worker threads
+        return _configured_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the AuthentiPost trend index")
+    parser.add_argument("--db", default=os.getenv("TRENDS_DB", TRENDS_DB))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_watch = sub.add_parser("watch", help="pull a topic in the background from now on")
+    p_watch.add_argument("topic")
+    p_unwatch = sub.add_parser("unwatch")
+    p_unwatch.add_argument("topic")
+    sub.add_parser("topics", help="watched topics and when they were last pulled")
+    p_ingest = sub.add_parser("ingest", help="pull due topics with the live search")
+    p_ingest.add_argument("--once", action="store_true", help="one pass instead of running forever")
+    p_ingest.add_argument("--interval", type=float, default=INTERVAL_S)
+    p_query = sub.add_parser("query", help="best-ranked trends for a topic")
+    p_query.add_argument("topic")
+    p_query.add_argument("-n", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    index = TrendIndex(args.db)
+    if args.cmd == "watch":
+        index.watch(args.topic)
+    elif args.cmd == "unwatch":
+        index.unwatch(args.topic)
+    elif args.cmd == "topics":
+        for t in index.topics():
+            pulled = time.strftime("%Y-%m-%d %H:%M", time.localtime(t["pulled"])) if t["pulled"] else "never"
+            print(f"{t['query']:<50}{pulled:>18}  {t['error'] or ''}")
+    elif args.cmd == "ingest":
+        from dotenv import load_dotenv
+        load_dotenv()
+        import swarm
+        ingestor = TrendIngestor(index, swarm.tavily_search, args.interval, swarm.scout_queries)
+        while True:
+            print(json.dumps(ingestor.run_once()))
+            if args.once:
+                break
+            time.sleep(ingestor.poll_seconds)
+    elif args.cmd == "query":
+        for t in index.query(args.topic, args.n, fresh_within=None):
+            print(f"{t['rank']:>6.3f}  {t['url'] or '-'}\n        {t['content'][:120]}")
+
+
+if __name__ == "__main__":
+    main()
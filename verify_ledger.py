@@ -0,0 +1,178 @@
+"""Bulk verification of every signed post in the ledger.
+
+Records are streamed from the ledger in chunks and fanned out over a process
+pool, so verification uses every core even on the pure-Python backend.
+Each worker keeps its own parsed-key cache (see `signing`), and the hash
+chain is checked in the parent process while the workers verify.
+
+    python verify_ledger.py --workers 8 --out results.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import signing
+import tracing
+import keystore
+from ledger import Ledger, GENESIS_HASH, record_hash
+
+CHUNK_SIZE = 256
+VERIFY_FIELDS = ("seq", "tweet_id", "content", "timestamp") + signing.RECORD_FIELDS
+
+
+# key_id -> public key hex, set once per worker process by _init_worker
+_PUBLIC_KEYS: Dict[str, str] = {}
+
+
+def verify_entry(entry: dict, ts_window: int = signing.LEGACY_TS_WINDOW,
+                 public_keys: Optional[Dict[str, str]] = None) -> dict:
+    result = {"seq": entry.get("seq"), "tweet_id": entry.get("tweet_id")}
+    if not entry.get("signature") or not (entry.get("public_key") or entry.get("key_id")):
+        return {**result, "scheme": None, "ok": False, "reason": "unsigned"}
+    if entry.get("format") is None:
+        ok = signing.verify_record(entry, public_keys, ts_window)
+        return {**result, "scheme": "legacy", "ok": ok, "reason": None if ok else "bad signature"}
+    result["scheme"] = f"v{entry['format']}"
+    if entry["format"] not in signing.SUPPORTED_FORMATS:
+        return {**result, "ok": False, "reason": "unsupported format"}
+    if signing.key_mismatch(entry, public_keys):
+        return {**result, "ok": False, "reason": "key mismatch"}
+    if not signing.resolve_public_key(entry, public_keys):
+        return {**result, "ok": False, "reason": "unknown key"}
+    if not signing.verify_record(entry, public_keys):
+        return {**result, "ok": False, "reason": "bad signature"}
+    if signing.payload_content(entry["payload"]) != entry.get("content"):
+        return {**result, "ok": False, "reason": "content mismatch"}
+    return {**result, "ok": True, "reason": None}
+
+
+def _init_worker(key_table: Dict[str, dict]):
+    global _PUBLIC_KEYS
+    _PUBLIC_KEYS = keystore.precompute_table(key_table)
+
+
+def _verify_chunk(chunk: List[dict], ts_window: int) -> Tuple[List[dict], float]:
+    """Results for a chunk and the seconds the worker spent on it, for the parent's `verify.chunk` histogram."""
+    started = time.perf_counter()
+    results = [verify_entry(entry, ts_window, _PUBLIC_KEYS) for entry in chunk]
+    return results, time.perf_counter() - started
+
+
+def _chunks(entries: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for entry in entries:
+        chunk.append({k: entry.get(k) for k in VERIFY_FIELDS})
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _ChainCheck:
+    """Incremental prev_hash/hash check over records as they stream past."""
+    def __init__(self):
+        self.prev_hash = GENESIS_HASH
+        self.expected_seq = 0
+        self.first_bad_seq: Optional[int] = None
+
+    def __call__(self, entries: Iterable[dict]) -> Iterator[dict]:
+        for entry in entries:
+            if self.first_bad_seq is None:
+                if (entry.get("seq") != self.expected_seq or entry.get("prev_hash") != self.prev_hash
+                        or record_hash(entry) != entry.get("hash")):
+                    self.first_bad_seq = self.expected_seq
+                self.prev_hash, self.expected_seq = entry.get("hash"), self.expected_seq + 1
+            yield entry
+
+
+def verify_entries(entries: Iterable[dict], workers: Optional[int] = None, chunk_size: int = CHUNK_SIZE,
+                   ts_window: int = signing.LEGACY_TS_WINDOW, key_table: Optional[Dict[str, dict]] = None,
+                   on_result: Optional[Callable[[dict], None]] = None) -> dict:
+    """Verify a stream of ledger entries and return a summary.
+
+    At most `2 * workers` chunks are in flight, so memory stays bounded no
+    matter how large the ledger is. Results are reported in ledger order.
+    `key_table` (see `keystore.load_key_table`) resolves entries that name
+    their signer by key id; each worker parses those keys once at startup.
+    """
+    key_table = key_table or {}
+    workers = workers or os.cpu_count() or 1
+    chain = _ChainCheck()
+    counts, reasons = Counter(), Counter()
+    started = time.perf_counter()
+
+    def record(done: Tuple[List[dict], float]):
+        results, seconds = done
+        tracing.record("verify.chunk", seconds, entries=len(results))  # worker processes' own spans stay in those processes
+        for result in results:
+            counts["valid" if result["ok"] else "invalid"] += 1
+            if result["reason"]: reasons[result["reason"]] += 1
+            if on_result: on_result(result)
+
+    chunks = _chunks(chain(entries), chunk_size)
+    if workers == 1:
+        _init_worker(key_table)
+        for chunk in chunks:
+            record(_verify_chunk(chunk, ts_window))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(key_table,)) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(_verify_chunk, chunk, ts_window))
+                if len(in_flight) >= workers * 2:
+                    record(in_flight.popleft().result())
+            while in_flight:
+                record(in_flight.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    total = counts["valid"] + counts["invalid"]
+    return {
+        "total": total,
+        "valid": counts["valid"],
+        "invalid": counts["invalid"],
+        "reasons": dict(reasons),
+        "chain_ok": chain.first_bad_seq is None,
+        "first_bad_seq": chain.first_bad_seq,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "entries_per_s": round(total / elapsed, 1) if elapsed else None,
+    }
+
+
+def verify_ledger(ledger_dir: str = "ledger", keys_dir: str = keystore.KEYS_DIR, **kwargs) -> dict:
+    return verify_entries(Ledger(ledger_dir).iter_records(), key_table=keystore.load_key_table(keys_dir), **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-verify every signature in the AuthentiPost ledger")
+    parser.add_argument("--ledger", default="ledger", help="ledger directory")
+    parser.add_argument("--keys", default=keystore.KEYS_DIR, help="key store directory (only keystore.json is read)")
+    parser.add_argument("--workers", type=int, default=None, help="verification processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--ts-window", type=int, default=signing.LEGACY_TS_WINDOW,
+                        help="seconds to search back for the signing time of legacy entries")
+    parser.add_argument("--out", help="write per-entry results as JSONL to this file ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    out = None
+    if args.out == "-": out = sys.stdout
+    elif args.out: out = open(args.out, "w", encoding="utf-8")
+    on_result = (lambda r: out.write(json.dumps(r) + "\n")) if out else None
+    try:
+        summary = verify_ledger(args.ledger, args.keys, workers=args.workers, chunk_size=args.chunk_size,
+                                ts_window=args.ts_window, on_result=on_result)
+    finally:
+        if out and out is not sys.stdout: out.close()
+
+    print(json.dumps(summary, indent=4), file=sys.stderr if out is sys.stdout else sys.stdout)
+    raise SystemExit(0 if summary["invalid"] == 0 and summary["chain_ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""X (Twitter) API v2 broadcasting, plus a local stand-in for offline runs.
+
+All live posts go through one process-wide tweepy client, so every worker
+thread shares one pooled keep-alive session instead of handshaking per
+tweet. Calls are scheduled by the "x" limiter in `ratelimit`, which caps
+how many posts are in flight and backs off on 429s (X's
+`x-rate-limit-reset` header pauses the whole bucket until the window
+resets). Every request has a read timeout of `X_TIMEOUT` seconds, so a
+stalled connection fails into that retry path instead of pinning a worker.
+
+`X_API_BASE_URL` points the client somewhere other than api.twitter.com,
+for example at the stand-in:
+
+    python x_api.py serve --port 8787 --latency 0.05 --rpm 300
+    X_API_BASE_URL=http://127.0.0.1:8787 python x_api.py post "hello"
+"""
+import os
+import json
+import time
+import argparse
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import ratelimit
+import tracing
+
+X_HOST = "https://api.twitter.com"
+RATE_WINDOW_SECONDS = 60
+TIMEOUT = (5.0, float(os.getenv("X_TIMEOUT", "30")))  # (connect, read) seconds per request
+
+
+# --- CLIENT ---
+def build_client(base_url: Optional[str] = None, pool_size: Optional[int] = None):
+    """A tweepy v2 client using the X_* credentials, optionally pointed at another host."""
+    import tweepy  # ~200 ms to import; only live broadcasts need it
+
+    client = tweepy.Client(consumer_key=os.getenv("X_CONSUMER_KEY"), consumer_secret=os.getenv("X_CONSUMER_SECRET"),
+                           access_token=os.getenv("X_ACCESS_TOKEN"), access_token_secret=os.getenv("X_ACCESS_SECRET"))
+    client.session = _Session(base_url)  # tweepy hard-codes its host and sets no timeout
+    # One pooled connection per in-flight post, so concurrent workers never queue for a socket
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or ratelimit.get_limiter("x").concurrency)
+    client.session.mount("https://", adapter)
+    client.session.mount("http://", adapter)
+    return client
+
+
+class _Session(requests.Session):
+    """Sends X_HOST requests to `base_url` when given, always with a timeout."""
+    def __init__(self, base_url: Optional[str] = None, timeout=TIMEOUT):
+        super().__init__()
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.timeout = timeout
+
+    def request(self, method, url, *args, **kwargs):
+        if self.base_url and url.startswith(X_HOST): url = self.base_url + url[len(X_HOST):]
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, *args, **kwargs)
+
+
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _configured_client():
+    return build_client(os.getenv("X_API_BASE_URL"))
+
+
+def get_client():
+    """Process-wide client shared by every broadcast worker."""
+    with _client_lock:
+        return _configured_client()
+
+
+def has_credentials() -> bool:
+    return all(os.getenv(name) for name in ("X_CONSUMER_KEY", "X_CONSUMER_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_SECRET"))
+
+
+def post_tweet(text: str, client=None) -> str:
+    """Publish `text` and return the new tweet id; throttled and transient failures are retried by the limiter."""
+    with tracing.span("x.post"):
+        response = ratelimit.call("x", (client or get_client()).create_tweet, text=text, user_auth=True)
+    return str(response.data["id"])
+
+
+# --- LOCAL STAND-IN ---
+class StandInServer(ThreadingHTTPServer):
+    """Just enough of `POST /2/tweets` to exercise the broadcaster offline.
+
+    Mirrors the behaviour the client has to cope with: OAuth 1.0a is
+    required, identical text is rejected with 403, and at most `limit` posts
+    are accepted per `window` seconds before 429s with `x-rate-limit-reset`.
+    `latency` seconds are added to every post.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency: float = 0.0, limit: Optional[int] = None,
+                 window: float = RATE_WINDOW_SECONDS):
+        super().__init__(address, _StandInHandler)
+        self.latency = latency
+        self.limit = limit
+        self.window_seconds = window
+        self.lock = threading.Lock()
+        self.tweets = {}
+        self.window = []
+        self.connections = 0
+        self.rejected = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        threading.Thread(target=self.serve_forever, name="x-stand-in", daemon=True).start()
+        return self
+
+    def admit(self) -> Optional[float]:
+        """Record a post in the rate window, or return the epoch second it resets."""
+        with self.lock:
+            now = time.time()
+            self.window = [t for t in self.window if t > now - self.window_seconds]
+            if self.limit is not None and len(self.window) >= self.limit:
+                self.rejected += 1
+                return self.window[0] + self.window_seconds
+            self.window.append(now)
+            return None
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.split("?")[0] != "/2/tweets":
+            return self._reply(404, {"title": "Not Found Error", "detail": self.path})
+        if not (self.headers.get("Authorization") or "").startswith("OAuth "):
+            return self._reply(401, {"title": "Unauthorized", "detail": "OAuth 1.0a user context required"})
+        reset = self.server.admit()
+        if reset is not None:
+            return self._reply(429, {"title": "Too Many Requests", "detail": "Too Many Requests"},
+                               {"x-rate-limit-reset": str(int(reset) + 1)})  # X sends whole epoch seconds
+        time.sleep(self.server.latency)
+        try: text = json.loads(body)["text"]
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {"title": "Invalid Request", "detail": "text is required"})
+        with self.server.lock:
+            if text in self.server.tweets.values():
+                return self._reply(403, {"detail": "You are not allowed to create a Tweet with duplicate content."})
+            tweet_id = str(1_800_000_000_000_000_000 + len(self.server.tweets))
+            self.server.tweets[tweet_id] = text
+        self._reply(201, {"data": {"id": tweet_id, "text": text, "edit_history_tweet_ids": [tweet_id]}})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post to X, or serve a local stand-in for its API")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the local POST /2/tweets stand-in")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8787)
+    serve.add_argument("--latency", type=float, default=0.0, help="seconds added to every post")
+    serve.add_argument("--rpm", type=int, help="posts accepted per minute before 429s")
+    post = sub.add_parser("post", help="publish one tweet via X_API_BASE_URL (default: the real API)")
+    post.add_argument("text")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        server = StandInServer((args.host, args.port), latency=args.latency, limit=args.rpm)
+        print(f"X API stand-in on {server.url}")
+        try: server.serve_forever()
+        except KeyboardInterrupt: pass
+    else:
+        print(post_tweet(args.text))
+
+
+if __name__ == "__main__":
+    main()